@@ -0,0 +1,37 @@
+-- ================================================
+-- 数据库迁移脚本：添加内容指纹列
+-- 表名: articles, news, school_notices
+-- 目的: 支持变更检测，重复抓取时只更新变化的列、复用未变内容的 AI 摘要
+-- ================================================
+
+-- 1. 添加 fingerprint 列
+ALTER TABLE articles
+ADD COLUMN IF NOT EXISTS fingerprint JSONB;
+
+ALTER TABLE news
+ADD COLUMN IF NOT EXISTS fingerprint JSONB;
+
+ALTER TABLE school_notices
+ADD COLUMN IF NOT EXISTS fingerprint JSONB;
+
+-- 2. 添加字段注释
+COMMENT ON COLUMN articles.fingerprint IS '逐字段内容指纹（字段名 -> 短哈希，_input 为 AI 摘要输入的哈希）';
+COMMENT ON COLUMN news.fingerprint IS '逐字段内容指纹（字段名 -> 短哈希，_input 为 AI 摘要输入的哈希）';
+COMMENT ON COLUMN school_notices.fingerprint IS '逐字段内容指纹（字段名 -> 短哈希，_input 为 AI 摘要输入的哈希）';
+
+-- 3. 验证列是否添加成功
+SELECT
+  table_name,
+  column_name,
+  data_type,
+  is_nullable
+FROM information_schema.columns
+WHERE table_name IN ('articles', 'news', 'school_notices')
+  AND column_name = 'fingerprint';
+
+-- 4. 显示结果
+SELECT
+  '✅ fingerprint 列添加成功！' as status,
+  (SELECT COUNT(*) FROM articles) as articles_total,
+  (SELECT COUNT(*) FROM news) as news_total,
+  (SELECT COUNT(*) FROM school_notices) as notices_total;
@@ -0,0 +1,31 @@
+-- ================================================
+-- 数据库迁移脚本：添加阅读页预排版列
+-- 表名: articles, news, school_notices
+-- 目的: 抓取脚本 --reader-payload 入库时写入目录、分块偏移、字数与阅读时长，
+--       阅读页先渲染首屏几块，其余按偏移量懒加载，不必打开文章时解析整篇 Markdown
+-- ================================================
+
+-- 1. 添加 reader_payload 列
+ALTER TABLE articles
+ADD COLUMN IF NOT EXISTS reader_payload JSONB;
+
+ALTER TABLE news
+ADD COLUMN IF NOT EXISTS reader_payload JSONB;
+
+ALTER TABLE school_notices
+ADD COLUMN IF NOT EXISTS reader_payload JSONB;
+
+-- 2. 添加字段注释
+COMMENT ON COLUMN articles.reader_payload IS '阅读页预排版（version / words / reading_minutes / excerpt / first_screen / toc / blocks，块偏移为 content 的 UTF-16 下标）';
+COMMENT ON COLUMN news.reader_payload IS '阅读页预排版（version / words / reading_minutes / excerpt / first_screen / toc / blocks，块偏移为 content 的 UTF-16 下标）';
+COMMENT ON COLUMN school_notices.reader_payload IS '阅读页预排版（version / words / reading_minutes / excerpt / first_screen / toc / blocks，块偏移为 content 的 UTF-16 下标）';
+
+-- 3. 验证列是否添加成功
+SELECT
+  table_name,
+  column_name,
+  data_type,
+  is_nullable
+FROM information_schema.columns
+WHERE table_name IN ('articles', 'news', 'school_notices')
+  AND column_name = 'reader_payload';
@@ -0,0 +1,35 @@
+-- ================================================
+-- 数据库迁移脚本：添加推荐分列
+-- 表名: articles, news, school_notices
+-- 目的: 抓取脚本 --recommend 入库时写入与收藏的相似度，客户端按此列排序，不必每次请求时计算
+-- ================================================
+
+-- 1. 添加 recommend_score 列
+ALTER TABLE articles
+ADD COLUMN IF NOT EXISTS recommend_score REAL;
+
+ALTER TABLE news
+ADD COLUMN IF NOT EXISTS recommend_score REAL;
+
+ALTER TABLE school_notices
+ADD COLUMN IF NOT EXISTS recommend_score REAL;
+
+-- 2. 排序索引（推荐分相同按发布时间，未打分的排在最后）
+CREATE INDEX IF NOT EXISTS idx_articles_recommend ON articles (recommend_score DESC NULLS LAST, published_at DESC);
+CREATE INDEX IF NOT EXISTS idx_news_recommend ON news (recommend_score DESC NULLS LAST, published_at DESC);
+CREATE INDEX IF NOT EXISTS idx_school_notices_recommend ON school_notices (recommend_score DESC NULLS LAST, published_at DESC);
+
+-- 3. 添加字段注释
+COMMENT ON COLUMN articles.recommend_score IS '与用户收藏的最大余弦相似度（0~1，本地哈希向量，入库时计算）';
+COMMENT ON COLUMN news.recommend_score IS '与用户收藏的最大余弦相似度（0~1，本地哈希向量，入库时计算）';
+COMMENT ON COLUMN school_notices.recommend_score IS '与用户收藏的最大余弦相似度（0~1，本地哈希向量，入库时计算）';
+
+-- 4. 验证列是否添加成功
+SELECT
+  table_name,
+  column_name,
+  data_type,
+  is_nullable
+FROM information_schema.columns
+WHERE table_name IN ('articles', 'news', 'school_notices')
+  AND column_name = 'recommend_score';
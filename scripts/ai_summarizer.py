@@ -8,14 +8,145 @@ import requests
 import json
 import os
 import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
 from typing import Optional, Dict
 
+from profiling import PROFILER
+
 # 硅基流动 API 配置
-SILICONFLOW_API_BASE = "https://api.siliconflow.cn/v1"
+SILICONFLOW_API_BASE = os.environ.get('SILICONFLOW_API_BASE', "https://api.siliconflow.cn/v1")
+
+# 复用到 API 的 HTTPS 连接（一次运行内多次调用、常驻模式下跨运行都不再重复握手）
+SESSION = requests.Session()
 SILICONFLOW_MODEL = "Qwen/Qwen2.5-7B-Instruct"  # 或使用 deepseek-ai/DeepSeek-V2.5
 
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_METRICS_PATH = os.path.join(SCRIPT_DIR, '.cache', 'ai_metrics.jsonl')
+
+# ==================== 模型路由 ====================
+
+# 三档：短内容和低优先级交给小模型，其余用默认模型（SILICONFLOW_MODEL），长且高优先级的内容交给大模型
+FAST_MODEL = os.environ.get('SILICONFLOW_FAST_MODEL', 'Qwen/Qwen2-1.5B-Instruct')
+STRONG_MODEL = os.environ.get('SILICONFLOW_STRONG_MODEL', 'Qwen/Qwen2.5-72B-Instruct')
+
+# 各类型的输出预算（max_tokens）：提示词要求的段落数不同，篇幅也不同
+OUTPUT_BUDGETS = {'notice': 800, 'github': 700, 'news': 900, 'news_en': 900}
+DEFAULT_OUTPUT_BUDGET = 1024
+SHORT_INPUT_CHARS = 500        # 输入少于此长度时没有多少可展开的内容，用小模型并缩小输出预算
+SHORT_OUTPUT_BUDGET = 400
+LONG_INPUT_CHARS = 1500        # 高优先级且输入达到此长度才使用大模型
+# 按描述长度判断的类型单独设阈值（GitHub 描述最多 350 字符，写满一两句话说明项目本身内容较多）
+LONG_ROUTE_CHARS = {'github': 160}
+
+Route = namedtuple('Route', ['name', 'model', 'max_tokens'])
+
 
-def generate_summary(content: str, content_type: str = "notice", api_key: Optional[str] = None) -> Optional[str]:
+def route_for(content: str, content_type: str = "notice", priority: Optional[str] = None,
+              route_chars: Optional[int] = None) -> Route:
+    """
+    按内容类型、输入长度和优先级选择模型与输出预算
+
+    Args:
+        content: 输入内容
+        content_type: 内容类型
+        priority: 文章优先级（'high' / 'low' / None；'low' 使用小模型）
+        route_chars: 选择大模型时判断长短用的长度（默认为输入长度；GitHub 项目传描述长度，
+            附带的 README 节选只是参考材料，每个项目都有，不代表内容本身更长）
+
+    Returns:
+        Route(name, model, max_tokens)
+    """
+    length = len(content)
+    budget = OUTPUT_BUDGETS.get(content_type, DEFAULT_OUTPUT_BUDGET)
+    if length < SHORT_INPUT_CHARS:
+        budget = min(budget, SHORT_OUTPUT_BUDGET)
+
+    if route_chars is None:
+        long_input = length >= LONG_INPUT_CHARS
+    else:
+        long_input = route_chars >= LONG_ROUTE_CHARS.get(content_type, LONG_INPUT_CHARS)
+    if priority == 'high' and long_input:
+        return Route('strong', STRONG_MODEL, budget)
+    if priority == 'low' or length < SHORT_INPUT_CHARS:
+        return Route('small', FAST_MODEL, budget)
+    return Route('default', SILICONFLOW_MODEL, budget)
+
+
+class RouteMetrics:
+    """
+    按路由记录每次调用的延迟与 token 用量
+
+    每次调用追加一行到 JSONL 文件，可跨多次运行汇总对比（python ai_summarizer.py --metrics）。
+    """
+
+    def __init__(self, path: str = DEFAULT_METRICS_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.records = []
+
+    def record(self, route: Route, content_type: str, latency: float, usage: Optional[Dict], ok: bool):
+        entry = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'route': route.name,
+            'model': route.model,
+            'type': content_type,
+            'max_tokens': route.max_tokens,
+            'latency': round(latency, 3),
+            'prompt_tokens': (usage or {}).get('prompt_tokens'),
+            'completion_tokens': (usage or {}).get('completion_tokens'),
+            'ok': ok,
+        }
+        with self.lock:
+            self.records.append(entry)
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            except IOError:
+                pass
+
+    @staticmethod
+    def summarize(records) -> Dict[str, Dict]:
+        """按路由汇总：调用数、失败数、平均 / P95 延迟、平均输入 / 输出 token"""
+        by_route = {}
+        for entry in records:
+            by_route.setdefault(entry['route'], []).append(entry)
+
+        summary = {}
+        for name, entries in sorted(by_route.items()):
+            latencies = sorted(e['latency'] for e in entries if e['ok'])
+            prompt = [e['prompt_tokens'] for e in entries if e.get('prompt_tokens') is not None]
+            completion = [e['completion_tokens'] for e in entries if e.get('completion_tokens') is not None]
+            summary[name] = {
+                'calls': len(entries),
+                'failed': sum(not e['ok'] for e in entries),
+                'avg_latency': sum(latencies) / len(latencies) if latencies else None,
+                'p95_latency': latencies[int(0.95 * (len(latencies) - 1))] if latencies else None,
+                'avg_prompt_tokens': sum(prompt) / len(prompt) if prompt else None,
+                'avg_completion_tokens': sum(completion) / len(completion) if completion else None,
+            }
+        return summary
+
+    def report(self, records=None):
+        """输出各路由的汇总（默认只统计本次运行）"""
+        summary = self.summarize(self.records if records is None else records)
+        for name, s in summary.items():
+            latency = f"{s['avg_latency']:.1f}s / P95 {s['p95_latency']:.1f}s" if s['avg_latency'] is not None else '-'
+            tokens = (f"{s['avg_prompt_tokens']:.0f} → {s['avg_completion_tokens']:.0f}"
+                      if s['avg_prompt_tokens'] is not None and s['avg_completion_tokens'] is not None else '-')
+            print(f"📈 路由 {name}: {s['calls']} 次（失败 {s['failed']}），延迟 {latency}，"
+                  f"平均 token 输入→输出 {tokens}", file=sys.stderr)
+
+
+# 进程内共用的路由统计
+ROUTE_METRICS = RouteMetrics()
+
+
+def generate_summary(content: str, content_type: str = "notice", api_key: Optional[str] = None,
+                     priority: Optional[str] = None, route_chars: Optional[int] = None) -> Optional[str]:
     """
     调用硅基流动 API 生成智能摘要
 
@@ -23,6 +154,8 @@ def generate_summary(content: str, content_type: str = "notice", api_key: Option
         content: 原始内容（Markdown 或文本）
         content_type: 内容类型 ('notice' 或 'github')
         api_key: 硅基流动 API Key（可从环境变量获取）
+        priority: 文章优先级，参与模型路由（见 route_for）
+        route_chars: 模型路由判断长短用的长度（见 route_for）
 
     Returns:
         生成的智能摘要（Markdown 格式）
@@ -133,44 +266,51 @@ def generate_summary(content: str, content_type: str = "notice", api_key: Option
         'Content-Type': 'application/json'
     }
 
+    content = content[:3000]  # 限制长度避免超限
+    route = route_for(content, content_type, priority, route_chars)
     payload = {
-        'model': SILICONFLOW_MODEL,
+        'model': route.model,
         'messages': [
             {'role': 'system', 'content': system_prompt},
-            {'role': 'user', 'content': f"请分析以下内容：\n\n{content[:3000]}"}  # 限制长度避免超限
+            {'role': 'user', 'content': f"请分析以下内容：\n\n{content}"}
         ],
         'temperature': 0.7,
-        'max_tokens': 1024,
+        'max_tokens': route.max_tokens,
         'stream': False
     }
 
+    started = time.monotonic()
+    data = None
     try:
-        print(f"正在调用硅基流动 API 生成摘要（类型: {content_type}）...", file=sys.stderr)
+        print(f"正在调用硅基流动 API 生成摘要（类型: {content_type}，路由: {route.name} {route.model}）...", file=sys.stderr)
 
-        response = requests.post(
-            f"{SILICONFLOW_API_BASE}/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=30
-        )
-        response.raise_for_status()
+        with PROFILER.stage('ai'):
+            response = SESSION.post(
+                f"{SILICONFLOW_API_BASE}/chat/completions",
+                headers=headers,
+                json=payload,
+                timeout=30
+            )
+            response.raise_for_status()
 
-        data = response.json()
+            data = response.json()
 
         if 'choices' in data and len(data['choices']) > 0:
             summary = data['choices'][0]['message']['content'].strip()
+            ROUTE_METRICS.record(route, content_type, time.monotonic() - started, data.get('usage'), True)
             print(f"✅ AI 摘要生成成功（{len(summary)} 字符）", file=sys.stderr)
             return summary
         else:
             print(f"⚠️ API 响应格式异常: {data}", file=sys.stderr)
-            return None
 
     except requests.exceptions.RequestException as e:
         print(f"❌ API 请求失败: {e}", file=sys.stderr)
-        return None
     except json.JSONDecodeError as e:
         print(f"❌ JSON 解析失败: {e}", file=sys.stderr)
-        return None
+
+    ROUTE_METRICS.record(route, content_type, time.monotonic() - started,
+                         data.get('usage') if isinstance(data, dict) else None, False)
+    return None
 
 
 def batch_generate_summaries(articles: list, content_type: str = "notice", api_key: Optional[str] = None) -> list:
@@ -246,8 +386,24 @@ def main():
     parser.add_argument('--api-key', default='', help='硅基流动 API Key')
     parser.add_argument('--content', default='', help='待分析的内容')
     parser.add_argument('--type', default='notice', choices=['notice', 'github'], help='内容类型')
+    parser.add_argument('--priority', default=None, choices=['high', 'low'], help='文章优先级（参与模型路由）')
+    parser.add_argument('--metrics', action='store_true', help='汇总历次调用的各路由延迟与 token 用量')
+    parser.add_argument('--profile', action='store_true', help='剖析运行：CPU/内存报告与火焰图折叠栈（scripts/.cache/profiles）')
 
     args = parser.parse_args()
+    if args.profile:
+        PROFILER.start('ai_summarizer')
+
+    # 路由统计
+    if args.metrics:
+        try:
+            with open(ROUTE_METRICS.path, 'r', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f if line.strip()]
+        except IOError:
+            records = []
+        print(f"📊 {ROUTE_METRICS.path}: {len(records)} 次调用", file=sys.stderr)
+        ROUTE_METRICS.report(records)
+        return
 
     # 获取 API Key
     api_key = args.api_key or os.environ.get('SILICONFLOW_API_KEY')
@@ -276,7 +432,8 @@ def main():
         summary = generate_summary(
             content=args.content,
             content_type=args.type,
-            api_key=api_key
+            api_key=api_key,
+            priority=args.priority
         )
 
         if summary:
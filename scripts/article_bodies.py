@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+列表投影与正文分离存储
+列表页只需要标题、摘要、优先级、标签、日期和来源，而每行的大部分字节是 content（完整 Markdown，常常整段重复 AI 摘要）。
+正文去掉重复的 AI 摘要后压缩写入 article_bodies，阅读页按 source_url 取回并还原；列表查询走
+split_article_bodies.sql 中的 *_list 视图。App 目前仍整行读取主表（app/lib/features/feed/data/repositories/article_repository.dart），
+还没有视图与正文表的读取路径，因此抓取脚本不再写正文表：这里只提供编码、字节数对比（stats）
+和 App 上线读取路径时一次性回填正文表的 migrate
+"""
+
+import base64
+import json
+import os
+import sys
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# ==================== 配置区 ====================
+
+BODY_TABLE = 'article_bodies'
+BATCH_SIZE = 100
+COMPRESS_LEVEL = 9
+
+# 正文中 AI 摘要原文的占位符（还原时替换回该行的 ai_summary）
+AI_MARKER = '{{ai_summary}}'
+
+# 正文编码：zlib 压缩后 base64（PostgREST 以 JSON 传输，TEXT 列存 base64 最稳妥）；
+# 带 +ai 后缀表示正文中的 AI 摘要已替换为占位符
+FORMAT_PLAIN = 'zlib'
+FORMAT_DEDUPED = 'zlib+ai'
+
+# 列表投影包含的列（与 split_article_bodies.sql 中各表的 *_list 视图一致，各表只取自己有的列）
+LIST_COLUMNS = (
+    'id', 'title', 'summary', 'source', 'source_url', 'author', 'category', 'priority',
+    'tags', 'published_at', 'fetched_at', 'is_favorited', 'recommend_score',
+)
+
+
+# ==================== 编码 ====================
+
+def pack_body(content: str, ai_summary: Optional[str] = None) -> Tuple[str, str]:
+    """
+    压缩正文；content 中整段出现的 AI 摘要替换为占位符（主表已有 ai_summary，不再存第二份）
+
+    Returns:
+        (format, 编码后的正文)
+    """
+    fmt = FORMAT_PLAIN
+    if ai_summary and ai_summary in content and AI_MARKER not in content:
+        content = content.replace(ai_summary, AI_MARKER)
+        fmt = FORMAT_DEDUPED
+    data = zlib.compress(content.encode('utf-8'), COMPRESS_LEVEL)
+    return fmt, base64.b64encode(data).decode('ascii')
+
+
+def unpack_body(fmt: str, body: str, ai_summary: Optional[str] = None) -> str:
+    """pack_body 的逆过程"""
+    content = zlib.decompress(base64.b64decode(body)).decode('utf-8')
+    if fmt == FORMAT_DEDUPED:
+        content = content.replace(AI_MARKER, ai_summary or '')
+    return content
+
+
+def list_projection(row: Dict) -> Dict:
+    """只保留列表页需要的列"""
+    return {key: row[key] for key in LIST_COLUMNS if key in row}
+
+
+def _json_size(value) -> int:
+    return len(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+# ==================== 正文存储 ====================
+
+class BodyStore:
+    """
+    article_bodies 表的读写（每个 source_url 一行，三张内容表共用）
+
+    用法:
+        stored = bodies.write('news', [(url, content, ai_summary), ...])   # 返回写入成功的 URL
+        content = bodies.read(url, ai_summary)                             # 没有分离存储时为 None
+    """
+
+    def __init__(self, client, table: str = BODY_TABLE, batch_size: int = BATCH_SIZE):
+        self.client = client
+        self.table = table
+        self.batch_size = batch_size
+        self.stats = {'bodies': 0, 'deduped': 0, 'raw_bytes': 0, 'stored_bytes': 0, 'failed': 0}
+
+    def _row(self, source_table: str, url: str, content: str, ai_summary: Optional[str]) -> Dict:
+        fmt, body = pack_body(content, ai_summary)
+        self.stats['raw_bytes'] += len(content.encode('utf-8'))
+        self.stats['stored_bytes'] += len(body)
+        self.stats['deduped'] += fmt == FORMAT_DEDUPED
+        return {'source_url': url, 'source_table': source_table, 'format': fmt,
+                'body': body, 'raw_chars': len(content)}
+
+    def write(self, source_table: str, items: Iterable[Tuple[str, str, Optional[str]]]) -> Set[str]:
+        """
+        写入一批正文（已存在的按 source_url 更新）
+
+        Args:
+            items: (source_url, content, ai_summary)
+
+        Returns:
+            写入成功的 source_url 集合（失败的行主表应保留 content）
+        """
+        rows = {url: self._row(source_table, url, content or '', ai_summary)
+                for url, content, ai_summary in items}
+        stored = set()
+        urls = list(rows)
+        for start in range(0, len(urls), self.batch_size):
+            chunk = urls[start:start + self.batch_size]
+            try:
+                result = self.client.table(self.table).select('id, source_url').in_('source_url', chunk).execute()
+            except Exception as e:
+                print(f"  ⚠️ 查询正文表失败，本批正文保留在主表: {e}", file=sys.stderr)
+                self.stats['failed'] += len(chunk)
+                continue
+            existing = {row['source_url']: row['id'] for row in result.data or []}
+
+            for url in chunk:
+                if url not in existing:
+                    continue
+                try:
+                    self.client.table(self.table).update(rows[url]).eq('id', existing[url]).execute()
+                    stored.add(url)
+                except Exception as e:
+                    print(f"  ⚠️ 正文更新失败 ({url[-40:]}): {e}", file=sys.stderr)
+                    self.stats['failed'] += 1
+
+            new_rows = [rows[url] for url in chunk if url not in existing]
+            stored.update(self._insert(new_rows))
+
+        self.stats['bodies'] += len(stored)
+        return stored
+
+    def _insert(self, rows: List[Dict]) -> List[str]:
+        """批量插入；整批失败时逐条重试"""
+        if not rows:
+            return []
+        try:
+            self.client.table(self.table).insert(rows).execute()
+            return [row['source_url'] for row in rows]
+        except Exception as e:
+            print(f"  ⚠️ 正文批量写入失败，改为逐条写入: {e}", file=sys.stderr)
+
+        inserted = []
+        for row in rows:
+            try:
+                self.client.table(self.table).insert(row).execute()
+                inserted.append(row['source_url'])
+            except Exception as e:
+                print(f"  ⚠️ 正文写入失败 ({row['source_url'][-40:]}): {e}", file=sys.stderr)
+                self.stats['failed'] += 1
+        return inserted
+
+    def read(self, url: str, ai_summary: Optional[str] = None) -> Optional[str]:
+        """取回并还原正文；没有分离存储时返回 None（调用方退回主表的 content）"""
+        result = self.client.table(self.table).select('format, body').eq('source_url', url).execute()
+        if not result.data:
+            return None
+        row = result.data[0]
+        return unpack_body(row['format'], row['body'], ai_summary)
+
+    def report(self):
+        s = self.stats
+        if not s['bodies'] and not s['failed']:
+            return
+        ratio = s['stored_bytes'] / s['raw_bytes'] if s['raw_bytes'] else 0
+        print(f"🗜️ 正文分离: {s['bodies']} 条（{s['deduped']} 条去掉重复的 AI 摘要），"
+              f"{s['raw_bytes'] / 1024:.0f} KB -> {s['stored_bytes'] / 1024:.0f} KB（{ratio:.0%}），"
+              f"失败 {s['failed']} 条", file=sys.stderr)
+
+
+# ==================== 迁移与统计 ====================
+
+def migrate_table(client, table: str, bodies: BodyStore, limit: Optional[int] = None) -> int:
+    """把已入库的 content 写入正文表（主表保留 content，置空要等旧版 App 不再读取主表之后）"""
+    query = client.table(table).select('id, source_url, content, ai_summary')
+    if limit:
+        query = query.limit(limit)
+    rows = [row for row in query.execute().data or [] if row.get('content')]
+    moved = 0
+    for start in range(0, len(rows), bodies.batch_size):
+        chunk = rows[start:start + bodies.batch_size]
+        stored = bodies.write(table, ((r['source_url'], r['content'], r.get('ai_summary')) for r in chunk))
+        moved += sum(row['source_url'] in stored for row in chunk)
+    return moved
+
+
+def measure_table(client, table: str, limit: int) -> Dict[str, int]:
+    """对比整行与列表投影的传输字节数（按 JSON 计）"""
+    rows = client.table(table).select('*').limit(limit).execute().data or []
+    full = sum(_json_size(row) for row in rows)
+    listed = sum(_json_size(list_projection(row)) for row in rows)
+    return {'rows': len(rows), 'full_bytes': full, 'list_bytes': listed}
+
+
+# ==================== 主函数 ====================
+
+def main():
+    """命令行：stats 对比列表投影与整行的字节数；migrate 回填已入库的正文；show 还原一条正文"""
+    import argparse
+    from storage import BACKENDS, StorageError, open_storage
+
+    parser = argparse.ArgumentParser(description='列表投影与正文分离存储')
+    parser.add_argument('command', choices=['stats', 'migrate', 'show'])
+    parser.add_argument('--tables', default='articles,news,school_notices', help='内容表，逗号分隔')
+    parser.add_argument('--limit', type=int, default=50, help='stats: 每张表取样行数（与 App 列表一页相同）；migrate: 每张表最多迁移行数（0 表示全部）')
+    parser.add_argument('--url', default='', help='show: 文章的 source_url')
+    parser.add_argument('--storage', choices=BACKENDS, default='supabase', help='存储后端')
+    parser.add_argument('--storage-path', default='', help='--storage sqlite 的数据库路径')
+    parser.add_argument('--supabase-url', default=os.environ.get('SUPABASE_URL'), help='Supabase URL')
+    parser.add_argument('--supabase-key', default=os.environ.get('SUPABASE_KEY'), help='Supabase Key')
+    args = parser.parse_args()
+
+    try:
+        client = open_storage(args.storage, args.supabase_url, args.supabase_key, args.storage_path)
+    except StorageError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    tables = [t.strip() for t in args.tables.split(',') if t.strip()]
+    bodies = BodyStore(client)
+
+    if args.command == 'show':
+        for table in tables:
+            result = client.table(table).select('content, ai_summary').eq('source_url', args.url).execute()
+            if result.data:
+                row = result.data[0]
+                print(bodies.read(args.url, row.get('ai_summary')) or row.get('content') or '')
+                return
+        print(f"❌ 未找到: {args.url}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == 'migrate':
+        for table in tables:
+            print(f"📦 {table}: 回填 {migrate_table(client, table, bodies, args.limit or None)} 条正文", file=sys.stderr)
+        bodies.report()
+        return
+
+    print(f"📏 列表一页（每张表 {args.limit} 行）的传输字节数:", file=sys.stderr)
+    for table in tables:
+        try:
+            m = measure_table(client, table, args.limit)
+        except Exception as e:
+            print(f"  ⚠️ {table}: {e}", file=sys.stderr)
+            continue
+        share = m['list_bytes'] / m['full_bytes'] if m['full_bytes'] else 0
+        print(f"  {table:15s} {m['rows']:4d} 行  整行 {m['full_bytes'] / 1024:8.1f} KB  "
+              f"列表投影 {m['list_bytes'] / 1024:7.1f} KB（{share:.0%}）", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+新闻原文抓取与正文提取
+RSS 条目的 summary / content 常常只是导语，AI 摘要等于在给摘要做摘要。
+本模块并发下载条目链接指向的原文页，用文本密度算法提取正文，按 URL 缓存提取结果（过期后带 ETag 条件请求），
+同一页面不会重复下载或重复提取
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+from host_health import HOSTS
+
+# ==================== 配置区 ====================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_PATH = os.path.join(SCRIPT_DIR, '.cache', 'article_pages.json')
+
+MAX_WORKERS = 4
+REVALIDATE_AFTER = 3 * 86400    # 缓存超过此时长（秒）才带 ETag 重新验证，之前直接使用
+CACHE_TTL = 30 * 86400          # 超过此时长未再出现的条目在保存时清理
+MAX_TEXT_CHARS = 20000          # 缓存与正文保留的最大长度
+
+MIN_BLOCK_CHARS = 20            # 少于此字数的文本块不参与打分（按钮、日期、署名等）
+MAX_LINK_DENSITY = 0.5          # 链接文字占比超过此值的块视为导航 / 相关推荐
+MIN_GAIN = 1.2                  # 提取结果至少比订阅源自带的正文长这么多倍才替换
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# 整段跳过的元素
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'canvas', 'iframe', 'form', 'button',
+             'select', 'nav', 'header', 'footer', 'aside', 'figure', 'head'}
+# 文本块边界
+BLOCK_TAGS = {'p', 'div', 'section', 'article', 'main', 'li', 'ul', 'ol', 'dl', 'dd', 'dt', 'table', 'tr', 'td',
+              'th', 'blockquote', 'pre', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'body'}
+# 自身就是段落的元素：得分记给外层容器
+PARAGRAPH_TAGS = {'p', 'li', 'pre', 'blockquote', 'td', 'dd', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+# class / id 命中时整段跳过
+BOILERPLATE_RE = re.compile(
+    r'comment|sidebar|footer|masthead|menu|breadcrumb|share|social|related|recommend|promo|advert|'
+    r'\bads?\b|sponsor|subscribe|newsletter|popup|cookie|banner|toolbar|pager|pagination', re.IGNORECASE)
+
+
+# ==================== 正文提取 ====================
+
+class _DensityParser(HTMLParser):
+    """
+    流式切分文本块：每块记录文字、链接文字长度和所在元素的祖先链（元素按出现顺序编号）
+
+    不构建 DOM 树，只维护当前打开的元素栈；未闭合的标签在外层闭合时一并弹出。
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: List[Tuple[str, int]] = []   # (tag, 元素编号)
+        self.serial = 0
+        self.skip_depth = 0                      # >0 时位于被跳过的元素内，记录其在栈中的深度
+        self.link_depth = 0
+        self.parts: List[str] = []
+        self.link_chars = 0
+        self.blocks: List[Dict] = []
+
+    def flush(self):
+        text = ' '.join(''.join(self.parts).split())
+        if text:
+            owner = next((tag for tag, _ in reversed(self.stack) if tag in BLOCK_TAGS), '')
+            self.blocks.append({'text': text, 'links': min(self.link_chars, len(text)), 'tag': owner,
+                                'path': tuple(serial for tag, serial in self.stack if tag in BLOCK_TAGS)})
+        self.parts = []
+        self.link_chars = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag == 'br' and not self.skip_depth:
+                self.parts.append(' ')
+            return
+        if tag in BLOCK_TAGS and not self.skip_depth:
+            self.flush()
+        self.serial += 1
+        self.stack.append((tag, self.serial))
+        if self.skip_depth:
+            return
+        marker = ' '.join(value or '' for name, value in attrs if name in ('class', 'id', 'role'))
+        if tag in SKIP_TAGS or (marker and BOILERPLATE_RE.search(marker)):
+            self.skip_depth = len(self.stack)
+        elif tag == 'a':
+            self.link_depth += 1
+
+    def handle_endtag(self, tag):
+        if not any(open_tag == tag for open_tag, _ in self.stack):
+            return
+        if tag in BLOCK_TAGS and not self.skip_depth:
+            self.flush()
+        while self.stack:
+            open_tag, _ = self.stack.pop()
+            if self.skip_depth > len(self.stack):
+                self.skip_depth = 0
+            elif open_tag == 'a' and not self.skip_depth:
+                self.link_depth = max(0, self.link_depth - 1)
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        self.parts.append(data)
+        if self.link_depth:
+            self.link_chars += len(data.strip())
+
+
+def extract_main_text(html: str) -> str:
+    """
+    文本密度提取正文
+
+    每个文字足够长、链接占比低的文本块按 (字数 × (1 - 链接占比)) 给外层容器打分，祖父容器得一半；
+    得分最高的容器即正文区域，输出其中的非导航文本块（不含标题 h1），段落间空一行。
+
+    Returns:
+        正文纯文本（找不到正文时为空字符串）
+    """
+    parser = _DensityParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception as e:
+        print(f"  ⚠️ HTML 解析中断，使用已解析部分: {e}", file=sys.stderr)
+    parser.flush()
+
+    scores: Dict[int, float] = {}
+    for block in parser.blocks:
+        length = len(block['text'])
+        density = block['links'] / length
+        if length < MIN_BLOCK_CHARS or density > MAX_LINK_DENSITY:
+            continue
+        path = block['path'][:-1] if block['tag'] in PARAGRAPH_TAGS else block['path']
+        score = length * (1 - density)
+        for weight, serial in zip((1.0, 0.5), reversed(path)):
+            scores[serial] = scores.get(serial, 0) + score * weight
+    if not scores:
+        return ''
+
+    # 页面 h1 即文章标题，layout 渲染 content 时已经输出
+    best = max(scores, key=scores.get)
+    paragraphs = [block['text'] for block in parser.blocks
+                  if best in block['path'] and block['tag'] != 'h1'
+                  and block['links'] / len(block['text']) <= MAX_LINK_DENSITY]
+    return '\n\n'.join(paragraphs)[:MAX_TEXT_CHARS]
+
+
+# ==================== 原文抓取 ====================
+
+class ArticleExtractor:
+    """
+    原文下载、提取与缓存
+
+    缓存以 URL 为键，记录 ETag / Last-Modified、页面哈希和提取出的正文：
+    - 缓存未超过 REVALIDATE_AFTER：直接使用，不发请求
+    - 超过后带 If-None-Match / If-Modified-Since 条件请求，304 时沿用缓存；
+      返回 200 但 ETag 或页面哈希未变时也不重新提取
+    同一次运行中重复出现的 URL（多个订阅源转载同一篇）共用一次下载。
+    """
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, max_workers: int = MAX_WORKERS):
+        self.cache_path = cache_path
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.inflight: Dict[str, Future] = {}
+        self.stats = {'cached': 0, 'not_modified': 0, 'downloaded': 0, 'extracted': 0, 'failed': 0}
+
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        self.session.headers['Accept'] = 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8'
+
+        self.cache: Dict[str, Dict] = {}
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    self.cache = json.load(f)
+            except (IOError, json.JSONDecodeError) as e:
+                print(f"⚠️ 原文缓存读取失败，重新建立: {e}", file=sys.stderr)
+
+    def save(self):
+        cutoff = time.time() - CACHE_TTL
+        with self.lock:
+            self.cache = {url: entry for url, entry in self.cache.items() if entry.get('seen_at', 0) >= cutoff}
+            data = json.dumps(self.cache, ensure_ascii=False)
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.cache_path)
+
+    def _count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+    @staticmethod
+    def _decode(response: requests.Response) -> str:
+        """页面未声明编码时先按 UTF-8 解码，失败再用 requests 的探测结果"""
+        if 'charset' in response.headers.get('Content-Type', '').lower():
+            return response.text
+        try:
+            return response.content.decode('utf-8')
+        except UnicodeDecodeError:
+            response.encoding = response.apparent_encoding
+            return response.text
+
+    def page_text(self, url: str) -> str:
+        """返回页面正文（失败时返回缓存或空字符串）"""
+        now = time.time()
+        with self.lock:
+            entry = self.cache.get(url)
+            if entry:
+                entry['seen_at'] = now
+
+        if entry and now - entry.get('checked_at', 0) < REVALIDATE_AFTER:
+            self._count('cached')
+            return entry.get('text', '')
+
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            response = HOSTS.get(url, self.session, headers=headers, timeout=(5, 15))
+        except requests.RequestException as e:
+            self._count('failed')
+            print(f"  ⚠️ 原文下载失败: {url[-60:]} ({e})", file=sys.stderr)
+            return entry.get('text', '') if entry else ''
+
+        etag = response.headers.get('ETag')
+        digest = (entry or {}).get('sha1')
+        if response.status_code == 304 and entry:
+            self._count('not_modified')
+            text = entry.get('text', '')
+        elif response.ok and 'html' in response.headers.get('Content-Type', 'text/html'):
+            self._count('downloaded')
+            digest = hashlib.sha1(response.content).hexdigest()
+            if entry and ((etag and etag == entry.get('etag')) or digest == entry.get('sha1')):
+                text = entry.get('text', '')
+            else:
+                self._count('extracted')
+                text = extract_main_text(self._decode(response))
+        else:
+            self._count('failed')
+            print(f"  ⚠️ 原文下载失败: {url[-60:]} (HTTP {response.status_code})", file=sys.stderr)
+            return entry.get('text', '') if entry else ''
+
+        with self.lock:
+            self.cache[url] = {
+                'etag': etag or (entry or {}).get('etag'),
+                'last_modified': response.headers.get('Last-Modified') or (entry or {}).get('last_modified'),
+                'sha1': digest,
+                'text': text,
+                'checked_at': now,
+                'seen_at': now,
+            }
+        return text
+
+    def _submit(self, executor: ThreadPoolExecutor, url: str) -> Future:
+        """同一 URL 只提交一次"""
+        with self.lock:
+            future = self.inflight.get(url)
+            if future is None:
+                future = self.inflight[url] = executor.submit(self.page_text, url)
+        return future
+
+    def process(self, articles: Iterable, window: int = 0) -> Iterator[Tuple[object, str]]:
+        """
+        按窗口并发抓取原文，按输入顺序逐条产出 (article, 正文)
+
+        正文不比订阅源自带的内容长（提取失败、页面只有导语）时为空字符串，调用方保留原正文。
+        """
+        window = window or self.max_workers * 4
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            batch: List[Tuple[object, Future]] = []
+            for article in articles:
+                url = article.get('source_url') or ''
+                batch.append((article, self._submit(executor, url) if url.startswith('http') else None))
+                if len(batch) >= window:
+                    yield from self._drain(batch)
+                    batch = []
+            yield from self._drain(batch)
+        self.save()
+
+    @staticmethod
+    def _drain(batch: List[Tuple[object, Optional[Future]]]) -> Iterator[Tuple[object, str]]:
+        for article, future in batch:
+            text = future.result() if future else ''
+            teaser = len(getattr(article, 'body', None) or article.get('content') or '')
+            yield article, text if len(text) >= teaser * MIN_GAIN else ''
+
+    def report(self):
+        s = self.stats
+        print(f"📰 原文: 下载 {s['downloaded']} 篇（提取 {s['extracted']} 篇），未变 {s['not_modified']} 篇，"
+              f"缓存 {s['cached']} 篇，失败 {s['failed']} 篇", file=sys.stderr)
+
+
+def fetch_full_text(articles: Iterable, cache_path: str = DEFAULT_CACHE_PATH,
+                    max_workers: int = MAX_WORKERS) -> Iterator[Tuple[object, str]]:
+    """供抓取脚本调用的入口：逐条产出 (article, 原文正文或空字符串)"""
+    extractor = ArticleExtractor(cache_path, max_workers)
+    yield from extractor.process(articles)
+    extractor.report()
+
+
+# ==================== 主函数 ====================
+
+def main():
+    """命令行：提取单个页面的正文（调试提取效果）"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='新闻原文抓取与正文提取')
+    parser.add_argument('url', help='文章链接或本地 HTML 文件')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help='原文缓存文件路径')
+    args = parser.parse_args()
+
+    if os.path.exists(args.url):
+        with open(args.url, 'r', encoding='utf-8', errors='replace') as f:
+            print(extract_main_text(f.read()))
+        return
+    extractor = ArticleExtractor(args.cache)
+    print(extractor.page_text(args.url))
+    extractor.save()
+    extractor.report()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+本地文章日志
+每次运行产出的文章（抓取、摘要之后的完整记录）追加写入本地日志：按天分段，每条记录带长度前缀并压缩；
+另有一个内存映射的哈希索引，按 source_url 直接定位最新记录。
+重新上传、迁移或重建索引时从日志回放，不必重新抓取、重新调用 LLM
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows：只保证同一进程内串行写入
+    fcntl = None
+
+# ==================== 配置区 ====================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_JOURNAL_DIR = os.path.join(SCRIPT_DIR, '.cache', 'journal')
+
+COMPRESS_LEVEL = 6
+
+# 日志记录: 同步标记 + 压缩后长度 + CRC32，之后是 zlib 压缩的 JSON {'table', 'recorded_at', 'input', 'article'}
+# input 为写入时的摘要输入（change_detection.summary_input）：回放出的 dict 已没有布局，无法再算出同样的值
+# 同步标记让回放在遇到写了一半的记录时能找到下一条完整记录继续
+RECORD_MAGIC = b'\xabJR\x01'
+RECORD_HEADER = struct.Struct('<4sII')
+
+# 索引文件: 文件头 + 开放寻址哈希表（线性探测），槽位记录 URL 哈希、分段日期、记录长度和偏移
+INDEX_NAME = 'index.bin'
+LOCK_NAME = 'journal.lock'
+INDEX_MAGIC = b'AJIX'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sIQQIIQ')    # magic, version, 槽位数, 条目数, 最后索引的分段, 保留, 该分段已索引到的偏移
+INDEX_HEADER_SIZE = 64
+SLOT = struct.Struct('<QIIQ')                # URL 哈希（0 表示空槽）, 分段日期 YYYYMMDD, 记录长度, 偏移
+INITIAL_SLOTS = 4096
+MAX_LOAD = 0.7
+
+
+class JournaledArticle(dict):
+    """回放出的文章：普通 dict，外加写入时保存的摘要输入，指纹与 reuse_summary 和真实抓取时一致"""
+
+    __slots__ = ('summary_text',)
+
+    def __init__(self, article: Dict, summary_text: Optional[str] = None):
+        super().__init__(article)
+        self.summary_text = summary_text
+
+
+def url_hash(source_url: str) -> int:
+    """source_url 的 64 位哈希（0 保留给空槽）"""
+    value = int.from_bytes(hashlib.sha1(source_url.encode('utf-8')).digest()[:8], 'little')
+    return value or 1
+
+
+def _day_number(day: date) -> int:
+    return day.year * 10000 + day.month * 100 + day.day
+
+
+def _day_label(number: int) -> str:
+    return f"{number // 10000:04d}-{number // 100 % 100:02d}-{number % 100:02d}"
+
+
+def parse_day(value: str) -> int:
+    """'2026-10-19' -> 20261019"""
+    return _day_number(date.fromisoformat(value))
+
+
+# ==================== 索引 ====================
+
+class _HashIndex:
+    """
+    内存映射的开放寻址哈希表：source_url 哈希 -> (分段, 长度, 偏移)
+
+    查找只读映射中的几个槽位，不把索引载入内存；装载率超过 MAX_LOAD 时按两倍容量重建。
+    同一 URL 再次写入时覆盖原槽位，始终指向最新记录。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if not os.path.exists(path):
+            self._create(path, INITIAL_SLOTS)
+        self.file = open(path, 'r+b')
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self._read_header()
+
+    def _read_header(self):
+        magic, version, self.capacity, self.count, self.last_day, _, self.last_end = \
+            INDEX_HEADER.unpack_from(self.map, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"索引文件格式不符: {self.path}（可执行 rebuild-index 重建）")
+
+    def refresh(self):
+        """重新读取文件头；其他进程扩容（替换了索引文件）时重新映射"""
+        if os.stat(self.path).st_ino != os.fstat(self.file.fileno()).st_ino:
+            self.map.close()
+            self.file.close()
+            self.__init__(self.path)
+        else:
+            self._read_header()
+
+    @staticmethod
+    def _create(path: str, capacity: int, count: int = 0, last_day: int = 0, last_end: int = 0):
+        with open(path, 'wb') as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, capacity, count, last_day, 0, last_end)
+                    .ljust(INDEX_HEADER_SIZE, b'\0'))
+            f.truncate(INDEX_HEADER_SIZE + capacity * SLOT.size)
+
+    def _write_header(self):
+        INDEX_HEADER.pack_into(self.map, 0, INDEX_MAGIC, INDEX_VERSION, self.capacity, self.count,
+                               self.last_day, 0, self.last_end)
+
+    def _slot(self, i: int) -> Tuple[int, int, int, int]:
+        return SLOT.unpack_from(self.map, INDEX_HEADER_SIZE + i * SLOT.size)
+
+    def probe(self, key: int) -> Iterator[Tuple[int, Tuple[int, int, int, int]]]:
+        """从 key 的起始槽位开始线性探测，直到遇到空槽"""
+        i = key % self.capacity
+        for _ in range(self.capacity):
+            slot = self._slot(i)
+            yield i, slot
+            if slot[0] == 0:
+                return
+            i = (i + 1) % self.capacity
+
+    def candidates(self, key: int) -> Iterator[Tuple[int, int, int]]:
+        """哈希相同的全部位置 (分段, 长度, 偏移)（64 位哈希冲突极少，调用方核对 source_url）"""
+        for _, (h, day, length, offset) in self.probe(key):
+            if h == key:
+                yield day, length, offset
+
+    def put(self, key: int, day: int, length: int, offset: int, matches=None):
+        """
+        写入或覆盖一个槽位
+
+        Args:
+            matches: 可选，判断已有槽位是否就是同一 URL 的回调 (分段, 长度, 偏移) -> bool；
+                     不提供时哈希相同即视为同一 URL
+        """
+        if (self.count + 1) / self.capacity > MAX_LOAD:
+            self._grow()
+        for i, (h, *location) in self.probe(key):
+            if h == 0 or (h == key and (matches is None or matches(*location))):
+                if h == 0:
+                    self.count += 1
+                SLOT.pack_into(self.map, INDEX_HEADER_SIZE + i * SLOT.size, key, day, length, offset)
+                return
+
+    def mark(self, day: int, end: int):
+        """记录已索引到的位置（打开日志时从这里补齐崩溃前未写入索引的记录）"""
+        self.last_day, self.last_end = day, end
+        self._write_header()
+
+    def _grow(self):
+        slots = [self._slot(i) for i in range(self.capacity)]
+        self.close()
+        tmp_path = self.path + '.tmp'
+        self._create(tmp_path, self.capacity * 2, 0, self.last_day, self.last_end)
+        os.replace(tmp_path, self.path)
+        self.__init__(self.path)
+        for h, day, length, offset in slots:
+            if h:
+                self.put(h, day, length, offset, matches=lambda *_: False)
+        self._write_header()
+
+    def flush(self):
+        self._write_header()
+        self.map.flush()
+
+    def close(self):
+        self.flush()
+        self.map.close()
+        self.file.close()
+
+
+# ==================== 日志 ====================
+
+class ArticleJournal:
+    """
+    追加写入的文章日志
+
+    分段文件 YYYYMMDD.log 只追加不修改；索引可随时由分段重建（rebuild_index）。
+    每次写入持有日志目录的文件锁（抓取脚本与摘要 worker 可以同时写入），写入前重新读取索引文件头。
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_DIR):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.segments: Dict[int, object] = {}    # 分段日期 -> 追加写入的文件对象
+        self.index = _HashIndex(os.path.join(path, INDEX_NAME))
+        self.appended = 0
+        self._catch_up()
+
+    def segment_path(self, day: int) -> str:
+        return os.path.join(self.path, f"{day}.log")
+
+    def days(self) -> List[int]:
+        return sorted(int(name[:-4]) for name in os.listdir(self.path)
+                      if name.endswith('.log') and name[:-4].isdigit())
+
+    # ---------- 写入 ----------
+
+    def _segment(self, day: int):
+        handle = self.segments.get(day)
+        if handle is None:
+            handle = self.segments[day] = open(self.segment_path(day), 'ab')
+        return handle
+
+    def append(self, table: str, article, recorded_at: Optional[datetime] = None,
+               summary_text: Optional[str] = None) -> Tuple[int, int]:
+        """
+        追加一条记录并更新索引
+
+        Args:
+            summary_text: 摘要输入（默认由 change_detection.summary_input 按文章的布局计算；
+                以 dict 重写已有记录时应传入上一版保存的值）
+
+        Returns:
+            (分段日期, 偏移)
+        """
+        from change_detection import summary_input
+        recorded_at = recorded_at or datetime.now()
+        record = {'table': table, 'recorded_at': recorded_at.isoformat(timespec='seconds'),
+                  'input': summary_text if summary_text is not None else summary_input(article),
+                  'article': dict(article)}
+        data = zlib.compress(json.dumps(record, ensure_ascii=False, default=str).encode('utf-8'), COMPRESS_LEVEL)
+        blob = RECORD_HEADER.pack(RECORD_MAGIC, len(data), zlib.crc32(data)) + data
+        day = _day_number(recorded_at.date())
+
+        with self.lock, self._file_lock():
+            self.index.refresh()
+            handle = self._segment(day)
+            offset = handle.seek(0, os.SEEK_END)
+            handle.write(blob)
+            handle.flush()
+            self._index(record['article']['source_url'], day, len(blob), offset)
+            self.index.mark(day, offset + len(blob))
+            self.appended += 1
+        return day, offset
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.path, LOCK_NAME), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _index(self, source_url: str, day: int, length: int, offset: int):
+        def same_url(old_day, old_length, old_offset):
+            old = self._read(old_day, old_length, old_offset)
+            return old is not None and old['article'].get('source_url') == source_url
+        self.index.put(url_hash(source_url), day, length, offset, matches=same_url)
+
+    # ---------- 读取 ----------
+
+    def _read(self, day: int, length: int, offset: int) -> Optional[Dict]:
+        handle = self.segments.get(day)
+        if handle:
+            handle.flush()
+        try:
+            with open(self.segment_path(day), 'rb') as f:
+                f.seek(offset)
+                blob = f.read(length)
+        except OSError:
+            return None
+        record = self._decode(blob, 0)
+        return record[0] if record else None
+
+    @staticmethod
+    def _decode(buffer, pos: int) -> Optional[Tuple[Dict, int]]:
+        """解码 pos 处的一条记录，返回 (记录, 下一条的偏移)；不完整或校验失败时返回 None"""
+        if len(buffer) - pos < RECORD_HEADER.size:
+            return None
+        magic, length, crc = RECORD_HEADER.unpack_from(buffer, pos)
+        start = pos + RECORD_HEADER.size
+        data = buffer[start:start + length]
+        if magic != RECORD_MAGIC or len(data) < length or zlib.crc32(data) != crc:
+            return None
+        return json.loads(zlib.decompress(data)), start + length
+
+    def get(self, source_url: str) -> Optional[Dict]:
+        """按 source_url 取最新记录 {'table', 'recorded_at', 'article'}；不存在时返回 None"""
+        with self.lock:
+            self.index.refresh()
+            for day, length, offset in self.index.candidates(url_hash(source_url)):
+                record = self._read(day, length, offset)
+                if record and record['article'].get('source_url') == source_url:
+                    return record
+        return None
+
+    def scan(self, day: int, start: int = 0) -> Iterator[Tuple[int, int, Dict]]:
+        """
+        顺序读取一个分段，逐条产出 (偏移, 长度, 记录)
+
+        分段以内存映射方式读取；遇到损坏或写了一半的记录时跳到下一个同步标记继续。
+        """
+        path = self.segment_path(day)
+        handle = self.segments.get(day)
+        if handle:
+            handle.flush()
+        if not os.path.exists(path) or os.path.getsize(path) <= start:
+            return
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            pos = start
+            while pos < len(buffer):
+                decoded = self._decode(buffer, pos)
+                if decoded is None:
+                    following = buffer.find(RECORD_MAGIC, pos + 1)
+                    print(f"⚠️ 日志 {day}.log 偏移 {pos} 处记录损坏，"
+                          f"{'跳到下一条记录' if following != -1 else '忽略文件末尾'}", file=sys.stderr)
+                    if following == -1:
+                        return
+                    pos = following
+                    continue
+                record, end = decoded
+                yield pos, end - pos, record
+                pos = end
+
+    def replay(self, days: Optional[Iterable[int]] = None, table: Optional[str] = None,
+               latest: bool = False) -> Iterator[JournaledArticle]:
+        """
+        按写入顺序回放文章（JournaledArticle；本字段加入之前写入的记录没有摘要输入，退回按 content 计算）
+
+        Args:
+            days: 只回放这些日期的分段（默认全部）
+            table: 只回放该表的记录
+            latest: 只回放每个 source_url 的最新记录（跳过之后又被重写的旧版本）
+        """
+        for day in sorted(days) if days is not None else self.days():
+            for offset, _, record in self.scan(day):
+                if table and record['table'] != table:
+                    continue
+                if latest and not self._is_latest(record['article']['source_url'], day, offset):
+                    continue
+                yield JournaledArticle(record['article'], record.get('input'))
+
+    def _is_latest(self, source_url: str, day: int, offset: int) -> bool:
+        with self.lock:
+            return any(d == day and o == offset for d, _, o in self.index.candidates(url_hash(source_url)))
+
+    # ---------- 索引维护 ----------
+
+    def _catch_up(self):
+        """把上次运行在写入索引前中断的记录补进索引"""
+        with self.lock, self._file_lock():
+            self.index.refresh()
+            self._index_tail()
+
+    def _index_tail(self):
+        day, end = self.index.last_day, self.index.last_end
+        pending = [d for d in self.days() if d > day or (d == day and os.path.getsize(self.segment_path(d)) > end)]
+        count = 0
+        for d in pending:
+            for offset, length, record in self.scan(d, end if d == day else 0):
+                self._index(record['article']['source_url'], d, length, offset)
+                self.index.mark(d, offset + length)
+                count += 1
+        if count:
+            print(f"🔧 日志索引补齐 {count} 条记录", file=sys.stderr)
+
+    def rebuild_index(self) -> int:
+        """由分段文件重建索引（索引损坏或手动删除分段后使用）"""
+        with self.lock, self._file_lock():
+            self.index.close()
+            os.remove(self.index.path)
+            self.index = _HashIndex(self.index.path)
+            count = 0
+            for day in self.days():
+                for offset, length, record in self.scan(day):
+                    self._index(record['article']['source_url'], day, length, offset)
+                    self.index.mark(day, offset + length)
+                    count += 1
+            self.index.flush()
+        return count
+
+    def stats(self) -> Dict:
+        segments = {_day_label(day): os.path.getsize(self.segment_path(day)) for day in self.days()}
+        return {'urls': self.index.count, 'index_slots': self.index.capacity,
+                'bytes': sum(segments.values()), 'segments': segments}
+
+    def close(self):
+        with self.lock:
+            for handle in self.segments.values():
+                handle.flush()
+                os.fsync(handle.fileno())
+                handle.close()
+            self.segments.clear()
+            self.index.close()
+
+
+def journal_articles(articles: Iterable, table: str, path: str = DEFAULT_JOURNAL_DIR) -> Iterator:
+    """供抓取脚本调用：每篇文章写入日志后原样产出（逐条处理）"""
+    journal = ArticleJournal(path)
+    try:
+        for article in articles:
+            try:
+                journal.append(table, article)
+            except (OSError, KeyError, TypeError) as e:
+                print(f"⚠️ 写入日志失败 ({article.get('source_url', '')[-40:]}): {e}", file=sys.stderr)
+            yield article
+    finally:
+        print(f"📒 已写入本地日志 {journal.appended} 篇: {path}", file=sys.stderr)
+        journal.close()
+
+
+# ==================== 主函数 ====================
+
+def main():
+    """命令行：stats 查看日志；get 按 URL 查找；replay 回放为 JSON；upload 回放并重新上传；rebuild-index 重建索引"""
+    import argparse
+    from storage import BACKENDS
+
+    parser = argparse.ArgumentParser(description='本地文章日志')
+    parser.add_argument('command', choices=['stats', 'get', 'replay', 'upload', 'rebuild-index'])
+    parser.add_argument('url', nargs='?', default='', help='get: 文章的 source_url')
+    parser.add_argument('--journal', default=DEFAULT_JOURNAL_DIR, help='日志目录')
+    parser.add_argument('--day', action='append', default=[], help='只回放该日期（YYYY-MM-DD，可重复）')
+    parser.add_argument('--table', default='', help='只回放该表的记录（upload 时必填）')
+    parser.add_argument('--all-versions', action='store_true', help='回放同一 URL 的全部历史版本（默认只取最新）')
+    parser.add_argument('--output', default='', help='replay: 输出 JSON 文件（默认标准输出）')
+    parser.add_argument('--storage', choices=BACKENDS, default='supabase', help='upload: 存储后端')
+    parser.add_argument('--storage-path', default='', help='upload: --storage sqlite 的数据库路径')
+    parser.add_argument('--supabase-url', default=os.environ.get('SUPABASE_URL'), help='Supabase URL')
+    parser.add_argument('--supabase-key', default=os.environ.get('SUPABASE_KEY'), help='Supabase Key')
+    args = parser.parse_args()
+
+    journal = ArticleJournal(args.journal)
+    try:
+        if args.command == 'stats':
+            print(json.dumps(journal.stats(), ensure_ascii=False, indent=2))
+            return
+
+        if args.command == 'rebuild-index':
+            print(f"🔧 索引已重建: {journal.rebuild_index()} 条记录", file=sys.stderr)
+            return
+
+        if args.command == 'get':
+            record = journal.get(args.url)
+            if record is None:
+                print(f"❌ 日志中没有: {args.url}", file=sys.stderr)
+                sys.exit(1)
+            print(json.dumps(record, ensure_ascii=False, indent=2))
+            return
+
+        days = [parse_day(d) for d in args.day] or None
+        articles = journal.replay(days, args.table or None, latest=not args.all_versions)
+
+        if args.command == 'replay':
+            data = json.dumps(list(articles), ensure_ascii=False, indent=2)
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    f.write(data)
+            else:
+                print(data)
+            return
+
+        if not args.table:
+            print("❌ upload 需要 --table（记录按表回放、上传）", file=sys.stderr)
+            sys.exit(1)
+        from change_detection import ChangeTracker
+        from storage import StorageError, open_storage
+        try:
+            client = open_storage(args.storage, args.supabase_url, args.supabase_key, args.storage_path)
+        except StorageError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+        tracker = ChangeTracker(client, args.table)
+        stats = tracker.sync(articles)
+        print(f"📊 回放上传: 新增 {stats['inserted']}, 更新 {stats['updated']}, "
+              f"未变 {stats['unchanged']}, 失败 {stats['failed']}", file=sys.stderr)
+    finally:
+        journal.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+文章记录类型（三个抓取脚本共用）
+紧凑存储：content / summary 不重复保存，由各来源的 layout 在输出时渲染
+"""
+
+import sys
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+
+class ArticleLayout:
+    """
+    来源布局：决定输出哪些字段、如何由正文渲染 content 与 summary
+
+    各抓取脚本继承此类并覆盖 fields / content / summary。
+    """
+
+    # 输出到数据库的字段（顺序即 to_dict 的键顺序）
+    fields: Tuple[str, ...] = (
+        'title', 'summary', 'content', 'source', 'source_url', 'author',
+        'published_at', 'fetched_at', 'tags', 'is_favorited', 'ai_summary',
+    )
+    # 值为 None 时不输出的字段（如未生成 AI 摘要时不写 ai_summary 列）
+    optional: Tuple[str, ...] = ()
+
+    @staticmethod
+    def content(article: 'Article') -> str:
+        return article.body
+
+    @staticmethod
+    def summary(article: 'Article') -> str:
+        return article.body[:200]
+
+    @staticmethod
+    def summary_input(article: 'Article') -> str:
+        """AI 摘要依赖的输入（用于变更检测：输入不变则无需重新生成摘要）"""
+        return article.body
+
+
+class Article:
+    """
+    文章记录
+
+    只保存原始正文 body、ai_summary 和元数据；content / summary 在读取时由 layout 渲染，
+    不会在内存里同时保留三份相同文本。支持按字段名像 dict 一样读写，
+    兼容原有的 AI 处理、上传、索引等代码；需要真正的 dict 时调用 to_dict()。
+    """
+
+    __slots__ = (
+        'title', 'source', 'source_url', 'author', 'published_at', 'fetched_at',
+        'priority', 'category', 'tags', 'is_favorited', 'ai_summary',
+        'body', 'meta', 'layout', '_content', '_summary', 'extra',
+    )
+
+    def __init__(self, layout: type, title: str, body: str, source: str, source_url: str,
+                 author: Optional[str] = None, published_at: Optional[str] = None,
+                 fetched_at: Optional[str] = None, priority: Optional[str] = None,
+                 category: Optional[str] = None, tags: Iterable[str] = (),
+                 ai_summary: Optional[str] = None, meta: Any = None):
+        self.layout = layout
+        self.title = title
+        self.body = body
+        self.source = source
+        self.source_url = source_url
+        self.author = author
+        self.published_at = published_at
+        self.fetched_at = fetched_at
+        self.priority = priority
+        self.category = category
+        self.tags = tuple(tags)
+        self.is_favorited = False
+        self.ai_summary = ai_summary
+        self.meta = meta          # 来源相关的附加数据（如仓库统计），由 layout 解释
+        self._content = None      # 显式覆盖的 content（如图片链接改写后）
+        self._summary = None
+        self.extra = None         # layout 之外的附加列
+
+    # ---------- 渲染字段 ----------
+
+    @property
+    def content(self) -> str:
+        return self._content if self._content is not None else self.layout.content(self)
+
+    @content.setter
+    def content(self, value: Optional[str]):
+        self._content = value
+
+    @property
+    def summary(self) -> str:
+        return self._summary if self._summary is not None else self.layout.summary(self)
+
+    @summary.setter
+    def summary(self, value: Optional[str]):
+        self._summary = value
+
+    # ---------- dict 兼容接口 ----------
+
+    def keys(self) -> Tuple[str, ...]:
+        keys = tuple(f for f in self.layout.fields
+                     if f not in self.layout.optional or getattr(self, f) is not None)
+        return keys + tuple(self.extra or ())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys()
+
+    def __getitem__(self, key: str) -> Any:
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        if key in self.layout.fields:
+            value = getattr(self, key)
+            return list(value) if key == 'tags' else value
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in self.layout.fields:
+            setattr(self, key, tuple(value) if key == 'tags' else value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None and key in self.layout.optional else value
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return ((key, self[key]) for key in self.keys())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为上传 / 输出用的 dict（字段与原先各脚本生成的一致）"""
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"Article({self.source!r}, {self.title[:20]!r})"
+
+
+def to_dicts(articles: Iterable) -> list:
+    """把记录列表转换为可 JSON 序列化的 dict 列表"""
+    return [a.to_dict() if isinstance(a, Article) else a for a in articles]
+
+
+# ==================== 主函数（内存对比） ====================
+
+def main():
+    """对比 dict 列表与紧凑记录的内存占用"""
+    import argparse
+    import tracemalloc
+
+    parser = argparse.ArgumentParser(description='文章记录内存对比')
+    parser.add_argument('--count', type=int, default=20000, help='模拟条目数')
+    args = parser.parse_args()
+
+    ai_text = '## 🎯 核心要点\n- ' + '示例摘要内容。' * 60
+
+    class DemoLayout(ArticleLayout):
+        @staticmethod
+        def content(article):
+            return f"# {article.title}\n\n{article.ai_summary}\n\n---\n\n{article.body}"
+
+    def make_body(i):
+        return f'第 {i} 条正文。' + '正文内容' * 300
+
+    def as_dict(i):
+        body = make_body(i)
+        title = f'标题 {i}'
+        return {
+            'title': title, 'summary': body[:200] + '...',
+            'content': f"# {title}\n\n{ai_text}\n\n---\n\n{body}",
+            'source': 'demo', 'source_url': f'https://example.com/{i}', 'author': 'demo',
+            'published_at': '2026-01-01', 'fetched_at': '2026-01-01T00:00:00',
+            'tags': ['demo'], 'is_favorited': False, 'ai_summary': ai_text,
+        }
+
+    def as_record(i):
+        return Article(DemoLayout, f'标题 {i}', make_body(i), 'demo', f'https://example.com/{i}',
+                       author='demo', published_at='2026-01-01', fetched_at='2026-01-01T00:00:00',
+                       tags=('demo',), ai_summary=ai_text)
+
+    def measure(build, stream):
+        tracemalloc.start()
+        if stream:
+            for item in (build(i) for i in range(args.count)):
+                pass
+        else:
+            [build(i) for i in range(args.count)]   # 整个列表同时驻留，峰值即列表占用
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak / 1024 / 1024
+
+    print(f"模拟 {args.count} 条文章的峰值内存:", file=sys.stderr)
+    print(f"  dict 列表:        {measure(as_dict, False):8.1f} MB", file=sys.stderr)
+    print(f"  紧凑记录列表:      {measure(as_record, False):8.1f} MB", file=sys.stderr)
+    print(f"  紧凑记录 + 生成器: {measure(as_record, True):8.1f} MB", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
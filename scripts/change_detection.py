@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+变更检测与最小差异更新
+每条记录携带逐字段的内容指纹：只对变化的字段做部分更新，输入未变的条目复用已有 AI 摘要
+"""
+
+import hashlib
+import json
+import sys
+from typing import Dict, Iterable, List, Optional
+
+# ==================== 配置区 ====================
+
+# 不参与指纹与更新的列：抓取时间每次都变，收藏状态属于用户
+SKIP_COLUMNS = {'fetched_at', 'is_favorited', 'fingerprint'}
+
+# 摘要输入的指纹键（不对应数据库列）
+INPUT_KEY = '_input'
+
+BATCH_SIZE = 100
+
+
+# ==================== 指纹 ====================
+
+def field_hash(value) -> str:
+    """单个字段的短哈希"""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def summary_input(article) -> str:
+    """
+    AI 摘要的输入内容
+
+    紧凑记录由 layout.summary_input 给出（例如仓库只看名称/描述/语言，不看每天变化的 Stars）；
+    从本地日志回放的记录带有写入时保存的 summary_text；普通 dict 退回 content。
+    """
+    layout = getattr(article, 'layout', None)
+    if layout is not None and hasattr(layout, 'summary_input'):
+        return layout.summary_input(article)
+    stored = getattr(article, 'summary_text', None)
+    if stored is not None:
+        return stored
+    return article.get('content') or ''
+
+
+def refresh_payload(article):
+    """
+    重新计算阅读页预排版（仅对已带 reader_payload 的记录）
+
+    仓库、通知的布局把 ai_summary 渲染进 content，恢复摘要后 content 随之改变，
+    抓取阶段算好的块偏移量不再对应最终入库的 content。
+    """
+    from reader_payload import PAYLOAD_COLUMN, build_payload
+    if article.get(PAYLOAD_COLUMN) is not None:
+        article[PAYLOAD_COLUMN] = build_payload(article.get('content') or '')
+
+
+def fingerprint(article) -> Dict[str, str]:
+    """计算记录的逐字段指纹"""
+    prints = {key: field_hash(value) for key, value in article.items() if key not in SKIP_COLUMNS}
+    prints[INPUT_KEY] = field_hash(summary_input(article))
+    return prints
+
+
+# ==================== 变更跟踪 ====================
+
+class ChangeTracker:
+    """
+    对比本次抓取结果与数据库中已存记录
+
+    - reuse_summary(): 摘要输入未变时复用已存的 ai_summary，跳过 LLM 调用
+    - sync(): 新记录批量插入；已存在的记录只更新指纹发生变化的列
+    """
+
+    def __init__(self, client, table: str, batch_size: int = BATCH_SIZE):
+        self.client = client
+        self.table = table
+        self.batch_size = batch_size
+        self.stored: Dict[str, Dict] = {}   # source_url -> {id, fingerprint, ai_summary}
+        self.missing = set()                # 已确认数据库中不存在的 source_url
+
+    def prefetch(self, urls: Iterable[str]):
+        """按批查询已存记录（每批一次请求，而不是每条一次）"""
+        pending = [u for u in dict.fromkeys(urls) if u not in self.stored and u not in self.missing]
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start:start + self.batch_size]
+            result = (self.client.table(self.table)
+                      .select('id, source_url, fingerprint, ai_summary')
+                      .in_('source_url', chunk)
+                      .execute())
+            for row in result.data or []:
+                self.stored[row['source_url']] = row
+            self.missing.update(u for u in chunk if u not in self.stored)
+
+    def stored_row(self, url: str) -> Optional[Dict]:
+        if url not in self.stored and url not in self.missing:
+            self.prefetch([url])
+        return self.stored.get(url)
+
+    def reuse_summary(self, article) -> bool:
+        """
+        摘要输入未变化且已有 AI 摘要时，直接复用
+
+        旧记录没有指纹时无法判断输入是否变化，同样复用，避免重复调用 LLM。
+
+        Returns:
+            是否已复用（True 时调用方应跳过摘要生成）
+        """
+        try:
+            row = self.stored_row(article['source_url'])
+        except Exception as e:
+            print(f"⚠️ 查询已存记录失败，照常生成摘要: {e}", file=sys.stderr)
+            return False
+
+        if not row or not row.get('ai_summary'):
+            return False
+
+        stored_input = (row.get('fingerprint') or {}).get(INPUT_KEY)
+        if stored_input and stored_input != field_hash(summary_input(article)):
+            return False
+
+        article['ai_summary'] = row['ai_summary']
+        return True
+
+    def _diff(self, article, row: Dict) -> Dict:
+        """返回需要更新的列（含新指纹）；无变化时返回空 dict"""
+        old_prints = row.get('fingerprint') or {}
+
+        # 本次没有生成摘要时沿用库中的摘要，避免用空值覆盖；
+        # 输入已变化时同时保留旧的输入指纹，下次启用 AI 时仍会重新生成
+        stale_input = False
+        if not article.get('ai_summary') and row.get('ai_summary'):
+            if not self.reuse_summary(article):
+                article['ai_summary'] = row['ai_summary']
+                stale_input = True
+            refresh_payload(article)
+
+        new_prints = fingerprint(article)
+        if stale_input:
+            new_prints[INPUT_KEY] = old_prints.get(INPUT_KEY, new_prints[INPUT_KEY])
+        changes = {
+            key: article[key] for key, digest in new_prints.items()
+            if key != INPUT_KEY and old_prints.get(key) != digest
+        }
+        if changes or old_prints != new_prints:
+            changes['fingerprint'] = new_prints
+        return changes
+
+    def _insert(self, rows: List[Dict]) -> int:
+        """批量插入；整批失败时逐条重试，定位出错的记录"""
+        if not rows:
+            return 0
+        try:
+            self.client.table(self.table).insert(rows).execute()
+            return len(rows)
+        except Exception as e:
+            print(f"  ⚠️ 批量插入失败，改为逐条插入: {e}", file=sys.stderr)
+
+        count = 0
+        for row in rows:
+            try:
+                self.client.table(self.table).insert(row).execute()
+                count += 1
+            except Exception as e:
+                print(f"  ❌ 上传失败 ({row.get('title', '')[:20]}): {e}", file=sys.stderr)
+        return count
+
+    def sync(self, articles: Iterable) -> Dict[str, int]:
+        """
+        同步一批记录（可以是生成器，按批流式处理）
+
+        Returns:
+            {'inserted': 新增, 'updated': 部分更新, 'unchanged': 无变化, 'failed': 失败}
+        """
+        stats = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+
+        batch = []
+        for article in articles:
+            batch.append(article)
+            if len(batch) >= self.batch_size:
+                self._sync_batch(batch, stats)
+                batch = []
+        if batch:
+            self._sync_batch(batch, stats)
+        return stats
+
+    def _sync_batch(self, batch: List, stats: Dict[str, int]):
+        try:
+            self.prefetch(a['source_url'] for a in batch)
+        except Exception as e:
+            print(f"  ❌ 查询已存记录失败，跳过本批 {len(batch)} 条: {e}", file=sys.stderr)
+            stats['failed'] += len(batch)
+            return
+
+        new_rows = []
+        for article in batch:
+            row = self.stored.get(article['source_url'])
+            if row is None:
+                payload = dict(article)
+                payload['fingerprint'] = fingerprint(article)
+                new_rows.append(payload)
+                continue
+
+            changes = self._diff(article, row)
+            if not changes:
+                stats['unchanged'] += 1
+                continue
+
+            try:
+                self.client.table(self.table).update(changes).eq('id', row['id']).execute()
+                row['fingerprint'] = changes['fingerprint']
+                columns = ', '.join(k for k in changes if k != 'fingerprint') or 'fingerprint'
+                print(f"  🔄 更新: {article['title'][:20]}... [{columns}]", file=sys.stderr)
+                stats['updated'] += 1
+            except Exception as e:
+                print(f"  ❌ 更新失败 ({article['title'][:20]}): {e}", file=sys.stderr)
+                stats['failed'] += 1
+
+        inserted = self._insert(new_rows)
+        if new_rows:
+            print(f"  ✅ 批量上传 {inserted}/{len(new_rows)} 条新记录", file=sys.stderr)
+        stats['inserted'] += inserted
+        stats['failed'] += len(new_rows) - inserted
+        # 刚插入的记录已存在于库中：同一 URL 再次出现时重新查询，而不是重复插入
+        self.missing.difference_update(row['source_url'] for row in new_rows)
+
+
+def open_tracker(url: str, key: str, table: str, backend: str = 'supabase') -> Optional[ChangeTracker]:
+    """创建存储客户端并返回变更跟踪器；后端不可用（如未安装 supabase）时返回 None"""
+    from storage import StorageError, open_storage
+    try:
+        return ChangeTracker(open_storage(backend, url, key), table)
+    except StorageError as e:
+        print(f"⚠️ {e}", file=sys.stderr)
+        return None
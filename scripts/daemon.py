@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+常驻模式
+一个进程按内部调度循环运行各抓取脚本：模块只导入一次，OpenCC 转换器、编译好的正则、
+HTTP 连接池、存储客户端和各类缓存在运行之间保持在内存中，每次刷新不再从冷启动开始；
+本地 HTTP 端点提供手动触发、健康检查与指标
+"""
+
+import importlib
+import json
+import os
+import queue
+import resource
+import shlex
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+# ==================== 配置区 ====================
+
+DEFAULT_HOST = '127.0.0.1'   # 只监听本机：端点没有鉴权
+DEFAULT_PORT = 8765
+
+# 各任务：脚本模块、运行间隔（秒）与命令行参数（与 cron / 工作流中的调用一致）
+# 新闻源自带按更新频率的调度（--schedule），daemon 只需频繁唤醒，未到期的源会被跳过
+# 抓取任务只把 AI 摘要写入队列（--ai-queue），由 summaries 任务按限速回填
+DEFAULT_JOBS = {
+    'news': {'module': 'fetch_news', 'interval': 15 * 60, 'args': ['--upload', '--ai-queue', '--schedule']},
+    'jw': {'module': 'fetch_scut_jw', 'interval': 60 * 60, 'args': ['--upload', '--ai-queue']},
+    'github': {'module': 'fetch_github_trending', 'interval': 6 * 60 * 60, 'args': ['--upload', '--ai-queue']},
+    'summaries': {'module': 'summary_queue', 'interval': 5 * 60, 'args': ['work']},
+}
+
+STARTUP_STAGGER = 5.0   # 启动时各任务依次错开的秒数，避免同时抢占
+TICK = 1.0              # 调度循环的检查间隔（秒）
+
+
+# ==================== 任务与调度 ====================
+
+class Job:
+    """一个定时任务及其运行统计"""
+
+    def __init__(self, name: str, module: str, interval: float, args: List[str]):
+        self.name = name
+        self.module = module
+        self.interval = interval
+        self.args = args
+        self.next_run = 0.0
+        self.queued = False
+        self.runs = 0
+        self.failures = 0
+        self.first_duration: Optional[float] = None   # 冷启动（含首次导入）的耗时
+        self.last_duration: Optional[float] = None
+        self.warm_total = 0.0                         # 之后各次运行的耗时合计
+        self.last_started: Optional[str] = None
+        self.last_status: Optional[str] = None
+
+    def record(self, duration: float, status: str):
+        self.runs += 1
+        self.failures += status != 'ok'
+        if self.first_duration is None:
+            self.first_duration = duration
+        else:
+            self.warm_total += duration
+        self.last_duration = duration
+        self.last_status = status
+
+    def status(self) -> Dict:
+        warm_runs = self.runs - 1 if self.first_duration is not None else 0
+        return {
+            'module': self.module,
+            'interval': self.interval,
+            'args': self.args,
+            'runs': self.runs,
+            'failures': self.failures,
+            'queued': self.queued,
+            'last_started': self.last_started,
+            'last_status': self.last_status,
+            'last_duration': self.last_duration,
+            'first_duration': self.first_duration,
+            'warm_avg_duration': self.warm_total / warm_runs if warm_runs else None,
+            'next_run_in': max(0.0, self.next_run - time.monotonic()) if self.interval > 0 else None,
+        }
+
+
+class Daemon:
+    """
+    调度与执行
+
+    - 调度线程按间隔把到期任务放入队列；HTTP 触发同样入队（已在队列中的任务不重复入队）
+    - 执行线程逐个运行：各脚本共用进程内的单例（HOSTS、PROFILER、ROUTE_METRICS 等），不能并发
+    - 运行即调用脚本的 main()（sys.argv 换成任务参数），sys.exit 与异常都只记为该次失败
+    """
+
+    def __init__(self, jobs: Dict[str, Job]):
+        self.jobs = jobs
+        self.queue: 'queue.Queue[str]' = queue.Queue()
+        self.lock = threading.Lock()
+        self.running: Optional[str] = None
+        self.started = time.monotonic()
+        self.stopping = threading.Event()
+        self.modules = {}
+
+        now = time.monotonic()
+        for i, job in enumerate(jobs.values()):
+            job.next_run = now + i * STARTUP_STAGGER
+
+    def warm_up(self):
+        """预先导入各脚本模块（转换器、正则、配置在此初始化一次）"""
+        for job in self.jobs.values():
+            if job.module in self.modules:
+                continue
+            started = time.monotonic()
+            try:
+                self.modules[job.module] = importlib.import_module(job.module)
+            except Exception as e:
+                # 缺少依赖等：不影响其他任务，运行时再次导入并记为失败
+                print(f"⚠️ 加载 {job.module} 失败: {e}", file=sys.stderr)
+                continue
+            print(f"🔥 已加载 {job.module}（{time.monotonic() - started:.2f} 秒）", file=sys.stderr)
+
+    def trigger(self, name: str) -> bool:
+        """任务入队；已在队列中时返回 False"""
+        job = self.jobs[name]
+        with self.lock:
+            if job.queued:
+                return False
+            job.queued = True
+        self.queue.put(name)
+        return True
+
+    def schedule_loop(self):
+        while not self.stopping.wait(TICK):
+            now = time.monotonic()
+            for name, job in self.jobs.items():
+                if job.interval > 0 and now >= job.next_run:
+                    job.next_run = now + job.interval
+                    self.trigger(name)
+
+    def worker_loop(self):
+        while not self.stopping.is_set():
+            try:
+                name = self.queue.get(timeout=TICK)
+            except queue.Empty:
+                continue
+            job = self.jobs[name]
+            with self.lock:
+                job.queued = False
+                self.running = name
+            try:
+                self.run(job)
+            finally:
+                with self.lock:
+                    self.running = None
+
+    def run(self, job: Job):
+        """在本进程内执行一次脚本"""
+        from ai_summarizer import ROUTE_METRICS
+        from host_health import HOSTS
+
+        # 与独立进程一样：熔断状态与本次统计从零开始（连接池、转换器、缓存保留）
+        HOSTS.reset()
+        with ROUTE_METRICS.lock:
+            ROUTE_METRICS.records.clear()
+
+        job.last_started = datetime.now().isoformat(timespec='seconds')
+        print(f"\n▶️ [{job.last_started}] {job.name}: {job.module} {shlex.join(job.args)}", file=sys.stderr)
+        saved_argv = sys.argv
+        sys.argv = [f'{job.module}.py'] + job.args
+        started = time.monotonic()
+        status = 'ok'
+        try:
+            module = self.modules.get(job.module) or importlib.import_module(job.module)
+            self.modules[job.module] = module
+            module.main()
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                status = f'exit {e.code}'
+        except Exception as e:
+            status = f'error: {type(e).__name__}: {e}'
+        finally:
+            sys.argv = saved_argv
+        duration = time.monotonic() - started
+        job.record(duration, status)
+        print(f"⏹️ {job.name}: {status}（{duration:.1f} 秒）", file=sys.stderr)
+
+    def health(self) -> Dict:
+        with self.lock:
+            running = self.running
+        return {
+            'status': 'ok',
+            'uptime': round(time.monotonic() - self.started, 1),
+            'running': running,
+            'jobs': {name: job.status() for name, job in self.jobs.items()},
+        }
+
+    def metrics(self) -> str:
+        """Prometheus 文本格式"""
+        lines = [
+            '# TYPE daemon_uptime_seconds gauge',
+            f'daemon_uptime_seconds {time.monotonic() - self.started:.1f}',
+            '# TYPE daemon_max_rss_bytes gauge',
+            f'daemon_max_rss_bytes {max_rss_bytes()}',
+        ]
+        series = (
+            ('daemon_job_runs_total', 'counter', lambda j: j.runs),
+            ('daemon_job_failures_total', 'counter', lambda j: j.failures),
+            ('daemon_job_first_duration_seconds', 'gauge', lambda j: j.first_duration),
+            ('daemon_job_last_duration_seconds', 'gauge', lambda j: j.last_duration),
+            ('daemon_job_warm_duration_seconds_sum', 'counter', lambda j: j.warm_total),
+        )
+        for metric, kind, value in series:
+            lines.append(f'# TYPE {metric} {kind}')
+            for name, job in self.jobs.items():
+                v = value(job)
+                if v is not None:
+                    lines.append(f'{metric}{{job="{name}"}} {v:.3f}' if isinstance(v, float)
+                                 else f'{metric}{{job="{name}"}} {v}')
+        return '\n'.join(lines) + '\n'
+
+
+def max_rss_bytes() -> int:
+    """进程峰值常驻内存（Linux 上 ru_maxrss 单位为 KB，macOS 为字节）"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+# ==================== HTTP 端点 ====================
+
+class ControlHandler(BaseHTTPRequestHandler):
+    """GET /health、GET /metrics、POST /run/<job>"""
+
+    server_version = 'AnthropoDaemon/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status: int, data):
+        self.send(status, json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'),
+                  'application/json; charset=utf-8')
+
+    def do_GET(self):
+        daemon = self.server.scheduler
+        if self.path == '/health':
+            return self.send_json(200, daemon.health())
+        if self.path == '/metrics':
+            return self.send(200, daemon.metrics().encode('utf-8'), 'text/plain; version=0.0.4')
+        self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        daemon = self.server.scheduler
+        parts = self.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'run':
+            return self.send_json(404, {'error': 'not found'})
+        name = parts[1]
+        if name not in daemon.jobs:
+            return self.send_json(404, {'error': f'unknown job: {name}', 'jobs': list(daemon.jobs)})
+        if daemon.trigger(name):
+            return self.send_json(202, {'queued': name})
+        self.send_json(409, {'error': f'{name} is already queued'})
+
+
+# ==================== 主函数 ====================
+
+def parse_jobs(only: str, intervals: List[str], job_args: List[str]) -> Dict[str, Job]:
+    """按命令行覆盖默认任务配置"""
+    names = [n.strip() for n in only.split(',') if n.strip()] if only else list(DEFAULT_JOBS)
+    unknown = [n for n in names if n not in DEFAULT_JOBS]
+    if unknown:
+        raise SystemExit(f"❌ 未知任务: {', '.join(unknown)}（可选 {', '.join(DEFAULT_JOBS)}）")
+    jobs = {name: Job(name, DEFAULT_JOBS[name]['module'], DEFAULT_JOBS[name]['interval'],
+                      list(DEFAULT_JOBS[name]['args'])) for name in names}
+
+    for setting, apply in ((intervals, lambda job, v: setattr(job, 'interval', float(v))),
+                           (job_args, lambda job, v: setattr(job, 'args', shlex.split(v)))):
+        for item in setting or []:
+            name, sep, value = item.partition('=')
+            if not sep or name not in DEFAULT_JOBS:
+                raise SystemExit(f"❌ 格式应为 JOB=VALUE（JOB: {', '.join(DEFAULT_JOBS)}）: {item}")
+            if name in jobs:
+                apply(jobs[name], value)
+    return jobs
+
+
+def main():
+    """命令行：启动常驻进程"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='常驻模式：内部调度各抓取脚本，保持连接与缓存')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='控制端点监听地址（默认仅本机）')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'控制端点端口（默认 {DEFAULT_PORT}）')
+    parser.add_argument('--jobs', default='', help=f"只运行这些任务，逗号分隔（默认全部: {', '.join(DEFAULT_JOBS)}）")
+    parser.add_argument('--interval', action='append',
+                        help='运行间隔秒数，如 news=600；0 表示只在手动触发时运行')
+    parser.add_argument('--args', action='append', dest='job_args',
+                        help='任务的命令行参数，如 news="--upload --schedule --ai"')
+    parser.add_argument('--no-warm-up', action='store_true', help='不预先导入脚本模块（首次运行时再导入）')
+    args = parser.parse_args()
+
+    daemon = Daemon(parse_jobs(args.jobs, args.interval, args.job_args))
+    if not args.no_warm_up:
+        daemon.warm_up()
+
+    server = ThreadingHTTPServer((args.host, args.port), ControlHandler)
+    server.daemon_threads = True
+    server.scheduler = daemon
+    threading.Thread(target=daemon.schedule_loop, daemon=True).start()
+    threading.Thread(target=daemon.worker_loop, daemon=True).start()
+
+    host, port = server.server_address[:2]
+    print(f"🛰️ 常驻模式已启动: http://{host}:{port}（pid {os.getpid()}）", file=sys.stderr)
+    for job in daemon.jobs.values():
+        every = f"每 {job.interval:.0f} 秒" if job.interval > 0 else '仅手动触发'
+        print(f"  {job.name:9s} {every}: {job.module} {shlex.join(job.args)}", file=sys.stderr)
+    print(f"  触发: curl -X POST http://{host}:{port}/run/<job>；状态: /health；指标: /metrics", file=sys.stderr)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stopping.set()
+        server.server_close()
+        print("\n👋 常驻模式已退出", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
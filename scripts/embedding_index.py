@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+本地向量索引与收藏推荐
+不依赖网络或模型：对标题 / 摘要 / 正文的分词（中文二元组、英文单词）做特征哈希得到定长向量，
+全部文章的向量存为一个 NumPy 文件；推荐时把候选矩阵与收藏矩阵相乘一次，
+取与最相近收藏的余弦相似度作为推荐分，在入库时写入 recommend_score，客户端按此列排序即可
+"""
+
+import os
+import sys
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from search_index import tokenize
+
+# ==================== 配置区 ====================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_EMBEDDING_PATH = os.path.join(SCRIPT_DIR, '.cache', 'embeddings.npz')
+
+DIM = 1024              # 向量维度（2 的幂，哈希取低位）；float16 存储每篇 2 KB
+CONTENT_CHARS = 2000    # 正文只取开头部分
+BATCH_SIZE = 64         # 抓取流水线中每批打分的条数
+
+# 各字段的权重（标题最能代表主题）
+FIELD_WEIGHTS = {'title': 3.0, 'ai_summary': 1.5, 'summary': 1.0, 'content': 1.0}
+
+# 收藏状态保存在这些表的 is_favorited 列
+FAVORITE_TABLES = ('articles', 'news', 'school_notices')
+
+SCORE_COLUMN = 'recommend_score'
+
+
+# ==================== 向量化 ====================
+
+@lru_cache(maxsize=1 << 16)
+def _bucket(token: str) -> tuple:
+    """词 -> (维度, 符号)：CRC32 低位选维度，最高位选符号（符号哈希让冲突在期望上相互抵消）"""
+    h = zlib.crc32(token.encode('utf-8'))
+    return h & (DIM - 1), 1.0 if h >> 31 else -1.0
+
+
+def embed_one(article) -> np.ndarray:
+    """单篇文章的 L2 归一化向量（float32）；没有任何词时为零向量"""
+    weights: Dict[str, float] = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        text = article.get(field) or ''
+        if field == 'content':
+            text = text[:CONTENT_CHARS]
+        for token in tokenize(text):
+            weights[token] = weights.get(token, 0.0) + weight
+
+    vector = np.zeros(DIM, dtype=np.float32)
+    if not weights:
+        return vector
+    buckets = [_bucket(token) for token in weights]
+    index = np.fromiter((b[0] for b in buckets), dtype=np.int64, count=len(buckets))
+    signs = np.fromiter((b[1] for b in buckets), dtype=np.float32, count=len(buckets))
+    # 词频做次线性缩放，避免长文中反复出现的词压过标题
+    values = signs * (1.0 + np.log(np.fromiter(weights.values(), dtype=np.float32, count=len(weights))))
+    np.add.at(vector, index, values)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def embed(articles: Iterable) -> np.ndarray:
+    """多篇文章 -> (n, DIM) 矩阵"""
+    rows = [embed_one(article) for article in articles]
+    return np.vstack(rows) if rows else np.zeros((0, DIM), dtype=np.float32)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+# ==================== 索引 ====================
+
+class EmbeddingIndex:
+    """
+    全部已入库文章的向量（单个 .npz 文件）
+
+    urls / tables / published 为字符串数组，vectors 为 float16 矩阵，favorited 为布尔数组；
+    按 source_url 去重，重复写入时覆盖原向量。
+    """
+
+    def __init__(self, path: str = DEFAULT_EMBEDDING_PATH):
+        self.path = path
+        self.urls: List[str] = []
+        self.tables: List[str] = []
+        self.published: List[str] = []
+        self.vectors = np.zeros((0, DIM), dtype=np.float16)
+        self.favorited = np.zeros(0, dtype=bool)
+        self._load()
+        self.positions = {url: i for i, url in enumerate(self.urls)}
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if data['vectors'].shape[1] != DIM:
+                    print(f"⚠️ 向量维度已变更（{data['vectors'].shape[1]} -> {DIM}），重建索引", file=sys.stderr)
+                    return
+                self.urls = data['urls'].tolist()
+                self.tables = data['tables'].tolist()
+                self.published = data['published'].tolist()
+                self.vectors = data['vectors']
+                self.favorited = data['favorited']
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️ 向量索引损坏，重建: {e}", file=sys.stderr)
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def upsert(self, articles: List, table: str, vectors: Optional[np.ndarray] = None) -> int:
+        """写入或覆盖文章向量（vectors 为已算好的矩阵时直接使用）"""
+        articles = [a for a in articles if a.get('source_url')]
+        if not articles:
+            return 0
+        if vectors is None:
+            vectors = embed(articles)
+
+        new_rows, new_vectors = [], []
+        for article, vector in zip(articles, vectors):
+            url = article['source_url']
+            position = self.positions.get(url)
+            if position is None:
+                self.positions[url] = len(self.urls) + len(new_rows)
+                new_rows.append((url, table, article.get('published_at') or ''))
+                new_vectors.append(vector)
+            else:
+                self.vectors[position] = vector
+                self.published[position] = article.get('published_at') or self.published[position]
+
+        if new_rows:
+            urls, tables, published = zip(*new_rows)
+            self.urls.extend(urls)
+            self.tables.extend(tables)
+            self.published.extend(published)
+            self.vectors = np.vstack([self.vectors, np.asarray(new_vectors, dtype=np.float16)])
+            self.favorited = np.concatenate([self.favorited, np.zeros(len(new_rows), dtype=bool)])
+        return len(articles)
+
+    def mark_favorites(self, urls: Iterable[str]):
+        """以数据库中的收藏状态为准，整体替换收藏标记"""
+        self.favorited = np.zeros(len(self.urls), dtype=bool)
+        for url in urls:
+            position = self.positions.get(url)
+            if position is not None:
+                self.favorited[position] = True
+
+    def save(self):
+        """原子写出（先写临时文件再替换）"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp.npz'
+        np.savez_compressed(
+            tmp_path,
+            urls=np.array(self.urls, dtype=str),
+            tables=np.array(self.tables, dtype=str),
+            published=np.array(self.published, dtype=str),
+            vectors=self.vectors.astype(np.float16),
+            favorited=self.favorited,
+        )
+        os.replace(tmp_path, self.path)
+
+
+# ==================== 推荐 ====================
+
+class Recommender:
+    """
+    按与收藏的相似度打分
+
+    逆文档频率按索引中各维度非零的文章数估计，对候选与收藏同样加权后重新归一化，
+    压低"通知""项目"这类到处出现的词；推荐分 = 与最相近一篇收藏的余弦相似度（负值记 0）。
+    """
+
+    def __init__(self, favorites: np.ndarray, document_frequency: Optional[np.ndarray] = None,
+                 documents: int = 0):
+        if document_frequency is None:
+            self.idf = np.ones(DIM, dtype=np.float32)
+        else:
+            self.idf = (np.log((1 + documents) / (1 + document_frequency)) + 1).astype(np.float32)
+        self.favorites = _normalize(np.asarray(favorites, dtype=np.float32) * self.idf)
+
+    @classmethod
+    def from_index(cls, index: EmbeddingIndex) -> 'Recommender':
+        """以索引中已标记收藏的文章建立推荐器"""
+        favorites = index.vectors[index.favorited].astype(np.float32)
+        df = np.count_nonzero(index.vectors, axis=0) if len(index) else None
+        return cls(favorites, df, len(index))
+
+    def __bool__(self) -> bool:
+        return len(self.favorites) > 0
+
+    def score(self, vectors: np.ndarray) -> np.ndarray:
+        """候选矩阵 (n, DIM) -> 推荐分 (n,)，一次矩阵乘法"""
+        if not len(self.favorites) or not len(vectors):
+            return np.zeros(len(vectors), dtype=np.float32)
+        candidates = _normalize(np.asarray(vectors, dtype=np.float32) * self.idf)
+        return np.clip((candidates @ self.favorites.T).max(axis=1), 0, 1)
+
+
+def load_favorites(client, tables: Iterable[str] = FAVORITE_TABLES) -> Dict[str, List[Dict]]:
+    """读取各表中已收藏的文章（含打分所需的文本列），按表分组"""
+    favorites = {}
+    for table in tables:
+        try:
+            result = (client.table(table)
+                      .select('source_url, title, summary, ai_summary, content')
+                      .eq('is_favorited', True)
+                      .execute())
+        except Exception as e:
+            print(f"⚠️ 读取 {table} 收藏失败: {e}", file=sys.stderr)
+            continue
+        favorites[table] = [row for row in result.data or [] if row.get('source_url')]
+    return favorites
+
+
+def sync_favorites(index: EmbeddingIndex, client) -> int:
+    """把数据库中的收藏写入索引（收藏早于索引建立时也能取到向量）并更新收藏标记"""
+    favorites = load_favorites(client)
+    for table, rows in favorites.items():
+        index.upsert(rows, table)
+    urls = [row['source_url'] for rows in favorites.values() for row in rows]
+    index.mark_favorites(urls)
+    return len(urls)
+
+
+def _batches(items: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def recommend_articles(articles: Iterable, table: str, client=None,
+                       path: str = DEFAULT_EMBEDDING_PATH) -> Iterator:
+    """
+    供抓取脚本调用：写入向量索引并为每篇文章计算 recommend_score（逐批处理、逐条产出）
+
+    提供 client（存储客户端）时先从数据库同步收藏；没有任何收藏时不写推荐分，
+    客户端照常按发布时间排序。
+    """
+    index = EmbeddingIndex(path)
+    if client is not None:
+        sync_favorites(index, client)
+    recommender = Recommender.from_index(index)
+    print(f"🧭 推荐打分：索引 {len(index)} 篇，收藏 {len(recommender.favorites)} 篇", file=sys.stderr)
+
+    scored = 0
+    for batch in _batches(articles, BATCH_SIZE):
+        vectors = embed(batch)
+        if recommender:
+            for article, score in zip(batch, recommender.score(vectors)):
+                article[SCORE_COLUMN] = round(float(score), 4)
+            scored += len(batch)
+        index.upsert(batch, table, vectors)
+        yield from batch
+
+    index.save()
+    print(f"🧭 已写入向量索引（共 {len(index)} 篇），推荐打分 {scored} 篇: {path}", file=sys.stderr)
+
+
+# ==================== 主函数 ====================
+
+def main():
+    """命令行：导入 JSON 文件、同步收藏、按推荐分输出排好序的列表"""
+    import argparse
+    import json
+    import time
+    from storage import BACKENDS, open_storage
+
+    parser = argparse.ArgumentParser(description='本地向量索引与收藏推荐')
+    parser.add_argument('--index', default=DEFAULT_EMBEDDING_PATH, help='向量索引文件路径')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add_parser = subparsers.add_parser('add', help='导入抓取脚本 --output 生成的 JSON 文件')
+    add_parser.add_argument('files', nargs='+', help='JSON 文件路径')
+    add_parser.add_argument('--table', default='articles', help='文章所属的表')
+
+    fav_parser = subparsers.add_parser('favorites', help='从数据库同步收藏状态')
+    fav_parser.add_argument('--storage', choices=BACKENDS, default='supabase', help='存储后端')
+    fav_parser.add_argument('--storage-path', default='', help='--storage sqlite 的数据库路径')
+    fav_parser.add_argument('--supabase-url', default=os.environ.get('SUPABASE_URL'), help='Supabase URL')
+    fav_parser.add_argument('--supabase-key', default=os.environ.get('SUPABASE_KEY'), help='Supabase Key')
+
+    rank_parser = subparsers.add_parser('rank', help='按推荐分列出未收藏的文章')
+    rank_parser.add_argument('--limit', type=int, default=20, help='输出条数')
+    rank_parser.add_argument('--table', default=None, help='只看某张表')
+    rank_parser.add_argument('--favorite', action='append', default=[],
+                             help='临时指定收藏的 source_url（可多次），不写回索引')
+
+    args = parser.parse_args()
+    index = EmbeddingIndex(args.index)
+
+    if args.command == 'add':
+        start = time.perf_counter()
+        total = 0
+        for path in args.files:
+            with open(path, 'r', encoding='utf-8') as f:
+                total += index.upsert(json.load(f), args.table)
+        index.save()
+        print(f"✅ 导入 {total} 篇（{(time.perf_counter() - start) * 1000:.0f} ms），索引共 {len(index)} 篇，"
+              f"文件 {os.path.getsize(args.index) / 1024:.0f} KB", file=sys.stderr)
+
+    elif args.command == 'favorites':
+        count = sync_favorites(index, open_storage(args.storage, args.supabase_url, args.supabase_key,
+                                                   args.storage_path))
+        index.save()
+        print(f"⭐ 收藏 {count} 篇，索引共 {len(index)} 篇", file=sys.stderr)
+
+    elif args.command == 'rank':
+        if args.favorite:
+            index.mark_favorites(set(args.favorite) | {u for u, f in zip(index.urls, index.favorited) if f})
+        recommender = Recommender.from_index(index)
+        if not recommender:
+            print("⚠️ 还没有收藏，无法推荐（先运行 favorites 或用 --favorite 指定）", file=sys.stderr)
+            sys.exit(1)
+
+        start = time.perf_counter()
+        scores = recommender.score(index.vectors)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        candidates = [i for i in range(len(index)) if not index.favorited[i]
+                      and (args.table is None or index.tables[i] == args.table)]
+        # 分数相同（如都为 0）时较新的在前
+        candidates.sort(key=lambda i: index.published[i], reverse=True)
+        candidates.sort(key=lambda i: -scores[i])
+        for rank, i in enumerate(candidates[:args.limit], 1):
+            print(f"{rank:>2}. {scores[i]:.3f}  [{index.tables[i]}] {index.urls[i]}  ({index.published[i] or '-'})")
+        print(f"\n打分 {len(index)} 篇 × 收藏 {len(recommender.favorites)} 篇，耗时 {elapsed_ms:.1f} ms",
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
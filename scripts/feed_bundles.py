@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+每日内容包发布
+每次运行后按 来源/日期 生成压缩快照包，以及相对上次快照的增量包，供 App 一次性同步、CDN 缓存。
+指定存储桶时同步上传到 Supabase Storage，App 从 {桶公开地址}/{source}/{date}/manifest.json 开始读取
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# ==================== 配置区 ====================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BUNDLE_DIR = os.path.join(SCRIPT_DIR, '.cache', 'bundles')
+
+BUNDLE_VERSION = 1
+MAX_DELTAS = 8   # 增量包超过该数量时合并为新快照
+
+# 上传到存储桶时的缓存时长：包文件按内容寻址、永不改变；manifest 每次运行都会更新
+BUNDLE_CACHE_SECONDS = 365 * 24 * 3600
+MANIFEST_CACHE_SECONDS = 300
+
+# 写入包的字段（其余如 is_favorited 等客户端状态不下发）
+BUNDLE_FIELDS = [
+    'title', 'summary', 'content', 'ai_summary', 'source', 'source_url',
+    'author', 'category', 'priority', 'tags', 'published_at', 'fetched_at',
+]
+
+
+# ==================== 辅助函数 ====================
+
+def item_id(article: Dict) -> str:
+    """基于 source_url 的稳定条目 ID"""
+    return hashlib.sha1(article['source_url'].encode('utf-8')).hexdigest()[:16]
+
+
+def compact_item(article: Dict) -> Dict:
+    """只保留需要下发的非空字段"""
+    item = {'id': item_id(article)}
+    for field in BUNDLE_FIELDS:
+        value = article.get(field)
+        if value not in (None, '', []):
+            item[field] = value
+    return item
+
+
+def item_hash(item: Dict) -> str:
+    """条目内容指纹（忽略抓取时间，避免每次运行都被判定为变化）"""
+    stable = {k: v for k, v in item.items() if k != 'fetched_at'}
+    payload = json.dumps(stable, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _encode_bundle(kind: str, source: str, date: str, items: List[Dict]) -> bytes:
+    """序列化并压缩；mtime 固定为 0，保证相同内容生成相同字节"""
+    payload = {
+        'version': BUNDLE_VERSION,
+        'kind': kind,
+        'source': source,
+        'date': date,
+        'items': items,
+    }
+    raw = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return gzip.compress(raw, compresslevel=9, mtime=0)
+
+
+def _read_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_bundle(path: str) -> Dict:
+    """读取一个压缩包"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# ==================== 核心功能 ====================
+
+class DailyBundle:
+    """
+    某个来源某一天的内容包目录
+
+    目录结构:
+        {source}/{date}/manifest.json          客户端入口（短缓存）
+        {source}/{date}/snapshot-<hash>.json.gz 全量快照（内容寻址，可永久缓存）
+        {source}/{date}/delta-<n>-<hash>.json.gz 增量包（内容寻址，可永久缓存）
+        {source}/{date}/.items.json            条目指纹（发布端状态，不需下发）
+        {source}/{date}/.uploaded.json         已上传到存储桶的文件（发布端状态，不需下发）
+    """
+
+    def __init__(self, root: str, source: str, date: str):
+        self.source = source
+        self.date = date
+        self.dir = os.path.join(root, source, date)
+        self.manifest_path = os.path.join(self.dir, 'manifest.json')
+        self.items_path = os.path.join(self.dir, '.items.json')
+        self.uploaded_path = os.path.join(self.dir, '.uploaded.json')
+        self.manifest = _read_json(self.manifest_path, None)
+        self.item_hashes: Dict[str, str] = _read_json(self.items_path, {})
+
+    def _write_file(self, prefix: str, data: bytes) -> Dict:
+        digest = hashlib.sha1(data).hexdigest()[:12]
+        name = f"{prefix}-{digest}.json.gz"
+        with open(os.path.join(self.dir, name), 'wb') as f:
+            f.write(data)
+        return {'file': name, 'bytes': len(data), 'sha1': digest}
+
+    def _all_items(self) -> Dict[str, Dict]:
+        """合并快照与所有增量，得到当前全量条目"""
+        merged: Dict[str, Dict] = {}
+        if not self.manifest:
+            return merged
+        files = [self.manifest['snapshot']] + self.manifest['deltas']
+        for entry in files:
+            for item in read_bundle(os.path.join(self.dir, entry['file']))['items']:
+                merged[item['id']] = item
+        return merged
+
+    def _write_snapshot(self, items: List[Dict]):
+        old_files = []
+        if self.manifest:
+            old_files = [self.manifest['snapshot']['file']] + [d['file'] for d in self.manifest['deltas']]
+
+        snapshot = self._write_file('snapshot', _encode_bundle('snapshot', self.source, self.date, items))
+        snapshot['count'] = len(items)
+        self.manifest = {
+            'version': BUNDLE_VERSION,
+            'source': self.source,
+            'date': self.date,
+            'snapshot': snapshot,
+            'deltas': [],
+        }
+
+        # 旧快照/增量已被合并，移除（仍在引用的同名文件保留）
+        for name in old_files:
+            if name != snapshot['file']:
+                try:
+                    os.remove(os.path.join(self.dir, name))
+                except OSError:
+                    pass
+
+    def publish(self, articles: List[Dict]) -> Optional[Dict]:
+        """
+        发布一批文章
+
+        首次发布生成快照；之后只把新增/变化条目写成增量包，
+        增量包过多时合并为新快照。
+
+        Returns:
+            本次写出的包信息；无变化时返回 None
+        """
+        os.makedirs(self.dir, exist_ok=True)
+
+        changed = []
+        for article in articles:
+            item = compact_item(article)
+            digest = item_hash(item)
+            if self.item_hashes.get(item['id']) != digest:
+                self.item_hashes[item['id']] = digest
+                changed.append(item)
+
+        if not changed:
+            return None
+
+        if not self.manifest:
+            self._write_snapshot(changed)
+            result = dict(self.manifest['snapshot'], kind='snapshot')
+        elif len(self.manifest['deltas']) >= MAX_DELTAS:
+            merged = self._all_items()
+            merged.update((item['id'], item) for item in changed)
+            self._write_snapshot(list(merged.values()))
+            result = dict(self.manifest['snapshot'], kind='snapshot')
+        else:
+            seq = len(self.manifest['deltas']) + 1
+            data = _encode_bundle('delta', self.source, self.date, changed)
+            delta = self._write_file(f'delta-{seq:03d}', data)
+            delta['count'] = len(changed)
+            delta['created_at'] = datetime.now().isoformat()
+            self.manifest['deltas'].append(delta)
+            result = dict(delta, kind='delta')
+
+        self.manifest['updated_at'] = datetime.now().isoformat()
+        _write_json(self.manifest_path, self.manifest)
+        _write_json(self.items_path, self.item_hashes)
+        return result
+
+    def upload(self, bucket) -> int:
+        """
+        把目录与存储桶对齐：补传 manifest 引用而桶里还没有的包，再覆盖 manifest，最后删除已不再引用的旧包
+
+        已上传的文件记录在 .uploaded.json，上次上传失败的文件下次运行会补传。
+
+        Returns:
+            本次上传的文件数
+        """
+        if not self.manifest:
+            return 0
+        prefix = f"{self.source}/{self.date}"
+        uploaded = _read_json(self.uploaded_path, {'files': [], 'manifest': ''})
+        wanted = [self.manifest['snapshot']['file']] + [d['file'] for d in self.manifest['deltas']]
+
+        count = 0
+        for name in wanted:
+            if name in uploaded['files']:
+                continue
+            with open(os.path.join(self.dir, name), 'rb') as f:
+                bucket.upload(f"{prefix}/{name}", f.read(), 'application/gzip', BUNDLE_CACHE_SECONDS)
+            uploaded['files'].append(name)
+            count += 1
+            _write_json(self.uploaded_path, uploaded)
+
+        with open(self.manifest_path, 'rb') as f:
+            manifest = f.read()
+        digest = hashlib.sha1(manifest).hexdigest()[:12]
+        if uploaded['manifest'] != digest:
+            bucket.upload(f"{prefix}/manifest.json", manifest, 'application/json', MANIFEST_CACHE_SECONDS)
+            uploaded['manifest'] = digest
+            count += 1
+
+        # manifest 已指向新快照，旧包再删除，避免客户端读到悬空引用
+        stale = [name for name in uploaded['files'] if name not in wanted]
+        if stale:
+            bucket.remove([f"{prefix}/{name}" for name in stale])
+            uploaded['files'] = [name for name in uploaded['files'] if name in wanted]
+        _write_json(self.uploaded_path, uploaded)
+        return count
+
+
+def publish_bundles(articles: List[Dict], root: str = DEFAULT_BUNDLE_DIR, date: Optional[str] = None,
+                    bucket=None):
+    """
+    供抓取脚本调用：按来源分组发布当天的内容包
+
+    Args:
+        articles: 本次运行产出的文章
+        root: 包根目录
+        date: 包日期（默认今天，YYYY-MM-DD）
+        bucket: storage.BucketClient；指定时把包上传到存储桶（None 时只写本地目录）
+    """
+    date = date or datetime.now().strftime('%Y-%m-%d')
+
+    by_source: Dict[str, List[Dict]] = {}
+    for article in articles:
+        if article.get('source_url'):
+            by_source.setdefault(article.get('source') or 'unknown', []).append(article)
+
+    from storage import StorageError
+
+    for source, items in by_source.items():
+        bundle = DailyBundle(root, source, date)
+        try:
+            result = bundle.publish(items)
+        except (IOError, OSError, ValueError) as e:
+            print(f"❌ 内容包发布失败 ({source}): {e}", file=sys.stderr)
+            continue
+
+        if result:
+            print(f"📦 内容包 {source}/{date}: {result['kind']} {result['file']} "
+                  f"({result['count']} 条, {result['bytes'] / 1024:.1f} KB)", file=sys.stderr)
+        else:
+            print(f"📦 内容包 {source}/{date}: 无变化", file=sys.stderr)
+
+        if bucket is not None:
+            try:
+                count = bundle.upload(bucket)
+            except (StorageError, IOError, OSError) as e:
+                print(f"❌ 内容包上传失败 ({source}): {e}（下次运行补传）", file=sys.stderr)
+                continue
+            if count:
+                print(f"☁️ 已上传 {count} 个文件: {bucket.public_url(f'{source}/{date}/manifest.json')}",
+                      file=sys.stderr)
+
+
+# ==================== 主函数 ====================
+
+def main():
+    """命令行：把抓取脚本 --output 生成的 JSON 发布为内容包"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='每日内容包发布')
+    parser.add_argument('files', nargs='+', help='JSON 文件路径')
+    parser.add_argument('--bundle-dir', default=DEFAULT_BUNDLE_DIR, help='内容包根目录')
+    parser.add_argument('--date', default=None, help='包日期（默认今天）')
+    parser.add_argument('--bucket', default='', help='同时上传到的 Supabase Storage 公开存储桶')
+    parser.add_argument('--supabase-url', default=os.environ.get('SUPABASE_URL'), help='Supabase URL')
+    parser.add_argument('--supabase-key', default=os.environ.get('SUPABASE_KEY'), help='Supabase Key')
+    args = parser.parse_args()
+
+    bucket = None
+    if args.bucket:
+        from storage import open_bucket
+        bucket = open_bucket(args.supabase_url, args.supabase_key, args.bucket)
+
+    for path in args.files:
+        with open(path, 'r', encoding='utf-8') as f:
+            publish_bundles(json.load(f), args.bundle_dir, args.date, bucket)
+
+
+if __name__ == '__main__':
+    main()
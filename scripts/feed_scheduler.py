@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+自适应订阅源轮询调度器
+记录每个订阅源的发布历史，估算更新频率，只轮询已到期的源
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+# ==================== 配置区 ====================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STATE_PATH = os.path.join(SCRIPT_DIR, '.cache', 'feed_schedule.json')
+
+HISTORY_SIZE = 50                          # 每个源保留的发布时间条数
+DEFAULT_FRESHNESS = timedelta(minutes=60)  # 新鲜度目标：高频源的最短轮询间隔
+DEFAULT_MAX_INTERVAL = timedelta(days=7)   # 低频源的最长轮询间隔
+UNKNOWN_INTERVAL = timedelta(hours=6)      # 历史不足时的默认间隔
+ITEMS_PER_POLL = 1.0                       # 期望每次轮询平均能拿到的新条目数
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _parse_time(value: str) -> Optional[datetime]:
+    """解析 ISO 时间，无时区的时间按 UTC 处理"""
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+# ==================== 核心功能 ====================
+
+def estimate_rate(published: List[datetime], now: Optional[datetime] = None) -> Optional[float]:
+    """
+    根据发布历史估算更新频率
+
+    观测窗口从最早一条一直延伸到当前时间，源停更后估计值会自然衰减。
+
+    Args:
+        published: 发布时间列表
+        now: 当前时间（默认取系统时间）
+
+    Returns:
+        每小时新增条目数；历史不足 2 条时返回 None
+    """
+    if len(published) < 2:
+        return None
+
+    now = now or _now()
+    span_hours = (now - min(published)).total_seconds() / 3600
+    if span_hours <= 0:
+        return None
+    return len(published) / span_hours
+
+
+class FeedScheduler:
+    """
+    按订阅源的更新频率计算下次轮询时间
+
+    轮询间隔 = 期望条目数 / 更新频率，并限制在 [freshness, max_interval] 之间：
+    高频源每 freshness 轮询一次，低频源最长 max_interval 轮询一次。
+    """
+
+    def __init__(self, state_path: str = DEFAULT_STATE_PATH,
+                 freshness: timedelta = DEFAULT_FRESHNESS,
+                 max_interval: timedelta = DEFAULT_MAX_INTERVAL):
+        self.state_path = state_path
+        self.freshness = freshness
+        self.max_interval = max(max_interval, freshness)
+        self.state: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            print(f"⚠️ 调度状态读取失败，重新开始记录: {e}", file=sys.stderr)
+            return {}
+
+    def save(self):
+        """持久化调度状态（先写临时文件再替换，避免中途中断写坏）"""
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def _history(self, feed_key: str) -> List[datetime]:
+        entry = self.state.get(feed_key, {})
+        parsed = (_parse_time(t) for t in entry.get('published', []))
+        return [t for t in parsed if t]
+
+    def next_interval(self, feed_key: str, now: Optional[datetime] = None) -> timedelta:
+        """计算订阅源的轮询间隔"""
+        rate = estimate_rate(self._history(feed_key), now)
+        if rate is None:
+            interval = UNKNOWN_INTERVAL
+        else:
+            interval = timedelta(hours=ITEMS_PER_POLL / rate)
+        return min(max(interval, self.freshness), self.max_interval)
+
+    def is_due(self, feed_key: str, now: Optional[datetime] = None) -> bool:
+        """从未轮询过或已到下次轮询时间的源视为到期"""
+        next_due = _parse_time(self.state.get(feed_key, {}).get('next_due', ''))
+        return next_due is None or (now or _now()) >= next_due
+
+    def due_feeds(self, feed_keys: Iterable[str], now: Optional[datetime] = None) -> List[str]:
+        """筛选出需要轮询的源"""
+        now = now or _now()
+        return [key for key in feed_keys if self.is_due(key, now)]
+
+    def record_poll(self, feed_key: str, published_at: Iterable[str], now: Optional[datetime] = None) -> datetime:
+        """
+        记录一次轮询结果并更新下次轮询时间
+
+        Args:
+            feed_key: 订阅源标识
+            published_at: 本次看到的条目发布时间（ISO 格式，可与历史重复）
+            now: 当前时间
+
+        Returns:
+            下次轮询时间
+        """
+        now = now or _now()
+        entry = self.state.setdefault(feed_key, {})
+
+        history = {t.isoformat() for t in self._history(feed_key)}
+        for value in published_at:
+            parsed = _parse_time(value)
+            if parsed and parsed <= now:
+                history.add(parsed.isoformat())
+        entry['published'] = sorted(history)[-HISTORY_SIZE:]
+
+        next_due = now + self.next_interval(feed_key, now)
+        entry['last_polled'] = now.isoformat()
+        entry['next_due'] = next_due.isoformat()
+        return next_due
+
+
+# ==================== 主函数 ====================
+
+def main():
+    """查看各订阅源的调度状态"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='订阅源轮询调度状态')
+    parser.add_argument('--state', default=DEFAULT_STATE_PATH, help='调度状态文件路径')
+    args = parser.parse_args()
+
+    scheduler = FeedScheduler(args.state)
+    if not scheduler.state:
+        print("暂无调度记录", file=sys.stderr)
+        return
+
+    now = _now()
+    for key, entry in sorted(scheduler.state.items()):
+        rate = estimate_rate(scheduler._history(key), now)
+        rate_text = f"{rate:.2f} 条/小时" if rate is not None else "未知"
+        status = '到期' if scheduler.is_due(key, now) else '等待'
+        print(f"{key:<20} {status}  频率: {rate_text:<14} 下次: {entry.get('next_due', '-')}")
+
+
+if __name__ == '__main__':
+    main()
@@ -10,21 +10,161 @@ import json
 import os
 import sys
 import argparse
-from datetime import datetime
-
-# Try to import supabase
-try:
-    from supabase import create_client, Client
-except ImportError:
-    create_client = None
+import math
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+from article_record import Article, ArticleLayout, to_dicts
+from change_detection import ChangeTracker
+from host_health import HOSTS
+from profiling import PROFILER
+from repo_ranking import rank_repos
+from run_deadline import open_deadline
+from storage import BACKENDS, StorageError, open_storage
 
 # Try to import AI summarizer
 try:
-    from ai_summarizer import generate_summary
+    from ai_summarizer import generate_summary, ROUTE_METRICS
 except ImportError:
-    generate_summary = None
+    generate_summary = ROUTE_METRICS = None
+
+GITHUB_API_BASE = os.environ.get('GITHUB_API_BASE', "https://api.github.com")   # mock_lab.py points this at a local server
+SEARCH_URL = f"{GITHUB_API_BASE}/search/repositories"
+SEARCH_PER_PAGE = 100
+SEARCH_RESULT_CAP = 1000   # the search API never returns more than this per query
+DEFAULT_CANDIDATES = 300
+
+# Repo statistics kept alongside each article, rendered into content on output
+# (topics, the README excerpt and the latest release only feed the AI summarizer)
+RepoStats = namedtuple('RepoStats', [
+    'stars', 'forks', 'language', 'open_issues', 'created_at', 'updated_at', 'owner_url',
+    'topics', 'readme', 'release',
+], defaults=((), '', ''))
+
+
+class RepoLayout(ArticleLayout):
+    """GitHub repo layout: content is rendered from the description, stats and AI summary"""
+
+    @staticmethod
+    def base_content(article: Article) -> str:
+        """Plain repo card, also used as the AI summarizer input"""
+        stats = article.meta
+        return f"""# {article.title}
+
+{article.body or 'No description provided.'}
+
+## Project Info
+- **Stars**: {stats.stars:,}
+- **Language**: {stats.language or 'N/A'}
+- **Forks**: {stats.forks:,}
+- **Open Issues**: {stats.open_issues}
+- **Created**: {stats.created_at[:10]}
+- **Last Updated**: {stats.updated_at[:10]}
+
+## Links
+[View Project]({article.source_url})
+
+## Author
+[{article.author}]({stats.owner_url})
+"""
+
+    @staticmethod
+    def content(article: Article) -> str:
+        if not article.ai_summary:
+            return RepoLayout.base_content(article)
+
+        # 用 AI 摘要替换原始 content，保留原始链接
+        stats = article.meta
+        return f"""# {article.title}
+
+{article.ai_summary}
+
+---
+
+## 📎 原始链接
+[查看 GitHub 项目]({article.source_url})
+
+## 📊 项目数据
+- ⭐ Stars: {stats.stars:,}
+- 🍴 Forks: {stats.forks:,}
+- 💻 Language: {stats.language or 'N/A'}
+- 👤 Author: [{article.author}]({stats.owner_url})
+"""
+
+    @staticmethod
+    def summary(article: Article) -> str:
+        return article.body[:300]
+
+    @staticmethod
+    def summary_input(article: Article) -> str:
+        # Stars/forks change daily but do not warrant a new summary; README edits do
+        stats = article.meta
+        return f"{article.title}\n{article.body}\n{stats.language or ''}\n{' '.join(stats.topics)}\n{stats.readme}"
+
+    @staticmethod
+    def ai_input(article: Article) -> str:
+        """Summarizer prompt: the repo card plus topics, latest release and a trimmed README excerpt"""
+        stats = article.meta
+        text = RepoLayout.base_content(article)
+        if stats.topics:
+            text += f"\n## Topics\n{', '.join(stats.topics)}\n"
+        release = getattr(stats, 'release', '')   # snapshots queued before this field existed lack it
+        if release:
+            text += f"\n## Latest Release\n{release}\n"
+        if stats.readme:
+            text += f"\n## README (excerpt)\n{stats.readme}\n"
+        return text
+
+
+def search_candidates(language: str, since: datetime, max_candidates: int) -> List[Dict]:
+    """
+    Collect up to max_candidates repos from the search API, paging through results
 
-def fetch_trending_repos(language='', limit=20, use_ai=False, api_key=None):
+    The search API returns at most 1000 results per query, so larger pools split
+    the creation window into slices and page through each one.
+    """
+    # Requests go through the shared HOSTS connection pool (kept warm across runs in daemon mode)
+    headers = {'Accept': 'application/vnd.github+json'}
+    token = os.environ.get('GITHUB_TOKEN')
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+
+    slices = max(1, math.ceil(max_candidates / SEARCH_RESULT_CAP))
+    span = (datetime.now() - since) / slices
+    per_slice = math.ceil(max_candidates / slices)
+
+    repos: Dict[int, Dict] = {}
+    for n in range(slices):
+        start = since + span * n
+        end = since + span * (n + 1)
+        query = f'created:{start.strftime("%Y-%m-%dT%H:%M:%S")}..{end.strftime("%Y-%m-%dT%H:%M:%S")} stars:>100'
+        if language:
+            query += f' language:{language}'
+
+        fetched = 0
+        for page in range(1, SEARCH_RESULT_CAP // SEARCH_PER_PAGE + 1):
+            wanted = min(SEARCH_PER_PAGE, per_slice - fetched)
+            if wanted <= 0:
+                break
+            params = {'q': query, 'sort': 'stars', 'order': 'desc', 'per_page': SEARCH_PER_PAGE, 'page': page}
+            response = HOSTS.get(SEARCH_URL, params=params, headers=headers, timeout=(5, 30))
+            if response.status_code in (403, 422, 429) and repos:
+                # Rate limited or past the result cap: rank what we already have
+                print(f"⚠️ Search stopped at page {page}: HTTP {response.status_code}", file=sys.stderr)
+                return list(repos.values())
+            response.raise_for_status()
+            items = response.json().get('items', [])
+            for item in items[:wanted]:
+                repos[item['id']] = item
+            fetched += min(len(items), wanted)
+            if len(items) < SEARCH_PER_PAGE:
+                break
+    return list(repos.values())
+
+
+def fetch_trending_repos(language='', limit=20, use_ai=False, api_key=None, tracker=None,
+                         candidates=DEFAULT_CANDIDATES, queue=None, deadline=None, graphql=False) -> Iterator[Article]:
     """
     Fetch GitHub Trending repositories - 智能筛选前沿项目
 
@@ -38,240 +178,144 @@ def fetch_trending_repos(language='', limit=20, use_ai=False, api_key=None):
         limit: Number of results
         use_ai: Whether to generate AI summaries
         api_key: SiliconFlow API key for AI summaries
+        tracker: Optional ChangeTracker; stored summaries are reused when the repo is unchanged
+        candidates: Size of the candidate pool ranked before picking the top `limit`
+        queue: Optional SummaryQueue; summaries are enqueued instead of generated inline
+        deadline: Optional RunDeadline; high-priority repos are summarized first and summaries
+            that do not fit in the time budget are deferred to the next run
+        graphql: Fetch details (fresh stats, topics, latest release, README) for the picked repos
+            in batched GraphQL queries instead of one README request per repo
+
+    Yields:
+        Article records, one at a time (AI summaries are generated lazily)
     """
-    from datetime import timedelta
-    import re
-
-    # ==================== 筛选配置 ====================
-
-    # 黑名单：过滤收集类/教程类/资源类项目
-    EXCLUDE_PATTERNS = [
-        # 收集类
-        r'^awesome[-_]', r'[-_]awesome$', r'[-_]list$', r'^list[-_]',
-        r'resources', r'curated', r'collection',
-        # 教程/学习类
-        r'interview', r'learning', r'^learn[-_]', r'[-_]learn$',
-        r'tutorial', r'course', r'guide', r'handbook',
-        r'roadmap', r'cheatsheet', r'notes',
-        # 纯素材类
-        r'^icons?$', r'^fonts?$', r'wallpaper', r'design[-_]resources',
-        # 其他低价值
-        r'free[-_]programming', r'coding[-_]interview',
-        r'system[-_]design', r'algorithm', r'leetcode',
-    ]
-
-    # 优先关键词：AI/工具/App 相关（权重 +100）
-    PRIORITY_KEYWORDS = [
-        # AI/LLM 前沿
-        'ai', 'llm', 'gpt', 'claude', 'agent', 'mcp',
-        'anthropic', 'openai', 'gemini', 'ollama', 'langchain',
-        'rag', 'embedding', 'vector', 'chatbot',
-        # 开发工具
-        'cursor', 'copilot', 'vscode', 'neovim', 'vim',
-        'terminal', 'cli', 'sdk', 'api', 'devtools',
-        # 实用 App/客户端
-        'app', 'desktop', 'client', 'gui', 'native',
-        'macos', 'windows', 'linux', 'cross-platform',
-        'tauri', 'electron', 'flutter',
-        # 效率工具
-        'productivity', 'automation', 'workflow', 'utility',
-        'tool', 'assistant', 'helper', 'manager',
-        # 新兴技术
-        'rust', 'zig', 'bun', 'deno', 'wasm', 'webassembly',
-    ]
-
-    # ==================== 辅助函数 ====================
-
-    def should_exclude(repo_name: str, description: str) -> bool:
-        """检查项目是否应该被过滤"""
-        text = f"{repo_name} {description}".lower()
-        for pattern in EXCLUDE_PATTERNS:
-            if re.search(pattern, text):
-                return True
-        return False
-
-    def calculate_priority(repo: dict) -> int:
-        """计算项目优先级分数"""
-        name = repo.get('name', '').lower()
-        desc = (repo.get('description') or '').lower()
-        text = f"{name} {desc}"
-
-        score = 0
-        for keyword in PRIORITY_KEYWORDS:
-            if keyword in text:
-                score += 100
-
-        # 新项目加分（创建时间越近分数越高）
-        try:
-            created = datetime.fromisoformat(repo['created_at'].replace('Z', '+00:00'))
-            days_ago = (datetime.now(created.tzinfo) - created).days
-            if days_ago <= 7:
-                score += 50  # 一周内创建
-            elif days_ago <= 14:
-                score += 30  # 两周内创建
-        except:
-            pass
-
-        return score
-
     # ==================== 抓取逻辑 ====================
 
-    url = "https://api.github.com/search/repositories"
-
     # 查询：最近 30 天创建的项目，至少 100 Stars
-    thirty_days_ago = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    query = f'created:>{thirty_days_ago} stars:>100'
+    since = datetime.now() - timedelta(days=30)
+    query = f'created:>{since.strftime("%Y-%m-%d")} stars:>100'
     if language:
         query += f' language:{language}'
 
-    params = {
-        'q': query,
-        'sort': 'stars',
-        'order': 'desc',
-        'per_page': min(limit * 3, 100)  # 多抓一些用于过滤
-    }
-
     try:
         print(f"🔍 查询条件: {query}", file=sys.stderr)
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        repos = response.json().get('items', [])
+        with PROFILER.stage('search'):
+            repos = search_candidates(language, since, max(candidates, limit))
 
         print(f"📦 获取到 {len(repos)} 个原始项目", file=sys.stderr)
 
-        # Step 1: 过滤黑名单项目
-        filtered_repos = []
-        excluded_count = 0
-        for repo in repos:
-            name = repo.get('name', '')
-            desc = repo.get('description') or ''
-            if should_exclude(name, desc):
-                excluded_count += 1
-                print(f"  ❌ 过滤: {name}", file=sys.stderr)
-            else:
-                filtered_repos.append(repo)
-
-        print(f"🧹 过滤掉 {excluded_count} 个收集类/教程类项目", file=sys.stderr)
-
-        # Step 2: 按优先级排序
-        for repo in filtered_repos:
-            repo['_priority'] = calculate_priority(repo)
-
-        filtered_repos.sort(key=lambda x: (x['_priority'], x['stargazers_count']), reverse=True)
-
-        # Step 3: 取前 limit 个
-        final_repos = filtered_repos[:limit]
+        # 向量化打分（黑名单过滤、关键词、新近度、Star 增速、语言），部分选择取前 limit 个
+        with PROFILER.stage('rank'):
+            final_repos = rank_repos(repos, limit)
 
         print(f"✅ 最终选取 {len(final_repos)} 个优质项目", file=sys.stderr)
 
-        articles = []
-        for i, repo in enumerate(final_repos):
-            # Build article content
-            content = f"""# {repo['name']}
-
-{repo['description'] or 'No description provided.'}
-
-## Project Info
-- **Stars**: {repo['stargazers_count']:,}
-- **Language**: {repo['language'] or 'N/A'}
-- **Forks**: {repo['forks_count']:,}
-- **Open Issues**: {repo['open_issues_count']}
-- **Created**: {repo['created_at'][:10]}
-- **Last Updated**: {repo['updated_at'][:10]}
-
-## Links
-[View Project]({repo['html_url']})
-
-## Author
-[{repo['owner']['login']}]({repo['owner']['html_url']})
-"""
-
-            article = {
-                'title': repo['name'],
-                'summary': (repo['description'] or '')[:300],
-                'content': content,
-                'source': 'github_trending',
-                'source_url': repo['html_url'],
-                'author': repo['owner']['login'],
-                'published_at': repo['created_at'],
-                'fetched_at': datetime.now().isoformat(),
-                'tags': [repo['language']] if repo['language'] else [],
-                'is_favorited': False,
-                'ai_summary': None  # Will be filled if use_ai is True
-            }
-
-            # Generate AI summary if enabled
-            if use_ai and generate_summary:
-                print(f"[{i+1}/{len(repos)}] 🤖 生成 AI 摘要: {repo['name'][:30]}...", file=sys.stderr)
-                ai_summary = generate_summary(
-                    content=content,
-                    content_type='github',
-                    api_key=api_key
-                )
-                if ai_summary:
-                    article['ai_summary'] = ai_summary
-                    # 用 AI 摘要替换原始 content，保留原始链接
-                    article['content'] = f"""# {repo['name']}
-
-{ai_summary}
-
----
-
-## 📎 原始链接
-[查看 GitHub 项目]({repo['html_url']})
-
-## 📊 项目数据
-- ⭐ Stars: {repo['stargazers_count']:,}
-- 🍴 Forks: {repo['forks_count']:,}
-- 💻 Language: {repo['language'] or 'N/A'}
-- 👤 Author: [{repo['owner']['login']}]({repo['owner']['html_url']})
-"""
-                # 礼貌延迟避免 API 限流
-                import time
-                import random
-                if i < len(repos) - 1:
-                    time.sleep(random.uniform(1, 2))
-
-            articles.append(article)
-
-        return articles
+        if tracker and (use_ai or queue):
+            try:
+                tracker.prefetch(repo['html_url'] for repo in final_repos)
+            except Exception as e:
+                print(f"⚠️ Failed to look up stored repos: {e}", file=sys.stderr)
+
+        # README excerpts give the summarizer something concrete to work with
+        readmes, details = {}, {}
+        if graphql:
+            from repo_graphql import fetch_repo_details
+            with PROFILER.stage('details'):
+                details = fetch_repo_details(final_repos)
+            readmes = {url: detail['readme'] for url, detail in details.items()}
+        elif (use_ai and generate_summary) or queue:
+            from repo_enrichment import enrich_repos
+            with PROFILER.stage('readme'):
+                readmes = enrich_repos(final_repos)
 
     except requests.exceptions.RequestException as e:
         print(f"Error: Failed to fetch data - {e}", file=sys.stderr)
-        return []
+        return
 
-def save_to_supabase(articles, url, key):
+    fetched_at = datetime.now().isoformat()
+    articles = []
+    for repo in final_repos:
+        # Freshly queried GraphQL details are newer than the search snapshot; cache hits and
+        # README-only fallbacks carry no stats, so the live search counts stay
+        repo = {**repo, **details.get(repo['html_url'], {})}
+        # Only priority keyword hits in the name/description count; the language bonus alone does not
+        priority = 'high' if repo.get('_keywords', 0) else 'low'
+        articles.append(Article(
+            RepoLayout,
+            title=repo['name'],
+            body=repo['description'] or '',
+            source='github_trending',
+            source_url=repo['html_url'],
+            author=repo['owner']['login'],
+            published_at=repo['created_at'],
+            fetched_at=fetched_at,
+            priority=priority,
+            tags=[repo['language']] if repo['language'] else [],
+            meta=RepoStats(
+                stars=repo['stargazers_count'],
+                forks=repo['forks_count'],
+                language=repo['language'],
+                open_issues=repo['open_issues_count'],
+                created_at=repo['created_at'],
+                updated_at=repo['updated_at'],
+                owner_url=repo['owner']['html_url'],
+                topics=tuple(repo.get('topics') or ()),
+                readme=readmes.get(repo['html_url'], ''),
+                release=repo.get('release', ''),
+            ),
+        ))
+
+    # Under a deadline, summaries are generated in priority order (deferred repos from the last run first)
+    if deadline:
+        articles = deadline.prioritize('ai', articles)
+
+    for i, article in enumerate(articles):
+        # Generate AI summary if enabled (skipped when the stored summary is still valid)
+        if (use_ai or queue) and tracker and tracker.reuse_summary(article):
+            print(f"[{i+1}/{len(articles)}] ♻️ 复用已有 AI 摘要: {article.title[:30]}", file=sys.stderr)
+        elif queue is not None:
+            # Stored right away; summary_queue.py backfills ai_summary and the rendered content
+            if queue.enqueue('articles', article, 'github', RepoLayout.ai_input(article), article.priority,
+                             route_chars=len(article.body)):
+                print(f"[{i+1}/{len(articles)}] 📥 AI 摘要任务入队: {article.title[:30]}", file=sys.stderr)
+        elif use_ai and generate_summary and deadline and not deadline.admit('ai', article):
+            print(f"[{i+1}/{len(articles)}] ⏳ 时间预算不足，AI 摘要推迟到下次运行: {article.title[:30]}", file=sys.stderr)
+        elif use_ai and generate_summary:
+            print(f"[{i+1}/{len(articles)}] 🤖 生成 AI 摘要: {article.title[:30]}...", file=sys.stderr)
+            ai_summary = generate_summary(
+                content=RepoLayout.ai_input(article),
+                content_type='github',
+                api_key=api_key,
+                priority=article.priority,
+                # Route on the description: every repo carries a long README excerpt
+                route_chars=len(article.body)
+            )
+            if ai_summary:
+                article.ai_summary = ai_summary
+            # 礼貌延迟避免 API 限流
+            import time
+            import random
+            if i < len(articles) - 1:
+                time.sleep(random.uniform(1, 2))
+
+        yield article
+
+    if use_ai and ROUTE_METRICS:
+        ROUTE_METRICS.report()
+
+def save_to_supabase(articles, url, key, tracker=None):
     """
     Upload articles to Supabase
-    """
-    if not create_client:
-        print("Error: 'supabase' package not installed. Run: pip install supabase", file=sys.stderr)
-        return
 
+    New rows are inserted in batches; existing rows only get their changed columns updated.
+    """
     print(f"Connecting to Supabase...", file=sys.stderr)
     try:
-        supabase: Client = create_client(url, key)
-
-        count = 0
-        for article in articles:
-            try:
-                # Check for duplicates based on source_url
-                # Note: This requires the key to have SELECT permissions
-                existing = supabase.table('articles').select('id').eq('source_url', article['source_url']).execute()
-
-                if existing.data:
-                    print(f"Skipping existing: {article['title'][:20]}...", file=sys.stderr)
-                else:
-                    # Insert new article
-                    # Note: This requires the key to have INSERT permissions (Service Role Key recommended)
-                    supabase.table('articles').insert(article).execute()
-                    print(f"Uploaded: {article['title'][:20]}...", file=sys.stderr)
-                    count += 1
-
-            except Exception as e:
-                print(f"Error uploading {article['title'][:20]}: {e}", file=sys.stderr)
-
-        print(f"Upload complete. New articles: {count}", file=sys.stderr)
+        # Note: This requires the key to have SELECT/INSERT/UPDATE permissions (Service Role Key recommended)
+        tracker = tracker or ChangeTracker(open_storage('supabase', url, key), 'articles')
+        stats = tracker.sync(articles)
+        print(f"Upload complete. New: {stats['inserted']}, updated: {stats['updated']}, "
+              f"unchanged: {stats['unchanged']}, failed: {stats['failed']}", file=sys.stderr)
 
     except Exception as e:
         print(f"Supabase connection error: {e}", file=sys.stderr)
@@ -281,20 +325,51 @@ def main():
     parser = argparse.ArgumentParser(description='Fetch GitHub Trending Data')
     parser.add_argument('--language', default='', help='Programming language filter')
     parser.add_argument('--limit', type=int, default=20, help='Number of results')
+    parser.add_argument('--candidates', type=int, default=DEFAULT_CANDIDATES,
+                        help='Candidate pool size ranked before picking the top results (multi-page search)')
     parser.add_argument('--output', default='', help='Output file path')
     parser.add_argument('--upload', action='store_true', help='Upload to Supabase')
+    parser.add_argument('--storage', choices=BACKENDS, default='supabase',
+                        help='Upload backend: supabase, sqlite (local file) or rest (PostgREST / local stand-in)')
+    parser.add_argument('--storage-path', default='', help='SQLite file for --storage sqlite (default: scripts/.cache/storage.db)')
     parser.add_argument('--ai', action='store_true', help='Generate AI summaries using SiliconFlow')
     parser.add_argument('--ai-key', default='', help='SiliconFlow API Key (or use SILICONFLOW_API_KEY env)')
-
-    # Args for Supabase credentials (optional, can use env vars)
-    # Defaulting to provided credentials for ease of use
-    default_url = "https://ovytvktzhuapvictznnr.supabase.co"
-    default_key = "sb_secret_3DFQXsH8RqIldbdJAVrC5Q_A_xtu9uh"
-
-    parser.add_argument('--supabase-url', default=default_url, help='Supabase Project URL')
-    parser.add_argument('--supabase-key', default=default_key, help='Supabase API Key')
+    parser.add_argument('--ai-queue', action='store_true',
+                        help='Enqueue AI summaries instead of calling the LLM inline (needs --upload; drained by summary_queue.py)')
+    parser.add_argument('--queue-path', default='', help='Summary queue file (default: scripts/.cache/summary_queue.db)')
+    parser.add_argument('--index', action='store_true', help='Write articles into the local full-text search index')
+    parser.add_argument('--index-path', default='', help='Search index path (default: scripts/.cache/search_index.db)')
+    parser.add_argument('--bundle', action='store_true', help='Publish compressed daily feed bundles')
+    parser.add_argument('--bundle-dir', default='', help='Bundle directory (default: scripts/.cache/bundles)')
+    parser.add_argument('--bundle-bucket', default='',
+                        help='Also upload bundles to this public Supabase Storage bucket (create it first); the app downloads from there')
+    parser.add_argument('--recommend', action='store_true',
+                        help='Embed articles into the local vector index and set recommend_score from similarity '
+                             'to favorites (run add_recommend_score_column.sql first)')
+    parser.add_argument('--embedding-path', default='', help='Vector index file (default: scripts/.cache/embeddings.npz)')
+    parser.add_argument('--reader-payload', action='store_true',
+                        help='Precompute the reader payload (TOC, block offsets, word count, reading time) '
+                             'at ingest (run add_reader_payload_column.sql first)')
+    parser.add_argument('--journal', action='store_true',
+                        help='Append produced articles to the local journal for offline replay/re-upload (article_journal.py)')
+    parser.add_argument('--journal-dir', default='', help='Journal directory (default: scripts/.cache/journal)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile the run: per-stage CPU/memory report and collapsed stacks (scripts/.cache/profiles)')
+    parser.add_argument('--deadline', type=float, default=0,
+                        help='Time budget in seconds: work in priority order and defer what does not fit '
+                             'to the next run (kept in scripts/.cache/deferred)')
+    parser.add_argument('--graphql', action='store_true',
+                        help='Fetch details of the picked repos (topics, latest release, README) in batched '
+                             'GraphQL queries; needs GITHUB_TOKEN')
+
+    # Supabase credentials come from the environment unless given explicitly
+    parser.add_argument('--supabase-url', default=os.environ.get('SUPABASE_URL'), help='Supabase Project URL')
+    parser.add_argument('--supabase-key', default=os.environ.get('SUPABASE_KEY'), help='Supabase API Key')
 
     args = parser.parse_args()
+    if args.profile:
+        PROFILER.start('fetch_github_trending')
+    deadline = open_deadline(args.deadline, 'fetch_github_trending')
 
     # Check AI requirements
     if args.ai:
@@ -314,38 +389,101 @@ def main():
     # Get AI key
     ai_key = args.ai_key or os.environ.get('SILICONFLOW_API_KEY') if args.ai else None
 
-    articles = fetch_trending_repos(
+    # Uploads compare against stored rows, so unchanged repos reuse their AI summary
+    url = args.supabase_url or os.environ.get('SUPABASE_URL')
+    key = args.supabase_key or os.environ.get('SUPABASE_KEY') # Prefer SERVICE_ROLE_KEY for writing
+    tracker = None
+    if args.upload:
+        try:
+            tracker = ChangeTracker(open_storage(args.storage, url, key, args.storage_path), 'articles')
+        except StorageError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            print("Provide via arguments --supabase-url/--supabase-key or environment variables.", file=sys.stderr)
+
+    # Summary queue: repos are stored right away, a separate worker fills in AI summaries
+    queue = None
+    if args.ai_queue:
+        if tracker:
+            from summary_queue import SummaryQueue, DEFAULT_QUEUE_PATH
+            queue = SummaryQueue(args.queue_path or DEFAULT_QUEUE_PATH)
+        else:
+            print("⚠️ --ai-queue requires --upload, ignoring", file=sys.stderr)
+
+    articles = PROFILER.wrap('fetch', fetch_trending_repos(
         language=args.language,
         limit=args.limit,
         use_ai=args.ai,
-        api_key=ai_key
-    )
-
-    print(f"Successfully fetched {len(articles)} articles", file=sys.stderr)
+        api_key=ai_key,
+        tracker=tracker,
+        candidates=args.candidates,
+        queue=queue,
+        deadline=deadline,
+        graphql=args.graphql
+    ))
+
+    # Feed order is precomputed at ingest: recommend_score = similarity to the user's favorites
+    if args.recommend:
+        from embedding_index import recommend_articles, DEFAULT_EMBEDDING_PATH
+        articles = PROFILER.wrap('recommend', recommend_articles(
+            articles, 'articles', tracker.client if tracker else None, args.embedding_path or DEFAULT_EMBEDDING_PATH))
+
+    # Reader payload: the reader renders the first screen from precomputed blocks instead of parsing everything
+    # (the upload recomputes it when restoring a stored AI summary changes the rendered content)
+    if args.reader_payload:
+        from reader_payload import attach_payloads
+        articles = PROFILER.wrap('payload', attach_payloads(articles))
+
+    # Upload-only runs stream records straight through; other outputs need the full list
+    if not args.upload or args.output or args.index or args.bundle:
+        articles = list(articles)
+        print(f"Successfully fetched {len(articles)} articles", file=sys.stderr)
+
+    # Local search index
+    if args.index:
+        from search_index import index_articles, DEFAULT_INDEX_PATH
+        with PROFILER.stage('index'):
+            index_articles(articles, args.index_path or DEFAULT_INDEX_PATH)
+
+    # Daily feed bundles
+    if args.bundle:
+        from feed_bundles import publish_bundles, DEFAULT_BUNDLE_DIR
+        bucket = None
+        if args.bundle_bucket:
+            from storage import open_bucket
+            try:
+                bucket = open_bucket(url, key, args.bundle_bucket)
+            except StorageError as e:
+                print(f"❌ Bundles stay local only: {e}", file=sys.stderr)
+        with PROFILER.stage('bundle'):
+            publish_bundles(articles, args.bundle_dir or DEFAULT_BUNDLE_DIR, bucket=bucket)
+
+    # Local journal: replay re-uploads and migrations from disk instead of re-fetching and re-summarizing
+    if args.journal:
+        from article_journal import journal_articles, DEFAULT_JOURNAL_DIR
+        journaled = PROFILER.wrap('journal', journal_articles(articles, 'articles', args.journal_dir or DEFAULT_JOURNAL_DIR))
+        articles = list(journaled) if isinstance(articles, list) else journaled
 
     # Handle Output
     if args.output:
         try:
-            output_data = json.dumps(articles, indent=2, ensure_ascii=False)
+            with PROFILER.stage('output'):
+                output_data = json.dumps(to_dicts(articles), indent=2, ensure_ascii=False)
             with open(args.output, 'w', encoding='utf-8') as f:
                 f.write(output_data)
             print(f"Saved to: {args.output}", file=sys.stderr)
         except IOError as e:
              print(f"Error saving file: {e}", file=sys.stderr)
     elif not args.upload:
-        print(json.dumps(articles, indent=2, ensure_ascii=False))
+        with PROFILER.stage('output'):
+            print(json.dumps(to_dicts(articles), indent=2, ensure_ascii=False))
 
     # Handle Upload
-    if args.upload:
-        # Prioritize args, then env vars
-        url = args.supabase_url or os.environ.get('SUPABASE_URL')
-        key = args.supabase_key or os.environ.get('SUPABASE_KEY') # Prefer SERVICE_ROLE_KEY for writing
+    if args.upload and tracker:
+        with PROFILER.stage('upload'):
+            save_to_supabase(articles, url, key, tracker)
 
-        if url and key:
-            save_to_supabase(articles, url, key)
-        else:
-            print("Error: Supabase URL and Key required for upload.", file=sys.stderr)
-            print("Provide via arguments --supabase-url/--supabase-key or environment variables.", file=sys.stderr)
+    if deadline:
+        deadline.save()
 
 if __name__ == '__main__':
     main()
@@ -14,19 +14,19 @@ import argparse
 import time
 import re
 from datetime import datetime
-from typing import List, Dict, Optional
-import opencc
+from typing import Dict, Iterable, Iterator, Optional
 import html2text
 from bs4 import BeautifulSoup
-
-# Try to import supabase
-try:
-    from supabase import create_client, Client
-except ImportError:
-    create_client = None
+from article_record import Article, ArticleLayout, to_dicts
+from change_detection import ChangeTracker
+from host_health import HOSTS
+from profiling import PROFILER
+from run_deadline import open_deadline
+from storage import BACKENDS, StorageError, open_storage
+from zh_convert import SimplifiedConverter
 
 # 初始化转换器
-cc = opencc.OpenCC('t2s')  # 繁体转简体
+cc = SimplifiedConverter('t2s')  # 繁体转简体（已是简体/英文的文本跳过 OpenCC）
 
 # ==================== 配置区 ====================
 
@@ -48,6 +48,12 @@ NEWS_SOURCES = {
     },
 }
 
+# 压测时把订阅源指向本地模拟服务（mock_lab.py）：{NEWS_FEED_BASE}/<key>.xml
+NEWS_FEED_BASE = os.environ.get('NEWS_FEED_BASE', '')
+if NEWS_FEED_BASE:
+    for _key, _config in NEWS_SOURCES.items():
+        _config['url'] = f"{NEWS_FEED_BASE.rstrip('/')}/{_key}.xml"
+
 # 优先级关键词
 HIGH_PRIORITY_KEYWORDS = [
     '政治', '经济', '政策', 'GDP', '贸易', '选举',
@@ -87,15 +93,40 @@ def calculate_priority(title: str, category: str) -> str:
 
     return 'high' if base_score > 0 else 'low'
 
-def fetch_rss_news(source_key: str, limit: int = 10) -> List[Dict]:
-    """抓取 RSS 新闻源"""
+class NewsLayout(ArticleLayout):
+    """新闻正文布局：content 由清洗后的正文拼出，summary 取正文前 200 字"""
+
+    fields = (
+        'title', 'summary', 'content', 'source', 'source_url', 'author',
+        'category', 'priority', 'published_at', 'fetched_at', 'tags', 'ai_summary',
+    )
+    optional = ('ai_summary',)
+
+    @staticmethod
+    def content(article: Article) -> str:
+        return (f"# {article.title}\n\n> 来源: {article.author} | {article.published_at[:10]}\n\n"
+                f"{article.body}\n\n[查看原文]({article.source_url})")
+
+    @staticmethod
+    def summary(article: Article) -> str:
+        return article.body[:200] + '...'
+
+def fetch_rss_news(source_key: str, limit: int = 10) -> Iterator[Article]:
+    """抓取 RSS 新闻源（逐条产出；下载或解析失败时打印后重新抛出，由调用方决定是否记录本次轮询）"""
     config = NEWS_SOURCES[source_key]
     print(f"📡 正在抓取 RSS: {config['name']}...", file=sys.stderr)
 
+    count = 0
     try:
-        # 添加 User-Agent
-        feed = feedparser.parse(config['url'], agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-        articles = []
+        # 经熔断器下载（带超时；站点已熔断时直接跳过），再交给 feedparser 解析
+        with PROFILER.stage('download'):
+            response = HOSTS.get(config['url'], headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'})
+            response.raise_for_status()
+        with PROFILER.stage('parse'):
+            feed = feedparser.parse(response.content)
+        if feed.bozo and not feed.entries:
+            raise feed.bozo_exception
+        fetched_at = datetime.now().isoformat()
 
         for entry in feed.entries[:limit]:
             content = ""
@@ -104,96 +135,107 @@ def fetch_rss_news(source_key: str, limit: int = 10) -> List[Dict]:
             elif 'summary' in entry:
                 content = entry.summary
 
-            clean_content = clean_html(content)
-            if not clean_content:
-                clean_content = entry.title
+            with PROFILER.stage('parse'):
+                clean_content = clean_html(content)
+                if not clean_content:
+                    clean_content = entry.title
 
-            # 繁简转换 (对英文内容无影响)
-            title = convert_to_simplified(entry.title)
-            clean_content = convert_to_simplified(clean_content)
+                # 繁简转换 (对英文内容无影响)
+                title = convert_to_simplified(entry.title)
+                clean_content = convert_to_simplified(clean_content)
 
             # 计算优先级
             priority = calculate_priority(title, config['category'])
 
-            published_at = datetime.now().isoformat()
+            published_at = fetched_at
             if hasattr(entry, 'published_parsed') and entry.published_parsed:
                 published_at = datetime(*entry.published_parsed[:6]).isoformat()
 
-            articles.append({
-                'title': title,
-                'summary': clean_content[:200] + '...',
-                'content': f"# {title}\n\n> 来源: {config['name']} | {published_at[:10]}\n\n{clean_content}\n\n[查看原文]({entry.link})",
-                'source': config['source_id'],
-                'source_url': entry.link,
-                'author': config['name'],
-                'category': config['category'],
-                'priority': priority,
-                'published_at': published_at,
-                'fetched_at': datetime.now().isoformat(),
-                'tags': [config['name'], config['category']],
-            })
-
-        print(f"✅ {config['name']}: 获取 {len(articles)} 条", file=sys.stderr)
-        return articles
+            count += 1
+            yield Article(
+                NewsLayout,
+                title=title,
+                body=clean_content,
+                source=config['source_id'],
+                source_url=entry.link,
+                author=config['name'],
+                category=config['category'],
+                priority=priority,
+                published_at=published_at,
+                fetched_at=fetched_at,
+                tags=(config['name'], config['category']),
+            )
+
+        print(f"✅ {config['name']}: 获取 {count} 条", file=sys.stderr)
     except Exception as e:
         print(f"❌ {config['name']} 抓取失败: {e}", file=sys.stderr)
-        return []
-
-def process_with_ai(articles: List[Dict], api_key: str):
-    """使用 AI 生成摘要"""
+        raise
+
+def attach_full_text(articles: Iterable[Article], cache_path: str, workers: int) -> Iterator[Article]:
+    """用原文页提取的正文替换订阅源自带的导语（逐条产出；繁简转换与订阅源正文一致）"""
+    from article_extractor import fetch_full_text
+    for article, text in fetch_full_text(articles, cache_path, workers):
+        if text:
+            article.body = convert_to_simplified(text)
+        yield article
+
+def process_with_ai(articles: Iterable[Article], api_key: str,
+                    tracker: Optional[ChangeTracker] = None, queue=None, deadline=None) -> Iterator[Article]:
+    """
+    使用 AI 生成摘要（逐条处理并产出；正文未变的已存新闻直接复用摘要）
+
+    提供 queue（SummaryQueue）时不在抓取中调用 LLM，只把任务写入队列，由 summary_queue.py 回填。
+    提供 deadline（RunDeadline）时按优先级处理，时间不够的摘要推迟到下次运行，新闻本身照常产出。
+    """
     try:
-        from ai_summarizer import generate_summary
-
-        print(f"\n🤖 开始 AI 摘要生成 (共 {len(articles)} 条)...", file=sys.stderr)
-
-        count = 0
-        for i, article in enumerate(articles):
-            if len(article['content']) < 100: continue
-            if count > 0: time.sleep(1.5)
-
-            # 不再强制翻译，统一使用 news 类型生成摘要
-            print(f"[{i+1}/{len(articles)}] 生成摘要: {article['title'][:20]}...", file=sys.stderr)
-
-            ai_summary = generate_summary(article['content'], 'news', api_key)
-
-            if ai_summary:
-                article['ai_summary'] = ai_summary
-                count += 1
-            else:
-                print(f"  ⚠️ 生成失败", file=sys.stderr)
-
+        from ai_summarizer import generate_summary, ROUTE_METRICS
     except ImportError:
         print("❌ 未找到 ai_summarizer 模块，跳过 AI 摘要", file=sys.stderr)
-    except Exception as e:
-        print(f"❌ AI 处理出错: {e}", file=sys.stderr)
-
-def save_to_supabase(articles: List[Dict], url: str, key: str):
-    """上传数据到 Supabase"""
-    if not create_client:
-        print("❌ 未安装 supabase 库", file=sys.stderr)
+        yield from articles
         return
 
+    print(f"\n🤖 开始 AI 摘要{'排队' if queue else '生成'}...", file=sys.stderr)
+    if deadline:
+        articles = deadline.prioritize('ai', articles)
+
+    count = 0
+    for i, article in enumerate(articles, 1):
+        try:
+            if tracker and tracker.reuse_summary(article):
+                print(f"[{i}] ♻️ 复用已有摘要: {article['title'][:20]}", file=sys.stderr)
+            elif queue is not None and len(article['content']) >= 100:
+                if queue.enqueue('news', article, 'news', article['content']):
+                    print(f"[{i}] 📥 摘要任务入队: {article['title'][:20]}", file=sys.stderr)
+            elif deadline and len(article['content']) >= 100 and not deadline.admit('ai', article):
+                print(f"[{i}] ⏳ 时间预算不足，摘要推迟到下次运行: {article['title'][:20]}", file=sys.stderr)
+            elif len(article['content']) >= 100:
+                if count > 0: time.sleep(1.5)
+
+                # 不再强制翻译，统一使用 news 类型生成摘要
+                print(f"[{i}] 生成摘要: {article['title'][:20]}...", file=sys.stderr)
+
+                ai_summary = generate_summary(article['content'], 'news', api_key, priority=article['priority'])
+
+                if ai_summary:
+                    article['ai_summary'] = ai_summary
+                    count += 1
+                else:
+                    print(f"  ⚠️ 生成失败", file=sys.stderr)
+        except Exception as e:
+            print(f"❌ AI 处理出错: {e}", file=sys.stderr)
+
+        yield article
+
+    ROUTE_METRICS.report()
+
+def save_to_supabase(articles: Iterable[Dict], url: str, key: str, tracker: Optional[ChangeTracker] = None):
+    """上传数据到 Supabase（新记录批量插入，已存在的记录只更新变化的列）"""
     print(f"\n💾 连接 Supabase...", file=sys.stderr)
     try:
-        supabase: Client = create_client(url, key)
-        success = 0
-        skipped = 0
-
-        for article in articles:
-            try:
-                # 检查重复
-                existing = supabase.table('news').select('id').eq('source_url', article['source_url']).execute()
-                if existing.data:
-                    skipped += 1
-                    continue
-
-                supabase.table('news').insert(article).execute()
-                success += 1
-                print(f"  ✅ 上传: {article['title'][:20]}... [{article['priority']}]", file=sys.stderr)
-            except Exception as e:
-                print(f"  ❌ 上传失败: {e}", file=sys.stderr)
-
-        print(f"📊 完成: 新增 {success}, 跳过 {skipped}", file=sys.stderr)
+        tracker = tracker or ChangeTracker(open_storage('supabase', url, key), 'news')
+        stats = tracker.sync(articles)
+        print(f"📊 完成: 新增 {stats['inserted']}, 更新 {stats['updated']}, "
+              f"未变 {stats['unchanged']}, 失败 {stats['failed']}", file=sys.stderr)
 
     except Exception as e:
         print(f"❌ Supabase 连接失败: {e}", file=sys.stderr)
@@ -201,35 +243,192 @@ def save_to_supabase(articles: List[Dict], url: str, key: str):
 def main():
     parser = argparse.ArgumentParser(description='多源新闻聚合爬虫')
     parser.add_argument('--upload', action='store_true', help='上传到 Supabase')
+    parser.add_argument('--storage', choices=BACKENDS, default='supabase',
+                        help='上传后端：supabase、sqlite（本地文件）或 rest（PostgREST / 本地替身服务）')
+    parser.add_argument('--storage-path', default='', help='--storage sqlite 的数据库路径（默认 scripts/.cache/storage.db）')
     parser.add_argument('--ai', action='store_true', help='启用 AI 摘要')
+    parser.add_argument('--ai-queue', action='store_true',
+                        help='AI 摘要改为写入任务队列，抓取时不调用 LLM（需配合 --upload，由 summary_queue.py 回填）')
+    parser.add_argument('--queue-path', default='', help='摘要队列文件路径（默认 scripts/.cache/summary_queue.db）')
     parser.add_argument('--limit', type=int, default=10, help='每个源的限制数量')
     parser.add_argument('--supabase-url', default=os.environ.get('SUPABASE_URL'), help='Supabase URL')
     parser.add_argument('--supabase-key', default=os.environ.get('SUPABASE_KEY'), help='Supabase Key')
+    parser.add_argument('--schedule', action='store_true', help='按更新频率自适应调度，只抓取到期的源')
+    parser.add_argument('--schedule-state', default='', help='调度状态文件路径（默认 scripts/.cache/feed_schedule.json）')
+    parser.add_argument('--freshness', type=int, default=60, help='新鲜度目标：高频源最短轮询间隔（分钟，默认 60）')
+    parser.add_argument('--max-interval', type=int, default=168, help='低频源最长轮询间隔（小时，默认 168）')
+    parser.add_argument('--images', action='store_true', help='下载正文图片并生成压缩缩略图，改写图片链接')
+    parser.add_argument('--image-dir', default='', help='图片资源目录（默认 scripts/.cache/images）')
+    parser.add_argument('--image-base-url', default='', help='图片资源访问前缀（自行部署的 CDN 地址）')
+    parser.add_argument('--image-bucket', default='',
+                        help='图片资源上传到该 Supabase Storage 公开存储桶，链接改写为桶地址（与 --image-base-url 二选一，都未指定时不处理图片）')
+    parser.add_argument('--index', action='store_true', help='写入本地全文检索索引')
+    parser.add_argument('--index-path', default='', help='检索索引文件路径（默认 scripts/.cache/search_index.db）')
+    parser.add_argument('--bundle', action='store_true', help='发布每日压缩内容包')
+    parser.add_argument('--bundle-dir', default='', help='内容包目录（默认 scripts/.cache/bundles）')
+    parser.add_argument('--bundle-bucket', default='',
+                        help='内容包同时上传到该 Supabase Storage 公开存储桶（需预先创建），App 从桶中下载')
+    parser.add_argument('--recommend', action='store_true',
+                        help='写入本地向量索引，并按与收藏的相似度计算 recommend_score（需先执行 add_recommend_score_column.sql）')
+    parser.add_argument('--embedding-path', default='', help='向量索引文件路径（默认 scripts/.cache/embeddings.npz）')
+    parser.add_argument('--reader-payload', action='store_true',
+                        help='阅读页预排版：入库时写入目录、分块偏移、字数与阅读时长（需先执行 add_reader_payload_column.sql）')
+    parser.add_argument('--full-text', action='store_true',
+                        help='下载条目链接的原文页并提取正文，替换订阅源自带的导语（按 URL 缓存，不重复下载）')
+    parser.add_argument('--full-text-workers', type=int, default=4, help='原文下载并发数（默认 4）')
+    parser.add_argument('--full-text-cache', default='', help='原文缓存文件路径（默认 scripts/.cache/article_pages.json）')
+    parser.add_argument('--journal', action='store_true',
+                        help='产出的文章追加写入本地日志，可离线回放、重新上传（article_journal.py）')
+    parser.add_argument('--journal-dir', default='', help='日志目录（默认 scripts/.cache/journal）')
+    parser.add_argument('--profile', action='store_true', help='剖析运行：各阶段 CPU/内存报告与火焰图折叠栈（scripts/.cache/profiles）')
+    parser.add_argument('--deadline', type=float, default=0,
+                        help='时间预算（秒）：按优先级处理，来不及的任务推迟到下次运行（推迟记录在 scripts/.cache/deferred）')
 
     args = parser.parse_args()
+    if args.profile:
+        PROFILER.start('fetch_news')
+    deadline = open_deadline(args.deadline, 'fetch_news')
     api_key = os.environ.get('SILICONFLOW_API_KEY')
 
-    all_news = []
-
-    # 抓取各高质量源
-    all_news.extend(fetch_rss_news('bbc_chinese', limit=args.limit))
-    all_news.extend(fetch_rss_news('nytimes_chinese', limit=args.limit))
-
-    print(f"\n📦 共抓取到 {len(all_news)} 条新闻", file=sys.stderr)
-
-    # AI 处理
-    if args.ai and api_key:
-        process_with_ai(all_news, api_key)
+    source_keys = list(NEWS_SOURCES)
+    scheduler = None
+    if args.schedule:
+        from datetime import timedelta
+        from feed_scheduler import FeedScheduler, DEFAULT_STATE_PATH
+
+        scheduler = FeedScheduler(
+            args.schedule_state or DEFAULT_STATE_PATH,
+            freshness=timedelta(minutes=args.freshness),
+            max_interval=timedelta(hours=args.max_interval),
+        )
+        source_keys = scheduler.due_feeds(source_keys)
+        print(f"🗓️ 到期源 {len(source_keys)}/{len(NEWS_SOURCES)}: {', '.join(source_keys) or '无'}", file=sys.stderr)
+
+    # 启动探测：不可达的源几秒内排除，不再逐条等待超时
+    reachable = HOSTS.probe_all(NEWS_SOURCES[k]['url'] for k in source_keys)
+    if not all(reachable.values()):
+        source_keys = [k for k in source_keys if not HOSTS.is_open(NEWS_SOURCES[k]['url'])]
+
+    def iter_sources() -> Iterator[Article]:
+        """依次抓取各高质量源；每个源抓完后记录调度结果"""
+        for n, source_key in enumerate(source_keys):
+            if deadline and deadline.work_left() <= 0:
+                # 未抓取的源不记录轮询结果，下次运行仍然到期
+                print(f"⏳ 时间预算已用完，推迟 {len(source_keys) - n} 个源到下次运行", file=sys.stderr)
+                return
+            published = []
+            try:
+                for article in fetch_rss_news(source_key, limit=args.limit):
+                    published.append(article.published_at)
+                    yield article
+            except Exception:
+                # 抓取失败不算一次空轮询：不记录结果，不推迟下次到期时间
+                continue
+            if scheduler:
+                next_due = scheduler.record_poll(source_key, published)
+                print(f"  ⏭️ {NEWS_SOURCES[source_key]['name']} 下次轮询: {next_due.isoformat(timespec='minutes')}", file=sys.stderr)
+
+    # 上传时与库中已存记录对比：正文未变的新闻复用摘要，只更新变化的列
+    tracker = None
+    if args.upload:
+        try:
+            storage = open_storage(args.storage, args.supabase_url, args.supabase_key, args.storage_path)
+            tracker = ChangeTracker(storage, 'news')
+        except StorageError as e:
+            print(f"❌ 无法上传: {e}", file=sys.stderr)
+
+    # 摘要队列：文章先入库，摘要由 worker 异步回填
+    queue = None
+    if args.ai_queue:
+        if tracker:
+            from summary_queue import SummaryQueue, DEFAULT_QUEUE_PATH
+            queue = SummaryQueue(args.queue_path or DEFAULT_QUEUE_PATH)
+        else:
+            print("⚠️ --ai-queue 需要配合 --upload 使用，已忽略", file=sys.stderr)
+
+    # 抓取 -> AI 处理 以生成器串联，逐条流过
+    all_news = PROFILER.wrap('fetch', iter_sources())
+
+    # 原文正文：AI 摘要与入库都基于完整正文，而不是订阅源的导语
+    if args.full_text:
+        from article_extractor import DEFAULT_CACHE_PATH as PAGE_CACHE_PATH
+        all_news = PROFILER.wrap('full_text', attach_full_text(
+            all_news, args.full_text_cache or PAGE_CACHE_PATH, args.full_text_workers))
+
+    if queue or (args.ai and api_key):
+        all_news = PROFILER.wrap('ai', process_with_ai(all_news, api_key, tracker, queue, deadline))
+
+    # 推荐打分：入库时就按与收藏的相似度算好 recommend_score
+    if args.recommend:
+        from embedding_index import recommend_articles, DEFAULT_EMBEDDING_PATH
+        all_news = PROFILER.wrap('recommend', recommend_articles(
+            all_news, 'news', tracker.client if tracker else None, args.embedding_path or DEFAULT_EMBEDDING_PATH))
+
+    # 只上传时全程流式处理；其余输出需要完整列表
+    if not args.upload or args.images or args.index or args.bundle:
+        all_news = list(all_news)
+        print(f"\n📦 共抓取到 {len(all_news)} 条新闻", file=sys.stderr)
+
+    # 图片缩略图
+    if args.images:
+        from image_pipeline import process_article_images, DEFAULT_ASSET_DIR
+        image_bucket = None
+        if args.image_bucket:
+            from storage import open_bucket
+            try:
+                image_bucket = open_bucket(args.supabase_url, args.supabase_key, args.image_bucket)
+            except StorageError as e:
+                print(f"❌ 图片无法上传: {e}", file=sys.stderr)
+        with PROFILER.stage('images'):
+            process_article_images(all_news, args.image_dir or DEFAULT_ASSET_DIR, args.image_base_url, bucket=image_bucket)
+
+    # 阅读页预排版：在图片链接改写之后计算，块偏移量对应最终入库的 content
+    # （上传时若沿用了库中的 AI 摘要、content 随之改变，ChangeTracker 会重新计算）
+    if args.reader_payload:
+        from reader_payload import attach_payloads
+        payloads = PROFILER.wrap('payload', attach_payloads(all_news))
+        all_news = list(payloads) if isinstance(all_news, list) else payloads
+
+    # 本地检索索引
+    if args.index:
+        from search_index import index_articles, DEFAULT_INDEX_PATH
+        with PROFILER.stage('index'):
+            index_articles(all_news, args.index_path or DEFAULT_INDEX_PATH)
+
+    # 每日内容包
+    if args.bundle:
+        from feed_bundles import publish_bundles, DEFAULT_BUNDLE_DIR
+        bucket = None
+        if args.bundle_bucket:
+            from storage import open_bucket
+            try:
+                bucket = open_bucket(args.supabase_url, args.supabase_key, args.bundle_bucket)
+            except StorageError as e:
+                print(f"❌ 内容包只写本地目录: {e}", file=sys.stderr)
+        with PROFILER.stage('bundle'):
+            publish_bundles(all_news, args.bundle_dir or DEFAULT_BUNDLE_DIR, bucket=bucket)
+
+    # 本地日志：记录最终产出的文章，重新上传、迁移时回放，不必重新抓取和调用 LLM
+    if args.journal:
+        from article_journal import journal_articles, DEFAULT_JOURNAL_DIR
+        journaled = PROFILER.wrap('journal', journal_articles(all_news, 'news', args.journal_dir or DEFAULT_JOURNAL_DIR))
+        all_news = list(journaled) if isinstance(all_news, list) else journaled
 
     # 上传
     if args.upload:
-        if args.supabase_url and args.supabase_key:
-            save_to_supabase(all_news, args.supabase_url, args.supabase_key)
-        else:
-            print("❌ 缺少 Supabase 配置，无法上传", file=sys.stderr)
+        if tracker:
+            with PROFILER.stage('upload'):
+                save_to_supabase(all_news, args.supabase_url, args.supabase_key, tracker)
     else:
         # 本地测试
-        print(json.dumps(all_news[:2], indent=2, ensure_ascii=False))
+        with PROFILER.stage('output'):
+            print(json.dumps(to_dicts(all_news[:2]), indent=2, ensure_ascii=False))
+
+    if scheduler:
+        scheduler.save()
+    if deadline:
+        deadline.save()
+    HOSTS.report()
 
 if __name__ == '__main__':
     main()
@@ -14,14 +14,18 @@ import sys
 import argparse
 import time
 import random
+import re
+import sqlite3
+import threading
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Set
 
-# Try to import supabase
-try:
-    from supabase import create_client, Client
-except ImportError:
-    create_client = None
+from article_record import Article, ArticleLayout, to_dicts
+from change_detection import ChangeTracker
+from host_health import HOSTS, CircuitOpenError
+from profiling import PROFILER
+from run_deadline import open_deadline
+from storage import BACKENDS, StorageError, open_storage
 
 
 # ==================== 配置区 ====================
@@ -51,7 +55,7 @@ USE_CLOUDFLARE_PROXY = os.environ.get('USE_CLOUDFLARE_PROXY', 'false').lower() =
 CLOUDFLARE_WORKER_URL = os.environ.get('CLOUDFLARE_WORKER_URL', '')
 
 # 教务处网站配置
-JW_BASE_URL = "https://jw.scut.edu.cn"
+JW_BASE_URL = os.environ.get('JW_BASE_URL', "https://jw.scut.edu.cn")
 JW_NOTICE_URL = f"{JW_BASE_URL}/zhinan/cms/toPosts.do"
 JW_API_URL = f"{JW_BASE_URL}/zhinan/cms/article/v2/findInformNotice.do"  # AJAX API 接口
 
@@ -95,18 +99,149 @@ def calculate_priority(title: str, content: str) -> str:
     return 'low'
 
 
+def notice_priority(notice: Dict) -> str:
+    """列表条目的优先级（正文尚未抓取，只看标题）"""
+    return calculate_priority(notice['title'], '')
+
+
 def extract_tags(title: str, content: str) -> List[str]:
     """提取文章标签"""
-    tags = set()
+    tags = []
     text = (title + " " + content).lower()
 
-    # 合并所有关键词
+    # 合并所有关键词；按关键词表顺序保留，保证每次运行结果一致（变更检测按值比较）
     all_keywords = HIGH_PRIORITY_KEYWORDS + LOW_PRIORITY_KEYWORDS
     for keyword in all_keywords:
-        if keyword.lower() in text:
-            tags.add(keyword)
+        if keyword.lower() in text and keyword not in tags:
+            tags.append(keyword)
+
+    return tags[:5]  # 最多返回 5 个标签
+
+
+# 分类映射（根据 tag 字段）
+CATEGORY_MAP = {
+    1: '选课',
+    2: '考试',
+    3: '实践',
+    4: '交流',
+    5: '教师',
+    6: '信息'
+}
+
+PAGE_SIZE = 15
+
+
+class RateLimiter:
+    """
+    线程安全的礼貌限速器：保证同一站点两次请求之间至少间隔 min_interval 秒
+
+    并发抓取时多个线程共用一个实例，整体请求速率不超过 1 / min_interval。
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def create_session() -> requests.Session:
+    """创建 Session 并访问主页获取 JSESSIONID（重要：API 需要 Cookie）"""
+    session = requests.Session()
+    try:
+        print("正在获取 Session Cookie...", file=sys.stderr)
+        HOSTS.get(JW_NOTICE_URL, session, headers=get_random_headers(), timeout=(5, 10))
+    except Exception as e:
+        print(f"获取 Session 失败: {e}", file=sys.stderr)
+    return session
+
+
+def fetch_notice_page(session: requests.Session, category: int, page: int) -> Dict:
+    """
+    请求一页通知列表（AJAX API）
+
+    Returns:
+        API 返回的 JSON（包含 success / list / total）
 
-    return list(tags)[:5]  # 最多返回 5 个标签
+    Raises:
+        requests.exceptions.RequestException, json.JSONDecodeError
+    """
+    # 构造 API 请求参数
+    payload = {
+        'category': str(category),
+        'tag': str(category),
+        'pageNum': page,
+        'pageSize': PAGE_SIZE,
+        'keyword': ''
+    }
+
+    # 构造完整的请求头（包含 AJAX 标识）
+    headers = get_random_headers()
+    headers.update({
+        'Accept': 'application/json, text/javascript, */*; q=0.01',
+        'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+        'X-Requested-With': 'XMLHttpRequest',
+        'Referer': JW_NOTICE_URL,
+        'Origin': JW_BASE_URL
+    })
+
+    # POST 请求到 AJAX API（使用 session）
+    response = HOSTS.post(
+        JW_API_URL,
+        session,
+        data=payload,
+        headers=headers,
+        timeout=(5, 15)
+    )
+    response.raise_for_status()
+
+    # 解析 JSON 响应
+    return response.json()
+
+
+def parse_notice_items(items: List[Dict]) -> List[Dict]:
+    """把 API 返回的条目转换为通知列表项"""
+    notices = []
+    for item in items:
+        try:
+            # 提取字段（使用实际的 API 字段名）
+            article_id = item.get('id', '')
+            title = item.get('title', '').strip()  # ✅ 修正：使用 'title' 而非 'postTitle'
+            create_time = item.get('createTime', datetime.now().strftime('%Y.%m.%d'))
+            tag = item.get('tag', 0)  # ✅ 修正：使用 'tag' 字段
+
+            # 格式化日期（从 2026.01.16 转为 2026-01-16）
+            if '.' in create_time:
+                parts = create_time.split('.')
+                if len(parts) == 3:
+                    create_time = f"20{parts[0]}-{parts[1]}-{parts[2]}"
+
+            # 构造详情页 URL
+            url = f"{JW_BASE_URL}/zhinan/cms/article/view.do?type=posts&id={article_id}"
+
+            category_name = CATEGORY_MAP.get(tag, '通知')
+
+            # 验证数据有效性
+            if title and article_id:
+                notices.append({
+                    'title': title,
+                    'url': url,
+                    'date': create_time,
+                    'category': category_name,
+                    'id': article_id
+                })
+
+        except Exception as e:
+            print(f"解析单条通知时出错: {e}", file=sys.stderr)
+            continue
+    return notices
 
 
 def fetch_notice_list(max_pages: int = 3, category: int = 0) -> List[Dict]:
@@ -124,48 +259,17 @@ def fetch_notice_list(max_pages: int = 3, category: int = 0) -> List[Dict]:
 
     print(f"开始通过 API 抓取教务处通知（类别: {category}, 最多 {max_pages} 页）...", file=sys.stderr)
 
-    # 创建 Session 对象（重要：需要先访问主页获取 Cookie）
-    session = requests.Session()
+    # 先做一次廉价探测：站点不可达时几秒内放弃，而不是在每个请求上等待超时
+    if not HOSTS.probe(JW_API_URL):
+        print("❌ 教务处站点不可达，跳过抓取", file=sys.stderr)
+        return []
 
-    try:
-        # Step 1: 访问主页获取 JSESSIONID
-        print("正在获取 Session Cookie...", file=sys.stderr)
-        session.get(JW_NOTICE_URL, headers=get_random_headers(), timeout=10)
-    except Exception as e:
-        print(f"获取 Session 失败: {e}", file=sys.stderr)
+    # 创建 Session 对象（重要：需要先访问主页获取 Cookie）
+    session = create_session()
 
     for page in range(1, max_pages + 1):
         try:
-            # 构造 API 请求参数
-            payload = {
-                'category': str(category),
-                'tag': str(category),
-                'pageNum': page,
-                'pageSize': 15,
-                'keyword': ''
-            }
-
-            # 构造完整的请求头（包含 AJAX 标识）
-            headers = get_random_headers()
-            headers.update({
-                'Accept': 'application/json, text/javascript, */*; q=0.01',
-                'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-                'X-Requested-With': 'XMLHttpRequest',
-                'Referer': JW_NOTICE_URL,
-                'Origin': JW_BASE_URL
-            })
-
-            # POST 请求到 AJAX API（使用 session）
-            response = session.post(
-                JW_API_URL,
-                data=payload,
-                headers=headers,
-                timeout=15
-            )
-            response.raise_for_status()
-
-            # 解析 JSON 响应
-            data = response.json()
+            data = fetch_notice_page(session, category, page)
 
             if not data.get('success', False):
                 print(f"API 返回错误: {data.get('message', '未知错误')}", file=sys.stderr)
@@ -175,51 +279,10 @@ def fetch_notice_list(max_pages: int = 3, category: int = 0) -> List[Dict]:
                 print(f"第 {page} 页无数据，停止抓取", file=sys.stderr)
                 break
 
-            page_count = 0
-            for item in data['list']:
-                try:
-                    # 提取字段（使用实际的 API 字段名）
-                    article_id = item.get('id', '')
-                    title = item.get('title', '').strip()  # ✅ 修正：使用 'title' 而非 'postTitle'
-                    create_time = item.get('createTime', datetime.now().strftime('%Y.%m.%d'))
-                    tag = item.get('tag', 0)  # ✅ 修正：使用 'tag' 字段
-
-                    # 格式化日期（从 2026.01.16 转为 2026-01-16）
-                    if '.' in create_time:
-                        parts = create_time.split('.')
-                        if len(parts) == 3:
-                            create_time = f"20{parts[0]}-{parts[1]}-{parts[2]}"
-
-                    # 构造详情页 URL
-                    url = f"{JW_BASE_URL}/zhinan/cms/article/view.do?type=posts&id={article_id}"
-
-                    # 分类映射（根据 tag 字段）
-                    category_map = {
-                        1: '选课',
-                        2: '考试',
-                        3: '实践',
-                        4: '交流',
-                        5: '教师',
-                        6: '信息'
-                    }
-                    category_name = category_map.get(tag, '通知')
-
-                    # 验证数据有效性
-                    if title and article_id:
-                        notices.append({
-                            'title': title,
-                            'url': url,
-                            'date': create_time,
-                            'category': category_name,
-                            'id': article_id
-                        })
-                        page_count += 1
-
-                except Exception as e:
-                    print(f"解析单条通知时出错: {e}", file=sys.stderr)
-                    continue
+            page_notices = parse_notice_items(data['list'])
+            notices.extend(page_notices)
 
-            print(f"第 {page} 页抓取完成，本页 {page_count} 条，累计 {len(notices)} 条", file=sys.stderr)
+            print(f"第 {page} 页抓取完成，本页 {len(page_notices)} 条，累计 {len(notices)} 条", file=sys.stderr)
 
             # 检查是否还有更多数据
             total = data.get('total', 0)
@@ -244,29 +307,134 @@ def fetch_notice_list(max_pages: int = 3, category: int = 0) -> List[Dict]:
     return final_list
 
 
-def fetch_notice_detail(notice_url: str, max_retries: int = 3) -> tuple[Optional[str], Optional[str]]:
+def fetch_notice_lists(categories: List[int], max_pages: int = 3, workers: int = 3, rate: float = 1.0,
+                       known: Optional[Callable[[List[Dict]], Set]] = None) -> List[Dict]:
+    """
+    并发抓取多个分类的通知列表（共用一个带 Cookie 的 Session 和一个站点限速器）
+
+    各分类的第 1 页同时发出；拿到 total 后把该分类剩余的页一并提交。结果到达时即按 id 合并去重，
+    某一页出现已入库的通知后，该分类尚未发出的页全部取消（列表按时间倒序，更早的页都是旧通知）。
+
+    Args:
+        categories: 分类列表（含义同 fetch_notice_list 的 category）
+        max_pages: 每个分类最多抓取页数
+        workers: 并发请求数
+        rate: 对教务处站点的总请求速率上限（次/秒）
+        known: 可选回调，传入一页通知，返回其中已入库的通知 id 集合
+
+    Returns:
+        合并去重后的通知列表（按日期倒序）
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    print(f"开始并发抓取教务处通知（分类 {categories}，每类最多 {max_pages} 页，"
+          f"并发 {workers}，限速 {rate} 次/秒）...", file=sys.stderr)
+
+    if not HOSTS.probe(JW_API_URL):
+        print("❌ 教务处站点不可达，跳过抓取", file=sys.stderr)
+        return []
+
+    session = create_session()
+    limiter = RateLimiter(1.0 / rate)
+    merged: Dict = {}
+    stopped = set()       # 已停止翻页的分类
+    pending = {}          # future -> (category, page)
+
+    def fetch_page(category: int, page: int) -> Dict:
+        limiter.wait()
+        return fetch_notice_page(session, category, page)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def submit(category: int, page: int):
+            pending[executor.submit(fetch_page, category, page)] = (category, page)
+
+        def stop(category: int):
+            stopped.add(category)
+            for future, (c, _) in list(pending.items()):
+                if c == category and future.cancel():
+                    del pending[future]
+
+        for category in categories:
+            submit(category, 1)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                category, page = pending.pop(future)
+                try:
+                    data = future.result()
+                except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+                    print(f"API 请求失败（分类 {category} 第 {page} 页）: {e}", file=sys.stderr)
+                    stop(category)
+                    continue
+
+                if not data.get('success', False):
+                    print(f"API 返回错误（分类 {category}）: {data.get('message', '未知错误')}", file=sys.stderr)
+                    stop(category)
+                    continue
+
+                page_notices = parse_notice_items(data.get('list') or [])
+                before = len(merged)
+                merged.update((n['id'], n) for n in page_notices)
+                print(f"  分类 {category} 第 {page} 页: {len(page_notices)} 条，"
+                      f"新增 {len(merged) - before} 条，累计 {len(merged)} 条", file=sys.stderr)
+
+                if category in stopped:
+                    continue
+                seen = known(page_notices) if known and page_notices else set()
+                if seen:
+                    print(f"  分类 {category} 第 {page} 页出现 {len(seen)} 条已入库通知，停止翻页", file=sys.stderr)
+                    stop(category)
+                elif page == 1:
+                    last_page = min(max_pages, -(-data.get('total', 0) // PAGE_SIZE))
+                    for next_page in range(2, last_page + 1):
+                        submit(category, next_page)
+
+    final_list = sorted(merged.values(), key=lambda n: (n['date'], str(n['id'])), reverse=True)
+    print(f"去重后共 {len(final_list)} 条唯一通知", file=sys.stderr)
+    return final_list
+
+
+def known_notice_ids(tracker: ChangeTracker) -> Callable[[List[Dict]], Set]:
+    """并发列表的早停判断：按页批量查询库中已存记录，返回已入库的通知 id"""
+    def known(notices: List[Dict]) -> Set:
+        try:
+            tracker.prefetch(n['url'] for n in notices)
+        except Exception as e:
+            print(f"⚠️ 查询已存记录失败，继续翻页: {e}", file=sys.stderr)
+            return set()
+        return {n['id'] for n in notices if n['url'] in tracker.stored}
+    return known
+
+
+def fetch_notice_detail(notice_url: str, max_retries: int = 3,
+                        limiter: Optional[RateLimiter] = None) -> tuple[Optional[str], Optional[str]]:
     """
     抓取通知详情页内容（带重试机制）
 
     Args:
         notice_url: 通知详情页 URL
         max_retries: 最大重试次数（默认 3 次）
+        limiter: 可选的共享限速器（并发抓取时使用）
 
     Returns:
         (Markdown 格式的正文内容, 发布日期)
     """
     for attempt in range(max_retries):
+        if limiter:
+            limiter.wait()
         try:
-            response = requests.get(
-                notice_url,
-                headers=get_random_headers(),
-                timeout=30,
-                verify=True
-            )
-            response.raise_for_status()
-            response.encoding = 'utf-8'
-
-            soup = BeautifulSoup(response.text, 'html.parser')
+            with PROFILER.stage('download'):
+                response = HOSTS.get(
+                    notice_url,
+                    headers=get_random_headers(),
+                    verify=True
+                )
+                response.raise_for_status()
+                response.encoding = 'utf-8'
+
+            with PROFILER.stage('parse'):
+                soup = BeautifulSoup(response.text, 'html.parser')
 
             # 提取发布日期（多种可能的位置）
             publish_date = None
@@ -315,7 +483,8 @@ def fetch_notice_detail(notice_url: str, max_retries: int = 3) -> tuple[Optional
             h.body_width = 0
             h.unicode_snob = True
 
-            markdown_content = h.handle(content_html)
+            with PROFILER.stage('parse'):
+                markdown_content = h.handle(content_html)
 
             # 清理多余的空行
             markdown_content = '\n'.join(
@@ -325,15 +494,19 @@ def fetch_notice_detail(notice_url: str, max_retries: int = 3) -> tuple[Optional
 
             return markdown_content.strip(), publish_date
 
+        except CircuitOpenError:
+            # 站点已熔断：不再重试，也不等待
+            return None, None
+
         except requests.Timeout:
             print(f"⏱️ 超时（第 {attempt + 1}/{max_retries} 次尝试）: {notice_url}", file=sys.stderr)
-            if attempt < max_retries - 1:
+            if attempt < max_retries - 1 and not HOSTS.is_open(notice_url):
                 time.sleep(3)
             continue
 
         except requests.RequestException as e:
             print(f"❌ 网络错误（第 {attempt + 1}/{max_retries} 次尝试）: {e}", file=sys.stderr)
-            if attempt < max_retries - 1:
+            if attempt < max_retries - 1 and not HOSTS.is_open(notice_url):
                 time.sleep(3)
             continue
 
@@ -346,7 +519,121 @@ def fetch_notice_detail(notice_url: str, max_retries: int = 3) -> tuple[Optional
     return None, None
 
 
-def process_notices(notices: List[Dict], limit: int = 10, use_ai: bool = False) -> List[Dict]:
+class NoticeLayout(ArticleLayout):
+    """教务通知布局：有 AI 摘要时 content 显示 AI 总结 + 原文链接，否则显示完整原文"""
+
+    fields = (
+        'title', 'summary', 'content', 'source', 'source_url', 'author',
+        'published_at', 'fetched_at', 'priority', 'tags', 'is_favorited', 'ai_summary',
+    )
+
+    @staticmethod
+    def content(article: Article) -> str:
+        category = article.category or '通知'
+
+        if article.ai_summary:
+            # 清理 AI 摘要中的 emoji
+            clean_ai_summary = re.sub(r'[🎯📅⚠️🎓🔴🔵🤖📄🏫🏷️🔗]+\s*', '', article.ai_summary)
+
+            # 如果有 AI 摘要，content 显示 AI 总结 + 原文链接
+            return f"""# {article.title}
+
+> 发布日期: {article.published_at}
+> 分类: {category}
+> 优先级: **{article.priority.upper()}**
+> 原文链接: [{article.source_url}]({article.source_url})
+
+---
+
+{clean_ai_summary}
+
+---
+
+## 查看完整原文
+
+如需查看完整通知内容，请点击上方原文链接访问官网。
+
+---
+
+*本文由 Anthropo-Reader 自动抓取整理 | AI 总结由硅基流动提供 | 数据来源: 华南理工大学本科生院*
+"""
+
+        # 如果没有 AI 摘要，显示完整原文
+        priority_emoji = '🔴' if article.priority == 'high' else '🔵'
+        return f"""# {article.title}
+
+> 📅 发布日期: {article.published_at}
+> 🏷️ 分类: {category}
+> {priority_emoji} 优先级: **{article.priority.upper()}**
+> 🔗 原文链接: [{article.source_url}]({article.source_url})
+
+---
+
+{article.body}
+
+---
+
+*本文由 Anthropo-Reader 自动抓取整理 | 数据来源: 华南理工大学本科生院*
+"""
+
+    @staticmethod
+    def summary(article: Article) -> str:
+        # 处理 AI 摘要（清理格式，用于列表显示）
+        if article.ai_summary:
+            # 移除 Markdown 标题符号和 emoji，提取纯文本
+            clean_summary = article.ai_summary.replace('#', '').replace('*', '').replace('>', '').strip()
+            # 移除常见 emoji
+            clean_summary = re.sub(r'[🎯📅⚠️🎓🔴🔵🤖📄🏫🏷️🔗]+', '', clean_summary)
+            # 只取前 150 字符作为列表摘要
+            return clean_summary[:150] + '...' if len(clean_summary) > 150 else clean_summary
+
+        # 基础摘要（备用方案）
+        content_text = article.body.replace('#', '').replace('*', '').replace('>', '').strip()
+        return content_text[:200] + '...' if len(content_text) > 200 else content_text
+
+
+def build_notice_article(notice: Dict, content: str, publish_date: Optional[str],
+                         ai_summary: Optional[str] = None) -> Article:
+    """
+    由列表项和详情页正文构造数据库记录（summary/content 由 NoticeLayout 按需渲染）
+
+    Args:
+        notice: 通知列表项
+        content: 详情页 Markdown 正文
+        publish_date: 详情页上的发布日期
+        ai_summary: AI 摘要（可选）
+    """
+    # 使用详情页的日期（如果有）
+    final_date = publish_date if publish_date else notice['date']
+
+    # 计算优先级和标签
+    priority = calculate_priority(notice['title'], content)
+    tags = extract_tags(notice['title'], content)
+
+    # 添加分类标签
+    if 'category' in notice and notice['category']:
+        if notice['category'] not in tags:
+            tags.insert(0, notice['category'])
+
+    return Article(
+        NoticeLayout,
+        title=notice['title'],
+        body=content,
+        source='SCUT_JW',
+        source_url=notice['url'],
+        author='华南理工大学本科生院',
+        published_at=final_date,
+        fetched_at=datetime.now().isoformat(),
+        priority=priority,
+        category=notice.get('category', '通知'),
+        tags=tags[:5],  # 限制最多5个标签
+        ai_summary=ai_summary  # 独立保存 AI 摘要（供前端选择使用）
+    )
+
+
+def process_notices(notices: List[Dict], limit: int = 10, use_ai: bool = False,
+                    tracker: Optional[ChangeTracker] = None, queue=None,
+                    table_name: str = 'school_notices', deadline=None) -> Iterator[Article]:
     """
     处理通知列表，抓取详情并生成结构化数据
 
@@ -354,12 +641,14 @@ def process_notices(notices: List[Dict], limit: int = 10, use_ai: bool = False)
         notices: 通知列表
         limit: 最多处理条数
         use_ai: 是否使用 AI 生成摘要
+        tracker: 可选的变更跟踪器；正文未变的已存通知直接复用 AI 摘要
+        queue: 可选的摘要队列（SummaryQueue）；提供时只入队，不在抓取中调用 LLM
+        table_name: 入队任务回填的表名
+        deadline: 可选的时间预算（RunDeadline）；按标题优先级处理，来不及抓取的通知推迟到下次运行
 
-    Returns:
-        结构化文章数据
+    Yields:
+        结构化文章记录（逐条抓取、逐条产出）
     """
-    articles = []
-
     # 尝试导入 AI 模块
     generate_summary = None
     if use_ai:
@@ -371,9 +660,22 @@ def process_notices(notices: List[Dict], limit: int = 10, use_ai: bool = False)
             print("⚠️ AI 模块未找到，将使用基础摘要", file=sys.stderr)
 
     print(f"\n开始处理通知详情（限制 {limit} 条）...", file=sys.stderr)
+    notices = notices[:limit]
+    if deadline:
+        # 按标题优先级排序，上次推迟的通知一并合并进来
+        notices = deadline.prioritize('detail', notices, rank=notice_priority)
+
+    count = 0
+    for i, notice in enumerate(notices, 1):
+        if HOSTS.is_open(notice['url']):
+            print(f"⏭️ 教务处站点已熔断，跳过剩余 {len(notices) - i + 1} 条通知", file=sys.stderr)
+            break
 
-    for i, notice in enumerate(notices[:limit], 1):
-        print(f"[{i}/{min(limit, len(notices))}] 处理: {notice['title'][:30]}...", file=sys.stderr)
+        if deadline and not deadline.admit('detail', notice, rank=notice_priority):
+            print(f"[{i}/{len(notices)}] ⏳ 时间预算不足，推迟到下次运行: {notice['title'][:30]}", file=sys.stderr)
+            continue
+
+        print(f"[{i}/{len(notices)}] 处理: {notice['title'][:30]}...", file=sys.stderr)
 
         # 抓取详情页（增强错误处理）
         content, publish_date = fetch_notice_detail(notice['url'])
@@ -382,165 +684,252 @@ def process_notices(notices: List[Dict], limit: int = 10, use_ai: bool = False)
             print(f"  ⚠️ 详情页抓取失败，跳过此通知", file=sys.stderr)
             continue  # 跳过失败的通知，而不是存储失败数据
 
-        # 使用详情页的日期（如果有）
-        final_date = publish_date if publish_date else notice['date']
-
-        # 计算优先级和标签
-        priority = calculate_priority(notice['title'], content)
-        tags = extract_tags(notice['title'], content)
-
-        # 添加分类标签
-        if 'category' in notice and notice['category']:
-            if notice['category'] not in tags:
-                tags.insert(0, notice['category'])
+        article = build_notice_article(notice, content, publish_date)
 
         # 生成摘要（优先使用 AI，否则使用简单截取）
         ai_summary = None
-        if generate_summary:
+        if (generate_summary or queue) and tracker and tracker.reuse_summary(article):
+            print(f"  ♻️ 正文未变，复用已有 AI 摘要", file=sys.stderr)
+        elif queue is not None:
+            if queue.enqueue(table_name, article, 'notice', content):
+                print(f"  📥 AI 摘要任务已入队", file=sys.stderr)
+        elif generate_summary:
             print(f"  🤖 正在生成 AI 摘要...", file=sys.stderr)
             ai_summary = generate_summary(
                 content=content,
                 content_type="notice",
-                api_key=os.environ.get('SILICONFLOW_API_KEY')
+                api_key=os.environ.get('SILICONFLOW_API_KEY'),
+                priority=article.priority
             )
             if ai_summary:
+                article.ai_summary = ai_summary
                 print(f"  ✅ AI 摘要生成成功", file=sys.stderr)
             else:
                 print(f"  ⚠️ AI 摘要生成失败，使用基础摘要", file=sys.stderr)
 
-        # 基础摘要（备用方案）
-        content_text = content.replace('#', '').replace('*', '').replace('>', '').strip()
-        basic_summary = content_text[:200] + '...' if len(content_text) > 200 else content_text
+        count += 1
+        yield article
 
-        # 处理 AI 摘要（清理格式，用于列表显示）
-        if ai_summary:
-            # 移除 Markdown 标题符号和 emoji，提取纯文本
-            clean_summary = ai_summary.replace('#', '').replace('*', '').replace('>', '').strip()
-            # 移除常见 emoji
-            import re
-            clean_summary = re.sub(r'[🎯📅⚠️🎓🔴🔵🤖📄🏫🏷️🔗]+', '', clean_summary)
-            # 只取前 150 字符作为列表摘要
-            summary = clean_summary[:150] + '...' if len(clean_summary) > 150 else clean_summary
-        else:
-            summary = basic_summary
+        # 礼貌延迟
+        time.sleep(random.uniform(1.5, 3))
 
-        # 构造 Markdown 格式正文
-        priority_emoji = '🔴' if priority == 'high' else '🔵'
+    print(f"\n处理完成！共生成 {count} 条结构化数据", file=sys.stderr)
+    if generate_summary:
+        from ai_summarizer import ROUTE_METRICS
+        ROUTE_METRICS.report()
 
-        # 根据是否有 AI 摘要，选择不同的内容格式
-        if ai_summary:
-            # 清理 AI 摘要中的 emoji
-            import re
-            clean_ai_summary = re.sub(r'[🎯📅⚠️🎓🔴🔵🤖📄🏫🏷️🔗]+\s*', '', ai_summary)
 
-            # 如果有 AI 摘要，content 显示 AI 总结 + 原文链接
-            full_content = f"""# {notice['title']}
+def save_to_supabase(articles: Iterable[Dict], url: str, key: str, table_name: str = 'school_notices',
+                     tracker: Optional[ChangeTracker] = None):
+    """
+    上传数据到 Supabase
 
-> 发布日期: {final_date}
-> 分类: {notice.get('category', '通知')}
-> 优先级: **{priority.upper()}**
-> 原文链接: [{notice['url']}]({notice['url']})
+    新记录批量插入；已存在的记录（基于 source_url）对比内容指纹，只更新变化的列。
 
----
+    Args:
+        articles: 文章数据列表（可以是生成器）
+        url: Supabase URL
+        key: Supabase API Key
+        table_name: 目标表名（默认 school_notices）
+        tracker: 可选的变更跟踪器（抓取阶段已创建时复用）
+    """
+    print(f"\n连接 Supabase 数据库...", file=sys.stderr)
 
-{clean_ai_summary}
+    try:
+        tracker = tracker or ChangeTracker(open_storage('supabase', url, key), table_name)
+        stats = tracker.sync(articles)
 
----
+        print(f"\n📊 上传统计: 新增 {stats['inserted']} 条, 更新 {stats['updated']} 条, "
+              f"未变 {stats['unchanged']} 条, 失败 {stats['failed']} 条", file=sys.stderr)
 
-## 查看完整原文
+    except Exception as e:
+        print(f"❌ Supabase 连接错误: {e}", file=sys.stderr)
 
-如需查看完整通知内容，请点击上方原文链接访问官网。
 
----
+# ==================== 全量回填 ====================
 
-*本文由 Anthropo-Reader 自动抓取整理 | AI 总结由硅基流动提供 | 数据来源: 华南理工大学本科生院*
-"""
-        else:
-            # 如果没有 AI 摘要，显示完整原文
-            full_content = f"""# {notice['title']}
+DEFAULT_CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'scut_backfill.db')
+MAX_DETAIL_ATTEMPTS = 3  # 单条详情跨多次运行的最大失败次数
 
-> 📅 发布日期: {final_date}
-> 🏷️ 分类: {notice.get('category', '通知')}
-> {priority_emoji} 优先级: **{priority.upper()}**
-> 🔗 原文链接: [{notice['url']}]({notice['url']})
 
----
+class BackfillCheckpoint:
+    """
+    全量回填断点（SQLite）
 
-{content}
+    pages 表记录每个分类的下一页页码与是否翻完；notices 表记录已发现的通知和详情抓取状态，
+    抓取成功的记录以 JSON 保存。每翻一页、每抓完一条详情都立即提交，中断后从原处继续。
+    """
 
----
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS pages (
+        category INTEGER PRIMARY KEY,
+        next_page INTEGER NOT NULL DEFAULT 1,
+        done INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS notices (
+        id TEXT PRIMARY KEY,
+        notice TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        article TEXT
+    );
+    """
 
-*本文由 Anthropo-Reader 自动抓取整理 | 数据来源: 华南理工大学本科生院*
-"""
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(self.SCHEMA)
+
+    def category_state(self, category: int) -> tuple[int, bool]:
+        """返回 (下一页页码, 是否已翻完)"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT next_page, done FROM pages WHERE category = ?', (category,)
+            ).fetchone()
+        return (row[0], bool(row[1])) if row else (1, False)
+
+    def save_page(self, category: int, page: int, notices: List[Dict], done: bool):
+        """保存一页列表结果并推进页码（同一事务）"""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO notices (id, notice) VALUES (?, ?)',
+                [(str(n['id']), json.dumps(n, ensure_ascii=False)) for n in notices]
+            )
+            self.conn.execute(
+                'INSERT OR REPLACE INTO pages (category, next_page, done) VALUES (?, ?, ?)',
+                (category, page + 1, int(done))
+            )
 
-        # 构造数据库记录
-        article = {
-            'title': notice['title'],
-            'summary': summary,  # 列表摘要（简短）
-            'content': full_content,  # 详情页内容（优先显示 AI 总结）
-            'source': 'SCUT_JW',
-            'source_url': notice['url'],
-            'author': '华南理工大学本科生院',
-            'published_at': final_date,
-            'fetched_at': datetime.now().isoformat(),
-            'priority': priority,
-            'tags': tags[:5],  # 限制最多5个标签
-            'is_favorited': False,
-            'ai_summary': ai_summary  # 独立保存 AI 摘要（供前端选择使用）
-        }
-
-        articles.append(article)
+    def pending_notices(self) -> List[Dict]:
+        """未完成且失败次数未超限的通知"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT notice FROM notices WHERE status != 'done' AND attempts < ? ORDER BY id DESC",
+                (MAX_DETAIL_ATTEMPTS,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def mark_done(self, notice_id, article: Dict):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE notices SET status = 'done', article = ? WHERE id = ?",
+                (json.dumps(article, ensure_ascii=False), str(notice_id))
+            )
 
-        # 礼貌延迟
-        time.sleep(random.uniform(1.5, 3))
+    def mark_failed(self, notice_id):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE notices SET status = 'failed', attempts = attempts + 1 WHERE id = ?",
+                (str(notice_id),)
+            )
 
-    print(f"\n处理完成！共生成 {len(articles)} 条结构化数据", file=sys.stderr)
-    return articles
+    def iter_articles(self) -> Iterator[Dict]:
+        """逐条读出已完成的记录（不一次性载入内存）"""
+        cursor = self.conn.cursor()
+        for (article,) in cursor.execute("SELECT article FROM notices WHERE status = 'done' ORDER BY id DESC"):
+            yield json.loads(article)
 
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            rows = self.conn.execute('SELECT status, COUNT(*) FROM notices GROUP BY status').fetchall()
+        return dict(rows)
 
-def save_to_supabase(articles: List[Dict], url: str, key: str, table_name: str = 'school_notices'):
-    """
-    上传数据到 Supabase
 
-    Args:
-        articles: 文章数据列表
-        url: Supabase URL
-        key: Supabase API Key
-        table_name: 目标表名（默认 school_notices）
-    """
-    if not create_client:
-        print("错误: 未安装 supabase 包，请运行: pip install supabase", file=sys.stderr)
+def backfill_listing(checkpoint: BackfillCheckpoint, category: int, limiter: RateLimiter,
+                     session: requests.Session):
+    """翻完一个分类的全部列表页，每页保存断点"""
+    page, done = checkpoint.category_state(category)
+    if done:
+        print(f"分类 {category} 列表已翻完，跳过", file=sys.stderr)
         return
 
-    print(f"\n连接 Supabase 数据库...", file=sys.stderr)
+    print(f"📜 回填分类 {category}（从第 {page} 页继续）...", file=sys.stderr)
+    while True:
+        limiter.wait()
+        try:
+            data = fetch_notice_page(session, category, page)
+        except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+            print(f"API 请求失败（分类 {category} 第 {page} 页），下次运行从此页继续: {e}", file=sys.stderr)
+            return
 
-    try:
-        supabase: Client = create_client(url, key)
+        if not data.get('success', False):
+            print(f"API 返回错误: {data.get('message', '未知错误')}", file=sys.stderr)
+            return
 
-        uploaded_count = 0
-        skipped_count = 0
+        items = data.get('list') or []
+        notices = parse_notice_items(items)
+        total = data.get('total', 0)
+        done = not items or page * PAGE_SIZE >= total
+        checkpoint.save_page(category, page, notices, done)
+        print(f"  分类 {category} 第 {page} 页: {len(notices)} 条（共 {total} 条）", file=sys.stderr)
 
-        for article in articles:
-            try:
-                # 检查是否已存在（基于 source_url 去重）
-                existing = supabase.table(table_name).select('id').eq('source_url', article['source_url']).execute()
+        if done:
+            return
+        page += 1
 
-                if existing.data:
-                    print(f"⏭️  跳过已存在: {article['title'][:25]}...", file=sys.stderr)
-                    skipped_count += 1
-                else:
-                    # 插入新数据
-                    supabase.table(table_name).insert(article).execute()
-                    print(f"✅ 上传成功: {article['title'][:25]}... [优先级: {article['priority']}]", file=sys.stderr)
-                    uploaded_count += 1
 
-            except Exception as e:
-                print(f"❌ 上传失败 ({article['title'][:20]}): {e}", file=sys.stderr)
+def backfill_notices(categories: List[int], checkpoint_path: str = DEFAULT_CHECKPOINT_PATH,
+                     workers: int = 3, rate: float = 1.0) -> BackfillCheckpoint:
+    """
+    全量回填：翻完所有分类的通知列表，并发抓取全部详情页
 
-        print(f"\n📊 上传统计: 新增 {uploaded_count} 条, 跳过 {skipped_count} 条", file=sys.stderr)
+    Args:
+        categories: 要回填的分类
+        checkpoint_path: 断点文件路径（中断后重跑同一命令即可继续）
+        workers: 详情页并发数
+        rate: 礼貌预算，对教务处站点的总请求速率上限（次/秒）
 
-    except Exception as e:
-        print(f"❌ Supabase 连接错误: {e}", file=sys.stderr)
+    Returns:
+        断点对象（可用 iter_articles() 读出全部记录）
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    checkpoint = BackfillCheckpoint(checkpoint_path)
+    limiter = RateLimiter(1.0 / rate)
+
+    # Step 1: 列表（顺序翻页，每页保存断点）；站点不可达时直接返回已有断点
+    if not HOSTS.probe(JW_API_URL):
+        print("❌ 教务处站点不可达，本次不回填，断点保持不变", file=sys.stderr)
+        return checkpoint
+    session = create_session()
+    for category in categories:
+        backfill_listing(checkpoint, category, limiter, session)
+
+    # Step 2: 详情（并发抓取，共用限速器，每条完成后保存断点）
+    pending = checkpoint.pending_notices()
+    print(f"\n📥 待抓取详情 {len(pending)} 条（并发 {workers}，限速 {rate} 次/秒）...", file=sys.stderr)
+
+    def fetch_one(notice: Dict) -> bool:
+        if HOSTS.is_open(notice['url']):
+            return False  # 站点熔断：保持待抓取状态，不计入失败次数
+        content, publish_date = fetch_notice_detail(notice['url'], max_retries=2, limiter=limiter)
+        if not content:
+            checkpoint.mark_failed(notice['id'])
+            return False
+        article = build_notice_article(notice, content, publish_date)
+        checkpoint.mark_done(notice['id'], article.to_dict())
+        return True
+
+    finished = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch_one, notice): notice for notice in pending}
+        for future in as_completed(futures):
+            finished += 1
+            notice = futures[future]
+            try:
+                ok = future.result()
+            except Exception as e:
+                checkpoint.mark_failed(notice['id'])
+                ok = False
+                print(f"❌ 处理错误: {e}", file=sys.stderr)
+            status = '✅' if ok else '⚠️'
+            print(f"[{finished}/{len(pending)}] {status} {notice['title'][:30]}", file=sys.stderr)
+
+    print(f"\n📊 回填状态: {checkpoint.stats()}", file=sys.stderr)
+    return checkpoint
 
 
 # ==================== 主函数 ====================
@@ -554,50 +943,173 @@ def main():
     parser.add_argument('--output', default='', help='输出 JSON 文件路径')
     parser.add_argument('--upload', action='store_true', help='上传到 Supabase')
     parser.add_argument('--table', default='school_notices', help='Supabase 表名（默认 school_notices）')
-
-    # Supabase 配置（与 GitHub 脚本保持一致）
-    default_url = "https://ovytvktzhuapvictznnr.supabase.co"
-    default_key = "sb_secret_3DFQXsH8RqIldbdJAVrC5Q_A_xtu9uh"
-
-    parser.add_argument('--supabase-url', default=default_url, help='Supabase Project URL')
-    parser.add_argument('--supabase-key', default=default_key, help='Supabase API Key')
+    parser.add_argument('--storage', choices=BACKENDS, default='supabase',
+                        help='上传后端：supabase、sqlite（本地文件）或 rest（PostgREST / 本地替身服务）')
+    parser.add_argument('--storage-path', default='', help='--storage sqlite 的数据库路径（默认 scripts/.cache/storage.db）')
+    parser.add_argument('--ai-queue', action='store_true',
+                        help='AI 摘要写入任务队列（需配合 --upload，由 summary_queue.py 回填）')
+    parser.add_argument('--queue-path', default='', help='摘要队列文件路径（默认 scripts/.cache/summary_queue.db）')
+    parser.add_argument('--backfill', action='store_true', help='全量回填模式：翻完所有分类的历史通知，可断点续传')
+    parser.add_argument('--concurrent', action='store_true',
+                        help='并发列表模式：同时抓取 --categories 各分类的多页列表，合并去重，遇到已入库的通知即停止翻页')
+    parser.add_argument('--categories', default='1,2,3,4,5,6', help='回填 / 并发列表的分类，逗号分隔（默认 1-6）')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT_PATH, help='回填断点文件路径')
+    parser.add_argument('--workers', type=int, default=3, help='回填详情页 / 并发列表的并发数（默认 3）')
+    parser.add_argument('--rate', type=float, default=1.0, help='回填 / 并发列表的礼貌预算：总请求速率上限（次/秒，默认 1）')
+    parser.add_argument('--images', action='store_true', help='下载正文图片并生成压缩缩略图，改写图片链接')
+    parser.add_argument('--image-dir', default='', help='图片资源目录（默认 scripts/.cache/images）')
+    parser.add_argument('--image-base-url', default='', help='图片资源访问前缀（自行部署的 CDN 地址）')
+    parser.add_argument('--image-bucket', default='',
+                        help='图片资源上传到该 Supabase Storage 公开存储桶，链接改写为桶地址（与 --image-base-url 二选一，都未指定时不处理图片）')
+    parser.add_argument('--index', action='store_true', help='写入本地全文检索索引')
+    parser.add_argument('--index-path', default='', help='检索索引文件路径（默认 scripts/.cache/search_index.db）')
+    parser.add_argument('--bundle', action='store_true', help='发布每日压缩内容包')
+    parser.add_argument('--bundle-dir', default='', help='内容包目录（默认 scripts/.cache/bundles）')
+    parser.add_argument('--bundle-bucket', default='',
+                        help='内容包同时上传到该 Supabase Storage 公开存储桶（需预先创建），App 从桶中下载')
+    parser.add_argument('--recommend', action='store_true',
+                        help='写入本地向量索引，并按与收藏的相似度计算 recommend_score（需先执行 add_recommend_score_column.sql）')
+    parser.add_argument('--embedding-path', default='', help='向量索引文件路径（默认 scripts/.cache/embeddings.npz）')
+    parser.add_argument('--reader-payload', action='store_true',
+                        help='阅读页预排版：入库时写入目录、分块偏移、字数与阅读时长（需先执行 add_reader_payload_column.sql）')
+    parser.add_argument('--journal', action='store_true',
+                        help='产出的文章追加写入本地日志，可离线回放、重新上传（article_journal.py）')
+    parser.add_argument('--journal-dir', default='', help='日志目录（默认 scripts/.cache/journal）')
+    parser.add_argument('--profile', action='store_true', help='剖析运行：各阶段 CPU/内存报告与火焰图折叠栈（scripts/.cache/profiles）')
+    parser.add_argument('--deadline', type=float, default=0,
+                        help='时间预算（秒）：按优先级处理，来不及的通知推迟到下次运行（推迟记录在 scripts/.cache/deferred）')
+
+    # Supabase 配置：默认取环境变量（与新闻脚本一致）
+    parser.add_argument('--supabase-url', default=os.environ.get('SUPABASE_URL'), help='Supabase Project URL')
+    parser.add_argument('--supabase-key', default=os.environ.get('SUPABASE_KEY'), help='Supabase API Key')
 
     args = parser.parse_args()
+    if args.profile:
+        PROFILER.start('fetch_scut_jw')
+    deadline = open_deadline(args.deadline, 'fetch_scut_jw')
+
+    # 上传时与库中已存记录对比，只更新变化的列
+    url = args.supabase_url or os.environ.get('SUPABASE_URL')
+    key = args.supabase_key or os.environ.get('SUPABASE_KEY')
+    tracker = None
+    if args.upload:
+        try:
+            tracker = ChangeTracker(open_storage(args.storage, url, key, args.storage_path), args.table)
+        except StorageError as e:
+            print(f"❌ 错误: {e}", file=sys.stderr)
+            print("请通过参数 --supabase-url/--supabase-key 或环境变量提供", file=sys.stderr)
 
-    # Step 1: 抓取通知列表
-    notices = fetch_notice_list(max_pages=args.pages, category=args.category)
+    if args.backfill:
+        # 全量回填：结果从断点库逐条读出
+        categories = [int(c) for c in args.categories.split(',') if c.strip()]
+        with PROFILER.stage('backfill'):
+            checkpoint = backfill_notices(categories, args.checkpoint, workers=args.workers, rate=args.rate)
+        articles = checkpoint.iter_articles()
+    else:
+        # Step 1: 抓取通知列表
+        with PROFILER.stage('listing'):
+            if args.concurrent:
+                categories = [int(c) for c in args.categories.split(',') if c.strip()]
+                notices = fetch_notice_lists(categories, max_pages=args.pages, workers=args.workers,
+                                             rate=args.rate, known=known_notice_ids(tracker) if tracker else None)
+            else:
+                notices = fetch_notice_list(max_pages=args.pages, category=args.category)
 
-    if not notices:
-        print("⚠️  未抓取到任何通知，请检查网络或网站结构是否变化", file=sys.stderr)
-        sys.exit(1)
+        if not notices:
+            print("⚠️  未抓取到任何通知，请检查网络或网站结构是否变化", file=sys.stderr)
+            sys.exit(1)
 
-    print(f"\n✅ 共抓取到 {len(notices)} 条通知", file=sys.stderr)
+        print(f"\n✅ 共抓取到 {len(notices)} 条通知", file=sys.stderr)
 
-    # Step 2: 处理通知详情
-    articles = process_notices(notices, limit=args.limit)
+        # Step 2: 处理通知详情（生成器，逐条产出）
+        queue = None
+        if args.ai_queue:
+            if tracker:
+                from summary_queue import SummaryQueue, DEFAULT_QUEUE_PATH
+                queue = SummaryQueue(args.queue_path or DEFAULT_QUEUE_PATH)
+            else:
+                print("⚠️ --ai-queue 需要配合 --upload 使用，已忽略", file=sys.stderr)
+
+        articles = PROFILER.wrap('fetch', process_notices(notices, limit=args.limit, tracker=tracker,
+                                                          queue=queue, table_name=args.table,
+                                                          deadline=deadline))
+
+    # 推荐打分：入库时就按与收藏的相似度算好 recommend_score
+    if args.recommend:
+        from embedding_index import recommend_articles, DEFAULT_EMBEDDING_PATH
+        articles = PROFILER.wrap('recommend', recommend_articles(
+            articles, args.table, tracker.client if tracker else None, args.embedding_path or DEFAULT_EMBEDDING_PATH))
+
+    # 只上传时全程流式处理；其余输出需要完整列表
+    if not args.upload or args.output or args.images or args.index or args.bundle:
+        articles = list(articles)
+
+    # 图片缩略图
+    if args.images:
+        from image_pipeline import process_article_images, DEFAULT_ASSET_DIR
+        image_bucket = None
+        if args.image_bucket:
+            from storage import open_bucket
+            try:
+                image_bucket = open_bucket(url, key, args.image_bucket)
+            except StorageError as e:
+                print(f"❌ 图片无法上传: {e}", file=sys.stderr)
+        with PROFILER.stage('images'):
+            process_article_images(articles, args.image_dir or DEFAULT_ASSET_DIR, args.image_base_url, bucket=image_bucket)
+
+    # 阅读页预排版：在图片链接改写之后计算，块偏移量对应最终入库的 content
+    # （上传时若沿用了库中的 AI 摘要、content 随之改变，ChangeTracker 会重新计算）
+    if args.reader_payload:
+        from reader_payload import attach_payloads
+        payloads = PROFILER.wrap('payload', attach_payloads(articles))
+        articles = list(payloads) if isinstance(articles, list) else payloads
+
+    # 本地检索索引
+    if args.index:
+        from search_index import index_articles, DEFAULT_INDEX_PATH
+        with PROFILER.stage('index'):
+            index_articles(articles, args.index_path or DEFAULT_INDEX_PATH)
+
+    # 每日内容包
+    if args.bundle:
+        from feed_bundles import publish_bundles, DEFAULT_BUNDLE_DIR
+        bucket = None
+        if args.bundle_bucket:
+            from storage import open_bucket
+            try:
+                bucket = open_bucket(url, key, args.bundle_bucket)
+            except StorageError as e:
+                print(f"❌ 内容包只写本地目录: {e}", file=sys.stderr)
+        with PROFILER.stage('bundle'):
+            publish_bundles(articles, args.bundle_dir or DEFAULT_BUNDLE_DIR, bucket=bucket)
+
+    # 本地日志：记录最终产出的文章，重新上传、迁移时回放，不必重新抓取和调用 LLM
+    if args.journal:
+        from article_journal import journal_articles, DEFAULT_JOURNAL_DIR
+        journaled = PROFILER.wrap('journal', journal_articles(articles, args.table, args.journal_dir or DEFAULT_JOURNAL_DIR))
+        articles = list(journaled) if isinstance(articles, list) else journaled
 
     # Step 3: 输出到文件
     if args.output:
         try:
-            with open(args.output, 'w', encoding='utf-8') as f:
-                json.dump(articles, f, indent=2, ensure_ascii=False)
+            with PROFILER.stage('output'), open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(to_dicts(articles), f, indent=2, ensure_ascii=False)
             print(f"💾 数据已保存到: {args.output}", file=sys.stderr)
         except IOError as e:
             print(f"❌ 文件保存失败: {e}", file=sys.stderr)
     elif not args.upload:
         # 不上传且不保存文件时，打印到标准输出
-        print(json.dumps(articles, indent=2, ensure_ascii=False))
+        with PROFILER.stage('output'):
+            print(json.dumps(to_dicts(articles), indent=2, ensure_ascii=False))
 
     # Step 4: 上传到 Supabase
-    if args.upload:
-        url = args.supabase_url or os.environ.get('SUPABASE_URL')
-        key = args.supabase_key or os.environ.get('SUPABASE_KEY')
+    if args.upload and tracker:
+        with PROFILER.stage('upload'):
+            save_to_supabase(articles, url, key, args.table, tracker)
 
-        if url and key:
-            save_to_supabase(articles, url, key, args.table)
-        else:
-            print("❌ 错误: 需要提供 Supabase URL 和 Key", file=sys.stderr)
-            print("请通过参数 --supabase-url/--supabase-key 或环境变量提供", file=sys.stderr)
+    if deadline:
+        deadline.save()
+    HOSTS.report()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+按站点的健康跟踪与熔断
+连续失败达到阈值后熔断该站点，本次运行内后续请求直接跳过；启动时先做一次廉价探测，
+不可达的站点只花几秒就被排除，而不是在每条请求上耗尽超时与重试
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+# ==================== 配置区 ====================
+
+FAILURE_THRESHOLD = 3   # 连续失败多少次后熔断
+CONNECT_TIMEOUT = 5     # 建连超时（秒）：不可达的站点在这里就失败
+READ_TIMEOUT = 30       # 读取超时（秒）
+PROBE_TIMEOUT = (3, 5)  # 启动探测的 (建连, 读取) 超时
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """站点已熔断（继承 RequestException，原有的网络异常处理会照常捕获）"""
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+# ==================== 核心功能 ====================
+
+class HostHealth:
+    """
+    按站点（host）统计连续失败次数的熔断器
+
+    - 连接失败、超时、5xx 计为失败；有任何其他响应（包括 4xx）说明站点可达，清零计数
+    - 连续失败达到阈值后熔断；cooldown 为 None 时本次运行内不再恢复，
+      否则冷却期过后放行一次试探请求（成功则恢复）
+    - 线程安全，并发抓取时共用一个实例
+    - 未指定 session 的请求走共用的连接池（同一站点复用 TCP/TLS 连接，常驻模式下跨运行保持）
+    """
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, cooldown: Optional[float] = None):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.session = requests.Session()
+        self.lock = threading.Lock()
+        self.failures: Dict[str, int] = {}
+        self.opened_at: Dict[str, float] = {}
+        self.skipped: Dict[str, int] = {}
+
+    def allow(self, url: str) -> bool:
+        """该站点当前是否允许请求（熔断时返回 False 并计入跳过次数）"""
+        host = host_of(url)
+        with self.lock:
+            opened = self.opened_at.get(host)
+            if opened is None:
+                return True
+            if self.cooldown is not None and time.monotonic() - opened >= self.cooldown:
+                # 半开：放行一次试探，失败时重新计时
+                self.opened_at[host] = time.monotonic()
+                return True
+            self.skipped[host] = self.skipped.get(host, 0) + 1
+            return False
+
+    def record_success(self, url: str):
+        host = host_of(url)
+        with self.lock:
+            self.failures.pop(host, None)
+            if self.opened_at.pop(host, None) is not None:
+                print(f"🟢 {host} 已恢复", file=sys.stderr)
+
+    def record_failure(self, url: str, error=None):
+        host = host_of(url)
+        with self.lock:
+            self.failures[host] = self.failures.get(host, 0) + 1
+            if self.failures[host] >= self.failure_threshold and host not in self.opened_at:
+                self.opened_at[host] = time.monotonic()
+                reason = f": {error}" if error else ''
+                print(f"🔴 {host} 连续失败 {self.failures[host]} 次，本次运行内跳过该站点{reason}", file=sys.stderr)
+
+    def trip(self, url: str, reason: str = ''):
+        """直接熔断某个站点（探测失败时使用）"""
+        host = host_of(url)
+        with self.lock:
+            self.failures[host] = self.failure_threshold
+            if host in self.opened_at:
+                return
+            self.opened_at[host] = time.monotonic()
+        print(f"🔴 {host} 不可达，本次运行内跳过该站点: {reason}", file=sys.stderr)
+
+    def is_open(self, url: str) -> bool:
+        with self.lock:
+            return host_of(url) in self.opened_at
+
+    def request(self, method: str, url: str, session: Optional[requests.Session] = None,
+                **kwargs) -> requests.Response:
+        """
+        经熔断器发出请求
+
+        Raises:
+            CircuitOpenError: 站点已熔断，未发出请求
+            requests.RequestException: 请求失败（已计入失败次数）
+        """
+        if not self.allow(url):
+            raise CircuitOpenError(f"{host_of(url)} 已熔断，跳过请求")
+
+        kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+        try:
+            response = (session or self.session).request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self.record_failure(url, e)
+            raise
+
+        if response.status_code >= 500:
+            self.record_failure(url, f"HTTP {response.status_code}")
+        else:
+            self.record_success(url)
+        return response
+
+    def get(self, url: str, session: Optional[requests.Session] = None, **kwargs) -> requests.Response:
+        return self.request('GET', url, session, **kwargs)
+
+    def post(self, url: str, session: Optional[requests.Session] = None, **kwargs) -> requests.Response:
+        return self.request('POST', url, session, **kwargs)
+
+    def probe(self, url: str) -> bool:
+        """
+        廉价探测：短超时的 HEAD 请求，收到任何 HTTP 响应即视为可达
+
+        不可达时直接熔断该站点。
+        """
+        if not self.allow(url):
+            return False
+        try:
+            requests.head(url, timeout=PROBE_TIMEOUT, allow_redirects=False,
+                          headers={'User-Agent': 'Mozilla/5.0'})
+        except requests.RequestException as e:
+            self.trip(url, f"探测失败 ({type(e).__name__})")
+            return False
+        return True
+
+    def probe_all(self, urls: Iterable[str]) -> Dict[str, bool]:
+        """并发探测多个站点（每个站点只探测一次），总耗时约为一次探测超时"""
+        by_host = {}
+        for url in urls:
+            by_host.setdefault(host_of(url), url)
+        if not by_host:
+            return {}
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=min(8, len(by_host))) as executor:
+            results = dict(zip(by_host, executor.map(self.probe, by_host.values())))
+        reachable = sum(results.values())
+        print(f"🩺 站点探测: {reachable}/{len(results)} 可达（{time.monotonic() - start:.1f} 秒）", file=sys.stderr)
+        return results
+
+    def reset(self):
+        """清空熔断状态与统计（常驻模式每次运行前调用，与独立进程运行的语义一致；连接池保留）"""
+        with self.lock:
+            self.failures.clear()
+            self.opened_at.clear()
+            self.skipped.clear()
+
+    def report(self):
+        """输出本次运行中被熔断的站点及跳过的请求数"""
+        with self.lock:
+            opened = list(self.opened_at)
+            skipped = dict(self.skipped)
+        for host in opened:
+            print(f"🔴 已熔断: {host}（跳过 {skipped.get(host, 0)} 次请求）", file=sys.stderr)
+
+
+# 抓取脚本共用的默认实例（一次运行一个进程，熔断状态在进程内共享）
+HOSTS = HostHealth()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+文章图片处理流水线
+提取正文中的图片链接，并发下载、按内容哈希去重、生成压缩缩略图，并把 Markdown 中的链接改写为优化后的资源。
+资源需发布到 App 能访问的位置：上传到 Supabase Storage 存储桶，或由 --image-base-url 指向自行部署的 CDN；
+两者都未指定时不处理图片，保留原链接
+"""
+
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+import requests
+
+# Pillow 为可选依赖：未安装时只做去重缓存，不做缩放压缩
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# ==================== 配置区 ====================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ASSET_DIR = os.path.join(SCRIPT_DIR, '.cache', 'images')
+
+MAX_WORKERS = 4                    # 并发下载数
+MAX_IMAGE_BYTES = 15 * 1024 * 1024  # 超过该大小的原图不处理
+THUMBNAIL_WIDTH = 960              # 缩略图最大宽度（像素）
+WEBP_QUALITY = 80
+DOWNLOAD_TIMEOUT = 15
+ASSET_CACHE_SECONDS = 365 * 24 * 3600  # 资源以内容哈希命名，上传后永不改变
+
+# Markdown 图片 ![alt](url "title") 与 HTML <img src="url">
+MARKDOWN_IMAGE = re.compile(r'!\[[^\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+"[^"]*")?\s*\)')
+HTML_IMAGE = re.compile(r'<img\b[^>]*?\bsrc=["\']([^"\']+)["\']', re.IGNORECASE)
+
+
+# ==================== 辅助函数 ====================
+
+def extract_image_urls(markdown: str) -> List[str]:
+    """按出现顺序提取正文中的图片链接（去重）"""
+    if not markdown:
+        return []
+    urls = [m.group(1) for m in MARKDOWN_IMAGE.finditer(markdown)]
+    urls += [m.group(1) for m in HTML_IMAGE.finditer(markdown)]
+    return [u for u in dict.fromkeys(urls) if not u.startswith('data:')]
+
+
+def replace_image_urls(markdown: str, replacements: Dict[str, str]) -> str:
+    """只替换图片语法中完整匹配的链接（按前缀替换会把更长的同前缀链接改坏）"""
+    def swap(match):
+        new_url = replacements.get(match.group(1))
+        if not new_url:
+            return match.group(0)
+        start, end = match.start(1) - match.start(), match.end(1) - match.start()
+        return match.group(0)[:start] + new_url + match.group(0)[end:]
+
+    markdown = MARKDOWN_IMAGE.sub(swap, markdown)
+    return HTML_IMAGE.sub(swap, markdown)
+
+
+def make_thumbnail(data: bytes) -> tuple[bytes, str]:
+    """
+    生成缩略图：限制最大宽度并重新压缩为 WebP
+
+    Returns:
+        (图片字节, 扩展名)；无法处理时返回原图
+    """
+    if Image is None:
+        return data, 'bin'
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            if getattr(img, 'is_animated', False):
+                return data, (img.format or 'bin').lower()
+
+            img.load()
+            if img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+            if img.width > THUMBNAIL_WIDTH:
+                height = max(1, round(img.height * THUMBNAIL_WIDTH / img.width))
+                img = img.resize((THUMBNAIL_WIDTH, height), Image.LANCZOS)
+
+            out = io.BytesIO()
+            img.save(out, format='WEBP', quality=WEBP_QUALITY, method=4)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        print(f"  ⚠️ 图片解码失败，保留原图: {e}", file=sys.stderr)
+        return data, 'bin'
+
+    # 重新压缩反而变大时保留原图
+    if out.tell() >= len(data):
+        return data, 'bin'
+    return out.getvalue(), 'webp'
+
+
+# ==================== 核心功能 ====================
+
+class ImagePipeline:
+    """
+    图片下载与缩略图缓存
+
+    缓存文件记录 原始 URL -> 资源文件，资源文件以内容哈希命名，
+    同一张图片只会下载和压缩一次，不同 URL 指向同一内容时共用一个资源。
+    指定 bucket 时资源上传到存储桶（已上传的记录在缓存中），链接改写为桶的公开地址。
+    """
+
+    def __init__(self, asset_dir: str = DEFAULT_ASSET_DIR, base_url: str = '', max_workers: int = MAX_WORKERS,
+                 bucket=None):
+        self.asset_dir = asset_dir
+        self.bucket = bucket
+        self.base_url = (base_url or (bucket.public_url() if bucket else '')).rstrip('/')
+        self.max_workers = max_workers
+        self.cache_path = os.path.join(asset_dir, 'cache.json')
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+        os.makedirs(asset_dir, exist_ok=True)
+        self.cache: Dict[str, Dict] = {'urls': {}, 'hashes': {}}
+        if os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    self.cache = json.load(f)
+            except (IOError, json.JSONDecodeError) as e:
+                print(f"⚠️ 图片缓存读取失败，重新建立: {e}", file=sys.stderr)
+        self.uploaded = set(self.cache.get('uploaded', []))
+
+    def save(self):
+        self.cache['uploaded'] = sorted(self.uploaded)
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.cache, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def asset_url(self, file_name: str) -> str:
+        return f"{self.base_url}/{file_name}" if self.base_url else file_name
+
+    def _cached(self, url: str) -> Optional[str]:
+        entry = self.cache['urls'].get(url)
+        if entry and os.path.exists(os.path.join(self.asset_dir, entry['file'])):
+            return entry['file']
+        return None
+
+    def publish(self, file_name: Optional[str]) -> Optional[str]:
+        """把资源上传到存储桶（已上传的跳过）；上传失败返回 None，链接保持原样"""
+        if not file_name or self.bucket is None or file_name in self.uploaded:
+            return file_name
+        from storage import StorageError
+        content_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+        try:
+            with open(os.path.join(self.asset_dir, file_name), 'rb') as f:
+                self.bucket.upload(file_name, f.read(), content_type, ASSET_CACHE_SECONDS)
+        except (StorageError, IOError, OSError) as e:
+            print(f"  ❌ 图片上传失败: {file_name} ({e})", file=sys.stderr)
+            return None
+        with self.lock:
+            self.uploaded.add(file_name)
+        return file_name
+
+    def process_url(self, url: str) -> Optional[str]:
+        """下载并处理单张图片（指定存储桶时随后上传），返回资源文件名；失败返回 None"""
+        return self.publish(self._process_url(url))
+
+    def _process_url(self, url: str) -> Optional[str]:
+        cached = self._cached(url)
+        if cached:
+            return cached
+
+        try:
+            response = self.session.get(url, timeout=DOWNLOAD_TIMEOUT, stream=True)
+            response.raise_for_status()
+            data = response.raw.read(MAX_IMAGE_BYTES + 1, decode_content=True)
+            if len(data) > MAX_IMAGE_BYTES:
+                print(f"  ⚠️ 图片过大，跳过: {url}", file=sys.stderr)
+                return None
+        except requests.RequestException as e:
+            print(f"  ❌ 图片下载失败: {url} ({e})", file=sys.stderr)
+            return None
+
+        digest = hashlib.sha256(data).hexdigest()
+        with self.lock:
+            file_name = self.cache['hashes'].get(digest)
+        if file_name and os.path.exists(os.path.join(self.asset_dir, file_name)):
+            # 内容相同的图片已处理过
+            with self.lock:
+                self.cache['urls'][url] = {'file': file_name, 'sha256': digest}
+            return file_name
+
+        thumbnail, ext = make_thumbnail(data)
+        file_name = f"{digest[:2]}/{digest[:32]}.{ext}"
+        path = os.path.join(self.asset_dir, file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(thumbnail)
+
+        with self.lock:
+            self.cache['hashes'][digest] = file_name
+            self.cache['urls'][url] = {'file': file_name, 'sha256': digest}
+        print(f"  🖼️ {len(data) / 1024:.0f} KB -> {len(thumbnail) / 1024:.0f} KB: {url}", file=sys.stderr)
+        return file_name
+
+    def process_articles(self, articles: List[Dict]) -> int:
+        """
+        处理一批文章的图片并改写 content 中的链接
+
+        Returns:
+            改写的图片链接数
+        """
+        if not self.base_url:
+            # 相对路径的资源只存在于本机缓存目录，App 无法访问，改写后反而打不开
+            print("⚠️ 未指定图片存储桶或 --image-base-url，跳过图片处理，保留原链接", file=sys.stderr)
+            return 0
+
+        # 收集所有图片（相对链接按原文地址补全）
+        article_urls = []
+        pending = {}
+        for article in articles:
+            mapping = {}
+            for raw in extract_image_urls(article.get('content', '')):
+                absolute = urljoin(article.get('source_url') or '', raw)
+                if self.base_url and absolute.startswith(self.base_url + '/'):
+                    continue  # 已改写过的资源链接
+                if absolute.startswith(('http://', 'https://')):
+                    mapping[raw] = absolute
+                    pending[absolute] = None
+            article_urls.append(mapping)
+
+        if not pending:
+            return 0
+
+        print(f"\n🖼️ 开始处理图片（共 {len(pending)} 张，并发 {self.max_workers}）...", file=sys.stderr)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            urls = list(pending)
+            for url, file_name in zip(urls, executor.map(self.process_url, urls)):
+                pending[url] = file_name
+        self.save()
+
+        rewritten = 0
+        for article, mapping in zip(articles, article_urls):
+            replacements = {raw: self.asset_url(pending[absolute])
+                            for raw, absolute in mapping.items() if pending.get(absolute)}
+            if replacements:
+                article['content'] = replace_image_urls(article.get('content', ''), replacements)
+                rewritten += len(replacements)
+
+        print(f"✅ 图片处理完成，改写 {rewritten} 个链接", file=sys.stderr)
+        return rewritten
+
+
+def process_article_images(articles: List[Dict], asset_dir: str = DEFAULT_ASSET_DIR,
+                           base_url: str = '', max_workers: int = MAX_WORKERS, bucket=None) -> int:
+    """供抓取脚本调用的入口（bucket 为 storage.BucketClient）"""
+    if Image is None:
+        print("⚠️ 未安装 Pillow，图片只去重缓存不压缩: pip install pillow", file=sys.stderr)
+    return ImagePipeline(asset_dir, base_url, max_workers, bucket).process_articles(articles)
+
+
+# ==================== 主函数 ====================
+
+def main():
+    """命令行：处理抓取脚本 --output 生成的 JSON 文件并原地改写"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='文章图片处理流水线')
+    parser.add_argument('files', nargs='+', help='JSON 文件路径')
+    parser.add_argument('--image-dir', default=DEFAULT_ASSET_DIR, help='资源输出目录')
+    parser.add_argument('--image-base-url', default='', help='资源访问前缀（自行部署的 CDN 地址；指定存储桶时默认为桶的公开地址）')
+    parser.add_argument('--image-bucket', default='', help='上传资源的 Supabase Storage 公开存储桶')
+    parser.add_argument('--supabase-url', default=os.environ.get('SUPABASE_URL'), help='Supabase URL')
+    parser.add_argument('--supabase-key', default=os.environ.get('SUPABASE_KEY'), help='Supabase Key')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help='并发下载数')
+    args = parser.parse_args()
+
+    bucket = None
+    if args.image_bucket:
+        from storage import open_bucket
+        bucket = open_bucket(args.supabase_url, args.supabase_key, args.image_bucket)
+
+    for path in args.files:
+        with open(path, 'r', encoding='utf-8') as f:
+            articles = json.load(f)
+        process_article_images(articles, args.image_dir, args.image_base_url, args.workers, bucket)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(articles, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,702 @@
+#!/usr/bin/env python3
+"""
+本地模拟服务实验室
+在本机为 GitHub 搜索、RSS 订阅源、华工教务处、硅基流动 chat/completions 和 Supabase PostgREST
+各启动一个模拟服务（独立端口，熔断按站点统计），可配置延迟、错误率和限流，
+通过环境变量把真实抓取脚本指向这些服务，端到端压测整条流水线
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, parse_qsl, urlsplit
+
+from storage import LAB_URL_ENV, SQLiteClient, StandInHandler
+
+# ==================== 配置区 ====================
+
+SERVICES = ('github', 'rss', 'jw', 'llm', 'supabase')
+DEFAULT_PORT_BASE = 18080   # 各服务依次占用 PORT_BASE + 0..4
+
+# 默认延迟（毫秒）：接近真实服务的典型响应时间
+DEFAULT_LATENCY = {'github': 300, 'rss': 200, 'jw': 400, 'llm': 3000, 'supabase': 80}
+JITTER = 0.5                # 延迟在 ±50% 范围内均匀抖动
+
+# scale=1 时各服务的数据量（约为当前每日抓取量的上限），--scale 按倍数放大
+BASE_VOLUME = {'github_repos': 1000, 'feed_items': 50, 'jw_notices': 200}
+
+SEARCH_RESULT_CAP = 1000    # 与 GitHub 一致：单个查询最多返回 1000 条
+LAB_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)  # 模拟数据的"当前时间"，固定以便重复运行得到相同时间戳
+GRAPHQL_POINTS = 5000       # GraphQL 每小时点数（与 GitHub 一致），--graphql-points 可调低以测试点数耗尽
+
+# 批量查询里的仓库别名：rN: repository(owner: $oN, name: $nN)
+GRAPHQL_ALIAS = re.compile(r'(\w+):\s*repository\(owner:\s*\$(\w+),\s*name:\s*\$(\w+)\)')
+
+
+class ServiceConfig:
+    """单个服务的故障注入配置"""
+
+    def __init__(self, latency_ms: float, error_rate: float = 0.0, rate_limit: float = 0.0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit    # 每秒请求数上限（令牌桶，突发量同速率），0 表示不限
+        self.tokens = rate_limit
+        self.refilled = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take_token(self) -> bool:
+        if self.rate_limit <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate_limit, self.tokens + (now - self.refilled) * self.rate_limit)
+            self.refilled = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def delay(self) -> float:
+        return self.latency_ms / 1000 * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+class ServiceStats:
+    """按服务统计的请求数、状态码与服务端耗时"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.statuses = Counter()
+        self.injected = Counter()
+        self.durations: List[float] = []
+
+    def record(self, status: int, duration: float, injected: Optional[str] = None):
+        with self.lock:
+            self.statuses[status] += 1
+            self.durations.append(duration)
+            if injected:
+                self.injected[injected] += 1
+
+
+# ==================== 模拟数据 ====================
+
+SIMPLIFIED = [
+    '国家统计局公布的数据显示，第三季度国内生产总值同比增长4.8%，略低于市场预期。',
+    '分析人士指出，房地产市场持续低迷和消费疲软仍是拖累经济的主要因素。',
+    '人工智能公司发布新一代大语言模型，称其在推理和编程任务上明显优于此前版本。',
+    '联合国气候变化大会开幕，各国代表将就化石燃料逐步退出的时间表展开谈判。',
+    '芯片出口管制进一步收紧，多家半导体企业下调了全年营收预期。',
+]
+TRADITIONAL = [
+    '國家統計局公佈的數據顯示，第三季度國內生產總值同比增長4.8%，略低於市場預期。',
+    '分析人士指出，房地產市場持續低迷和消費疲軟仍是拖累經濟的主要因素。',
+    '人工智能公司發佈新一代大語言模型，稱其在推理和編程任務上明顯優於此前版本。',
+]
+NOTICE_LINES = [
+    '各学院：根据学校本科教学工作安排，现将有关事项通知如下。',
+    '请各位同学于规定时间内登录教务系统完成选课，逾期不再受理。',
+    '微电子学院、集成电路学院相关专业学生请特别留意考试安排调整。',
+    '如有疑问，请联系所在学院教务办公室。',
+]
+TOPICS = ['llm', 'ai', 'agent', 'cli', 'rust', 'python', 'typescript', 'devtools', 'rag', 'database']
+LANGUAGES = ['Python', 'TypeScript', 'Rust', 'Go', 'JavaScript', None]
+
+
+def _seeded(*parts) -> random.Random:
+    digest = hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+    return random.Random(int(digest[:12], 16))
+
+
+class LabData:
+    """按编号确定性生成的模拟数据（同一编号每次生成相同内容，便于条件请求与去重测试）"""
+
+    def __init__(self, scale: float = 1.0):
+        self.now = LAB_EPOCH
+        self.clock_shift = LAB_EPOCH - datetime.now(timezone.utc)   # 真实时间 → 模拟时间
+        self.repo_count = int(BASE_VOLUME['github_repos'] * scale)
+        self.feed_items = int(BASE_VOLUME['feed_items'] * scale)
+        self.jw_notices = int(BASE_VOLUME['jw_notices'] * scale)
+        # 仓库按 Stars 降序编号，创建时间均匀分布在最近 30 天
+        self.repo_created = [self.now - timedelta(seconds=_seeded('repo', i).uniform(0, 30 * 86400))
+                             for i in range(self.repo_count)]
+
+    def repo(self, i: int, base_url: str) -> Dict:
+        rng = _seeded('repo', i)
+        owner = f'user{i % 997}'
+        name = f'project-{i}'
+        created = self.repo_created[i]
+        language = rng.choice(LANGUAGES)
+        return {
+            'id': 10_000_000 + i,
+            'name': name,
+            'full_name': f'{owner}/{name}',
+            'html_url': f'https://github.com/{owner}/{name}',
+            'description': f"{rng.choice(['An AI agent', 'A fast CLI', 'A RAG toolkit', 'A database', 'An awesome list'])} "
+                           f"for {rng.choice(TOPICS)} workflows (#{i})",
+            'language': language,
+            'stargazers_count': max(101, int(200_000 / (i + 1) ** 0.6)),
+            'forks_count': rng.randint(0, 5000),
+            'open_issues_count': rng.randint(0, 300),
+            'created_at': created.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'updated_at': self.now.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'pushed_at': (created + timedelta(days=rng.uniform(0, 3))).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'topics': rng.sample(TOPICS, 3),
+            'owner': {'login': owner, 'html_url': f'https://github.com/{owner}'},
+            'url': f'{base_url}/repos/{owner}/{name}',
+        }
+
+    def repo_index(self, full_name: str) -> Optional[int]:
+        """owner/project-N -> N（不存在的仓库返回 None）"""
+        owner, _, name = full_name.partition('/')
+        number = name[len('project-'):] if name.startswith('project-') else ''
+        if not number.isdigit() or int(number) >= self.repo_count or owner != f'user{int(number) % 997}':
+            return None
+        return int(number)
+
+    def repo_node(self, i: int, base_url: str) -> Dict:
+        """GraphQL Repository 节点（字段与 repo_graphql.REPO_FRAGMENT 对应）"""
+        repo = self.repo(i, base_url)
+        rng = _seeded('release', i)
+        release = None
+        if rng.random() < 0.7:
+            published = min(self.now, self.repo_created[i] + timedelta(days=rng.uniform(0, 3)))
+            release = {'tagName': f'v0.{rng.randint(1, 9)}.{rng.randint(0, 20)}', 'name': None,
+                       'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ')}
+        return {
+            'nameWithOwner': repo['full_name'],
+            'url': repo['html_url'],
+            'description': repo['description'],
+            'stargazerCount': repo['stargazers_count'],
+            'forkCount': repo['forks_count'],
+            'pushedAt': repo['pushed_at'],
+            'updatedAt': repo['updated_at'],
+            'primaryLanguage': {'name': repo['language']} if repo['language'] else None,
+            'issues': {'totalCount': repo['open_issues_count']},
+            'repositoryTopics': {'nodes': [{'topic': {'name': topic}} for topic in repo['topics']]},
+            'latestRelease': release,
+            'readme0': {'text': self.readme(repo['full_name'])},
+            'readme1': None, 'readme2': None, 'readme3': None,
+        }
+
+    def readme(self, full_name: str) -> str:
+        rng = _seeded('readme', full_name)
+        sections = '\n\n'.join(f"## {rng.choice(['Features', 'Usage', 'Install', 'Why'])}\n\n"
+                               + ' '.join(rng.choice(['Fast.', 'Typed.', 'Local-first.', 'Tested.', 'Small.'])
+                                          for _ in range(40))
+                               for _ in range(4))
+        return f"# {full_name}\n\n[![ci](https://img.shields.io/x)](https://ci)\n\n{sections}\n"
+
+    def feed(self, name: str, base_url: str) -> bytes:
+        items = []
+        for i in range(self.feed_items):
+            rng = _seeded('feed', name, i)
+            lines = TRADITIONAL if 'tw' in name or 'hk' in name else SIMPLIFIED
+            body = ''.join(f'<p>{rng.choice(lines)}</p>' for _ in range(rng.randint(6, 20)))
+            published = self.now - timedelta(hours=i)
+            items.append(
+                f"<item><title>{rng.choice(lines)[:20]} #{i}</title>"
+                f"<link>{base_url}/rss/{name}/{i}</link>"
+                f"<description><![CDATA[{body}]]></description>"
+                f"<pubDate>{format_datetime(published)}</pubDate></item>"
+            )
+        return (f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+                f'<title>{name}</title>{"".join(items)}</channel></rss>').encode('utf-8')
+
+    def feed_article(self, name: str, i: int) -> bytes:
+        """条目链接指向的原文页：订阅源里的段落之后还有后续正文，外面包着导航、侧栏、相关推荐和页脚"""
+        rng = _seeded('feed', name, i)
+        lines = TRADITIONAL if 'tw' in name or 'hk' in name else SIMPLIFIED
+        paragraphs = [rng.choice(lines) for _ in range(rng.randint(6, 20))]
+        title = rng.choice(lines)[:20]
+        rest = _seeded('feed-article', name, i)
+        paragraphs += [rest.choice(lines) for _ in range(rest.randint(8, 24))]
+        related = ''.join(f'<li><a href="/rss/{name}/{j}">{rest.choice(lines)[:24]}</a></li>' for j in range(8))
+        return (f'<!DOCTYPE html><html><head><title>{title}</title><script>var tracker = "x";</script></head><body>'
+                f'<nav><a href="/">首页</a> <a href="/world">国际</a> <a href="/china">中国</a></nav>'
+                f'<div class="page"><div class="main"><article><h1>{title} #{i}</h1>'
+                f'<div class="byline">{name} · {(self.now - timedelta(hours=i)).strftime("%Y-%m-%d")}</div>'
+                f'{"".join(f"<p>{p}</p>" for p in paragraphs)}'
+                f'<div class="share-tools"><a href="#">分享到微博</a> <a href="#">微信</a></div></article>'
+                f'<div class="comments"><p>网友评论：{rest.choice(lines)}</p></div></div>'
+                f'<aside class="sidebar"><h3>热门</h3><ul>{related}</ul></aside></div>'
+                f'<div class="related"><ul>{related}</ul></div>'
+                f'<footer><p>© {name} 版权所有，未经授权不得转载。</p></footer></body></html>').encode('utf-8')
+
+    def notice(self, i: int) -> Dict:
+        rng = _seeded('notice', i)
+        day = self.now - timedelta(days=i // 3)
+        return {
+            'id': 90_000 + i,
+            'title': f"关于{rng.choice(['选课', '考试安排', '推免', '实习', '国际交流'])}的通知（{i}）",
+            'createTime': day.strftime('%y.%m.%d'),
+            'tag': i % 6 + 1,
+        }
+
+    def notice_page(self, notice_id: int) -> bytes:
+        rng = _seeded('notice-page', notice_id)
+        paragraphs = ''.join(f'<p>{rng.choice(NOTICE_LINES)}</p>' for _ in range(rng.randint(5, 25)))
+        date = (self.now - timedelta(days=(notice_id - 90_000) // 3)).strftime('%Y-%m-%d')
+        return (f'<html><body><nav>导航</nav><span class="publish-date">{date}</span>'
+                f'<div class="article-content">{paragraphs}</div></body></html>').encode('utf-8')
+
+
+# ==================== 服务 ====================
+
+class LabHandler(BaseHTTPRequestHandler):
+    """所有模拟服务的基类：限流 → 延迟 → 错误注入 → 正常响应"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    throttle_status = 429
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def lab(self) -> 'MockLab':
+        return self.server.lab
+
+    @property
+    def config(self) -> ServiceConfig:
+        return self.lab.configs[self.server.service]
+
+    def send(self, status: int, body: bytes = b'', content_type: str = 'application/json; charset=utf-8',
+             headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+        self._status = status
+
+    def send_json(self, status: int, data, headers: Optional[Dict[str, str]] = None):
+        self.send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'), headers=headers)
+
+    def read_body(self) -> bytes:
+        if getattr(self, '_request_body', None) is None:
+            self._request_body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        return self._request_body
+
+    def inject(self) -> bool:
+        """执行故障注入；返回 False 表示已经以限流 / 错误响应，不再处理"""
+        self._request_body = None
+        config = self.config
+        if not config.take_token():
+            self.read_body()
+            self._injected = 'throttled'
+            self.send_json(self.throttle_status, {'message': 'rate limit exceeded'},
+                           headers={'Retry-After': '1', 'X-RateLimit-Remaining': '0'})
+            return False
+
+        time.sleep(config.delay())
+        if config.error_rate and random.random() < config.error_rate:
+            self.read_body()
+            self._injected = 'error'
+            self.send_json(random.choice((500, 502, 503)), {'message': 'injected failure'})
+            return False
+        return True
+
+    def dispatch(self, method):
+        started = time.monotonic()
+        self._status, self._injected = 0, None
+        try:
+            if method == 'HEAD':
+                # 启动探测：只要站点可达即可，不做故障注入
+                self.send(200)
+            elif self.inject():
+                getattr(self, f'handle_{method.lower()}')()
+        finally:
+            self.lab.stats[self.server.service].record(self._status, time.monotonic() - started, self._injected)
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def do_PATCH(self):
+        self.dispatch('PATCH')
+
+    def do_DELETE(self):
+        self.dispatch('DELETE')
+
+    def do_HEAD(self):
+        self.dispatch('HEAD')
+
+    def handle_get(self):
+        self.send_json(404, {'message': 'not found'})
+
+    handle_post = handle_patch = handle_delete = handle_get
+
+
+class GitHubHandler(LabHandler):
+    """/search/repositories、/repos/{owner}/{repo}/readme 与 /graphql（仅支持批量仓库查询）"""
+
+    throttle_status = 403   # GitHub 的次级限流返回 403
+
+    def handle_get(self):
+        parts = urlsplit(self.path)
+        if parts.path == '/search/repositories':
+            return self.search(parse_qs(parts.query))
+        segments = parts.path.strip('/').split('/')
+        if len(segments) == 4 and segments[0] == 'repos' and segments[3] == 'readme':
+            return self.readme(f'{segments[1]}/{segments[2]}')
+        super().handle_get()
+
+    def search(self, params: Dict[str, List[str]]):
+        query = params.get('q', [''])[0]
+        per_page = min(int(params.get('per_page', ['30'])[0]), 100)
+        page = int(params.get('page', ['1'])[0])
+        if page * per_page > SEARCH_RESULT_CAP:
+            return self.send_json(422, {'message': 'Only the first 1000 search results are available'})
+
+        low, high = datetime.min.replace(tzinfo=timezone.utc), datetime.max.replace(tzinfo=timezone.utc)
+        for term in query.split():
+            if term.startswith('created:'):
+                value = term[len('created:'):]
+                if value.startswith('>'):
+                    low = datetime.fromisoformat(value[1:]).replace(tzinfo=timezone.utc)
+                elif '..' in value:
+                    start, end = value.split('..')
+                    low = datetime.fromisoformat(start).replace(tzinfo=timezone.utc)
+                    high = datetime.fromisoformat(end).replace(tzinfo=timezone.utc)
+
+        # 客户端按真实时间计算 created 区间，平移到 LAB_EPOCH 所在的时间轴再匹配
+        data = self.lab.data
+        if low != datetime.min.replace(tzinfo=timezone.utc):
+            low += data.clock_shift
+        if high != datetime.max.replace(tzinfo=timezone.utc):
+            high += data.clock_shift
+        matches = [i for i, created in enumerate(data.repo_created) if low <= created <= high]
+        window = matches[(page - 1) * per_page:page * per_page]
+        base_url = f'http://{self.headers.get("Host")}'
+        self.send_json(200, {
+            'total_count': len(matches),
+            'incomplete_results': False,
+            'items': [data.repo(i, base_url) for i in window],
+        })
+
+    def readme(self, full_name: str):
+        text = self.lab.data.readme(full_name).encode('utf-8')
+        etag = f'"{hashlib.md5(text).hexdigest()}"'
+        if self.headers.get('If-None-Match') == etag:
+            return self.send(304, headers={'ETag': etag})
+        self.send(200, text, 'text/plain; charset=utf-8', headers={'ETag': etag})
+
+    def handle_post(self):
+        if urlsplit(self.path).path != '/graphql':
+            return super().handle_post()
+        payload = json.loads(self.read_body() or b'{}')
+        query, variables = payload.get('query', ''), payload.get('variables') or {}
+        aliases = GRAPHQL_ALIAS.findall(query)
+        if not aliases:
+            return self.send_json(200, {'errors': [{'message': 'unsupported query'}]})
+
+        # 计费与 GitHub 一致：每个仓库的 issues 与 repositoryTopics 两个连接各算一次请求，/100 取整，最少 1 点
+        cost = max(1, round(len(aliases) * 2 / 100))
+        lab = self.lab
+        with lab.graphql_lock:
+            if lab.graphql_points < cost:
+                return self.send_json(403, {'message': 'API rate limit exceeded'},
+                                      headers={'X-RateLimit-Remaining': '0'})
+            lab.graphql_points -= cost
+            remaining = lab.graphql_points
+
+        data = lab.data
+        base_url = f'http://{self.headers.get("Host")}'
+        result = {'rateLimit': {'cost': cost, 'remaining': remaining,
+                                'resetAt': (datetime.now(timezone.utc) + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M:%SZ')}}
+        errors = []
+        for alias, owner_var, name_var in aliases:
+            full_name = f"{variables.get(owner_var, '')}/{variables.get(name_var, '')}"
+            i = data.repo_index(full_name)
+            result[alias] = None if i is None else data.repo_node(i, base_url)
+            if i is None:
+                errors.append({'type': 'NOT_FOUND', 'path': [alias],
+                               'message': f"Could not resolve to a Repository with the name '{full_name}'."})
+        self.send_json(200, {'data': result, **({'errors': errors} if errors else {})})
+
+
+class FeedHandler(LabHandler):
+    """/rss/<name>.xml（任意订阅源名称）、/rss/<name>/<i>（条目原文页，支持 ETag）"""
+
+    def handle_get(self):
+        path = urlsplit(self.path).path
+        if path.startswith('/rss/') and path.endswith('.xml'):
+            name = path[len('/rss/'):-len('.xml')]
+            base_url = f'http://{self.headers.get("Host")}'
+            return self.send(200, self.lab.data.feed(name, base_url), 'application/rss+xml; charset=utf-8')
+        match = re.fullmatch(r'/rss/([\w-]+)/(\d+)', path)
+        if match:
+            page = self.lab.data.feed_article(match.group(1), int(match.group(2)))
+            etag = f'"{hashlib.md5(page).hexdigest()}"'
+            if self.headers.get('If-None-Match') == etag:
+                return self.send(304, headers={'ETag': etag})
+            return self.send(200, page, 'text/html; charset=utf-8', headers={'ETag': etag})
+        super().handle_get()
+
+
+class JWHandler(LabHandler):
+    """教务处：toPosts.do（下发 Cookie）、findInformNotice.do（分页 JSON）、view.do（详情页）"""
+
+    def handle_get(self):
+        parts = urlsplit(self.path)
+        if parts.path == '/zhinan/cms/toPosts.do':
+            return self.send(200, b'<html><body>posts</body></html>', 'text/html; charset=utf-8',
+                             headers={'Set-Cookie': 'JSESSIONID=mock-lab; Path=/'})
+        if parts.path == '/zhinan/cms/article/view.do':
+            notice_id = int(parse_qs(parts.query).get('id', ['0'])[0])
+            if not 90_000 <= notice_id < 90_000 + self.lab.data.jw_notices:
+                return self.send(404, b'<html>not found</html>', 'text/html; charset=utf-8')
+            return self.send(200, self.lab.data.notice_page(notice_id), 'text/html; charset=utf-8')
+        super().handle_get()
+
+    def handle_post(self):
+        if urlsplit(self.path).path != '/zhinan/cms/article/v2/findInformNotice.do':
+            return super().handle_post()
+        form = dict(parse_qsl(self.read_body().decode('utf-8')))
+        category = int(form.get('category') or 0)
+        page = int(form.get('pageNum') or 1)
+        size = int(form.get('pageSize') or 15)
+
+        data = self.lab.data
+        ids = [i for i in range(data.jw_notices) if not category or i % 6 + 1 == category]
+        window = ids[(page - 1) * size:page * size]
+        self.send_json(200, {'success': True, 'total': len(ids), 'list': [data.notice(i) for i in window]})
+
+
+class ChatHandler(LabHandler):
+    """/v1/chat/completions（OpenAI 兼容格式，返回 usage）"""
+
+    def handle_post(self):
+        if urlsplit(self.path).path.rstrip('/') != '/v1/chat/completions':
+            return super().handle_post()
+        try:
+            request = json.loads(self.read_body() or b'{}')
+        except json.JSONDecodeError:
+            return self.send_json(400, {'message': 'invalid JSON'})
+
+        prompt = ''.join(m.get('content', '') for m in request.get('messages', []))
+        max_tokens = int(request.get('max_tokens') or 1024)
+        completion_tokens = min(max_tokens, 120 + len(prompt) // 20)
+        content = ('## 🎯 核心要点\n- 模拟摘要：' + prompt[-60:].replace('\n', ' ')
+                   + '\n\n## ⚠️ 注意事项\n- ' + '这是模拟实验室生成的摘要内容。' * (completion_tokens // 40 + 1))
+        self.send_json(200, {
+            'id': f'mock-{random.getrandbits(32):08x}',
+            'model': request.get('model'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': len(prompt) // 2, 'completion_tokens': completion_tokens,
+                      'total_tokens': len(prompt) // 2 + completion_tokens},
+        })
+
+
+class RestHandler(LabHandler, StandInHandler):
+    """Supabase PostgREST 与 Storage：复用 storage.py 的替身服务（SQLite / 内存对象），外加故障注入"""
+
+    def handle_get(self):
+        StandInHandler.do_GET(self)
+
+    def handle_post(self):
+        StandInHandler.do_POST(self)
+
+    def handle_patch(self):
+        StandInHandler.do_PATCH(self)
+
+    def handle_delete(self):
+        StandInHandler.do_DELETE(self)
+
+    def _raw_body(self) -> bytes:
+        return self.read_body()
+
+    def _reply_raw(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+        self.send(status, body, content_type, headers)
+
+
+HANDLERS = {'github': GitHubHandler, 'rss': FeedHandler, 'jw': JWHandler, 'llm': ChatHandler, 'supabase': RestHandler}
+
+
+# ==================== 实验室 ====================
+
+class MockLab:
+    """
+    启动全部模拟服务
+
+    用法:
+        lab = MockLab(scale=100, latency={'llm': 500})
+        env = lab.start()     # 指向各模拟服务的环境变量
+        ...                   # 以 env 运行抓取脚本
+        lab.report(); lab.stop()
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port_base: int = DEFAULT_PORT_BASE, scale: float = 1.0,
+                 latency: Optional[Dict[str, float]] = None, error_rate: Optional[Dict[str, float]] = None,
+                 rate_limit: Optional[Dict[str, float]] = None, db_path: Optional[str] = None,
+                 graphql_points: int = GRAPHQL_POINTS):
+        latency, error_rate, rate_limit = latency or {}, error_rate or {}, rate_limit or {}
+        self.host = host
+        self.port_base = port_base
+        self.data = LabData(scale)
+        self.configs = {
+            name: ServiceConfig(latency.get(name, DEFAULT_LATENCY[name]),
+                                error_rate.get(name, 0.0), rate_limit.get(name, 0.0))
+            for name in SERVICES
+        }
+        self.stats = {name: ServiceStats() for name in SERVICES}
+        self.db_path = db_path
+        self.graphql_points = graphql_points
+        self.graphql_lock = threading.Lock()
+        self.servers: Dict[str, ThreadingHTTPServer] = {}
+        self._tmp_dir = None
+
+    def url(self, service: str) -> str:
+        return f'http://{self.host}:{self.servers[service].server_address[1]}'
+
+    def start(self) -> Dict[str, str]:
+        """启动各服务，返回把抓取脚本指向模拟服务的环境变量"""
+        if not self.db_path:
+            self._tmp_dir = tempfile.TemporaryDirectory()
+            self.db_path = os.path.join(self._tmp_dir.name, 'mock_supabase.db')
+
+        for offset, name in enumerate(SERVICES):
+            port = self.port_base + offset if self.port_base else 0
+            server = ThreadingHTTPServer((self.host, port), HANDLERS[name])
+            server.daemon_threads = True
+            server.lab = self
+            server.service = name
+            if name == 'supabase':
+                server.storage = SQLiteClient(self.db_path)
+                server.objects = {}
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.servers[name] = server
+
+        return {
+            'GITHUB_API_BASE': self.url('github'),
+            'NEWS_FEED_BASE': f"{self.url('rss')}/rss",
+            'JW_BASE_URL': self.url('jw'),
+            'SILICONFLOW_API_BASE': f"{self.url('llm')}/v1",
+            'SILICONFLOW_API_KEY': 'mock-lab',
+            'SUPABASE_URL': self.url('supabase'),
+            'SUPABASE_KEY': 'mock-lab',
+            # 存储客户端据此拒绝连接其他地址（命令里写错 --supabase-url 也不会写到线上）
+            LAB_URL_ENV: self.url('supabase'),
+        }
+
+    def stop(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+        if self._tmp_dir:
+            self._tmp_dir.cleanup()
+
+    def report(self):
+        """各服务的请求数、状态码分布、注入的故障与服务端耗时"""
+        print("\n🧪 模拟服务统计", file=sys.stderr)
+        for name in SERVICES:
+            stats = self.stats[name]
+            with stats.lock:
+                durations = sorted(stats.durations)
+                statuses = dict(sorted(stats.statuses.items()))
+                injected = dict(stats.injected)
+            if not durations:
+                continue
+            p50 = durations[(len(durations) - 1) // 2] * 1000
+            p95 = durations[int(0.95 * (len(durations) - 1))] * 1000
+            print(f"  {name:9s} {len(durations):6d} 次  状态 {statuses}  注入 {injected or '-'}  "
+                  f"耗时 P50 {p50:.0f} ms / P95 {p95:.0f} ms", file=sys.stderr)
+        print(f"  GraphQL 剩余点数 {self.graphql_points}", file=sys.stderr)
+
+
+def parse_settings(values: List[str], what: str) -> Dict[str, float]:
+    """解析 SERVICE=VALUE 列表（SERVICE 可为 all）"""
+    settings = {}
+    for item in values or []:
+        for part in item.split(','):
+            name, sep, value = part.partition('=')
+            if not sep or (name not in SERVICES and name != 'all'):
+                raise SystemExit(f"❌ {what} 格式应为 SERVICE=VALUE（SERVICE: {', '.join(SERVICES)}, all）: {part}")
+            for service in (SERVICES if name == 'all' else (name,)):
+                settings[service] = float(value)
+    return settings
+
+
+# ==================== 主函数 ====================
+
+def main():
+    """命令行：serve 常驻运行并输出环境变量；run 启动实验室后执行命令并汇总"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='本地模拟服务实验室')
+    parser.add_argument('command', choices=['serve', 'run'],
+                        help='serve 常驻运行；run 执行 -- 之后的命令（经 shell 执行，可引用 $SUPABASE_URL 等变量）')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port-base', type=int, default=DEFAULT_PORT_BASE,
+                        help=f'起始端口，各服务依次 +0..{len(SERVICES) - 1}（0 表示随机端口）')
+    parser.add_argument('--scale', type=float, default=1.0, help='数据量倍数（100 即当前规模的 100 倍）')
+    parser.add_argument('--latency', action='append', help='延迟毫秒，如 llm=500,github=100 或 all=0')
+    parser.add_argument('--error-rate', action='append', help='错误率，如 jw=0.05')
+    parser.add_argument('--rate-limit', action='append', help='每秒请求上限，如 github=10')
+    parser.add_argument('--graphql-points', type=int, default=GRAPHQL_POINTS,
+                        help='GitHub GraphQL 可用点数（调低可测试点数耗尽后的 REST 兜底）')
+    parser.add_argument('--db', default='', help='模拟 Supabase 的 SQLite 文件（默认临时文件）')
+    argv = sys.argv[1:]
+    command = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, command = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+    if args.command == 'run' and not command:
+        parser.error('run 需要在 -- 之后给出命令')
+
+    lab = MockLab(args.host, args.port_base, args.scale,
+                  parse_settings(args.latency, '--latency'),
+                  parse_settings(args.error_rate, '--error-rate'),
+                  parse_settings(args.rate_limit, '--rate-limit'),
+                  args.db or None, args.graphql_points)
+    env = lab.start()
+    data = lab.data
+    print(f"🧪 模拟实验室已启动：仓库 {data.repo_count}，每个订阅源 {data.feed_items} 条，"
+          f"教务通知 {data.jw_notices} 条", file=sys.stderr)
+    for name in SERVICES:
+        config = lab.configs[name]
+        print(f"  {name:9s} {lab.url(name)}  延迟 {config.latency_ms:.0f} ms，错误率 {config.error_rate:.0%}，"
+              f"限流 {config.rate_limit or '-'} 次/秒", file=sys.stderr)
+
+    if args.command == 'serve':
+        print("\n# 在另一个终端执行以下命令后运行抓取脚本（存储使用 --storage rest）：", file=sys.stderr)
+        for key, value in env.items():
+            print(f"export {key}={shlex.quote(value)}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            lab.report()
+            lab.stop()
+        return
+
+    started = time.monotonic()
+    result = subprocess.run(' '.join(command), shell=True, env={**os.environ, **env})
+    print(f"\n⏱️ 命令耗时 {time.monotonic() - started:.1f} 秒，退出码 {result.returncode}", file=sys.stderr)
+    lab.report()
+    lab.stop()
+    sys.exit(result.returncode)
+
+
+if __name__ == '__main__':
+    main()
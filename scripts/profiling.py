@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+运行剖析（--profile）
+按阶段采集 CPU 剖析（cProfile）与内存峰值（tracemalloc），后台线程按墙钟采样调用栈生成火焰图用的折叠栈，
+结束时输出每个阶段的耗时构成（网络 / HTML 解析 / OpenCC / JSON ...）与热点函数
+"""
+
+import atexit
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# ==================== 配置区 ====================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PROFILE_DIR = os.path.join(SCRIPT_DIR, '.cache', 'profiles')
+
+SAMPLE_INTERVAL = 0.005   # 调用栈采样间隔（秒）
+TOP_FUNCTIONS = 8         # 每个阶段列出的热点函数数
+
+# 耗时归类：按函数所在文件路径匹配（先匹配先得）
+CATEGORIES = [
+    ('network', ('socket', 'ssl', 'http/client', 'urllib3', 'requests', 'selectors')),
+    ('html', ('bs4', 'html2text', 'html/parser', 'soupsieve', '_markupbase')),
+    ('opencc', ('opencc',)),
+    ('feedparser', ('feedparser', 'sgmllib', 'xml')),
+    ('json', ('json',)),
+    ('sqlite', ('sqlite3',)),
+    ('numpy', ('numpy',)),
+    ('image', ('PIL',)),
+    ('regex', ('/re/', '/re.py', 'sre_', '_sre')),
+]
+
+
+def categorize(filename: str) -> str:
+    """按文件路径（内置函数按其描述，如 <method 'recv_into' of '_socket.socket' objects>）归类"""
+    path = filename.replace('\\', '/')
+    for name, needles in CATEGORIES:
+        if any(needle in path for needle in needles):
+            return name
+    return 'other'
+
+
+# ==================== 阶段统计 ====================
+
+class Stage:
+    """单个阶段的累计数据（阶段可多次进入，时间为排除嵌套子阶段后的独占时间）"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.profile = cProfile.Profile()
+        self.wall = 0.0
+        self.peak = 0
+        self.calls = 0
+        self.started = 0.0
+
+    def stats(self) -> Optional[pstats.Stats]:
+        try:
+            return pstats.Stats(self.profile, stream=io.StringIO())
+        except TypeError:   # 从未启用过
+            return None
+
+
+class Profiler:
+    """
+    剖析器（默认关闭，所有方法都是空操作）
+
+    用法:
+        PROFILER.start('fetch_news')            # --profile 时调用
+        with PROFILER.stage('upload'): ...      # 同步代码块
+        items = PROFILER.wrap('fetch', items)   # 生成器：每次取下一条时计入该阶段
+
+    阶段可以嵌套（如 upload 拉动 ai 再拉动 fetch），内层阶段进入时暂停外层的剖析，
+    各阶段得到的是独占时间。只统计主线程；线程池中的工作由采样线程覆盖。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.script = ''
+        self.out_dir = DEFAULT_PROFILE_DIR
+        self.stages: Dict[str, Stage] = {}
+        self.stack: List[Stage] = []
+        self.samples: Counter = Counter()
+        self.main_thread = threading.main_thread()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    # ---------- 启停 ----------
+
+    def start(self, script: str, out_dir: str = DEFAULT_PROFILE_DIR):
+        """开始剖析；进程退出时自动输出报告"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.script = script
+        self.out_dir = out_dir
+        self._started = time.perf_counter()
+        tracemalloc.start()
+        self._sampler = threading.Thread(target=self._sample_loop, name='profiler-sampler', daemon=True)
+        self._sampler.start()
+        self._enter(self._stage('main'))
+        atexit.register(self.finish)
+
+    def finish(self):
+        """结束剖析，写出文件并打印报告"""
+        if not self.enabled:
+            return
+        while self.stack:
+            self._exit()
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join(timeout=1)
+        total = time.perf_counter() - self._started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.enabled = False
+
+        paths = self._write_files()
+        self._report(total, peak, paths)
+
+    # ---------- 阶段 ----------
+
+    def _stage(self, name: str) -> Stage:
+        if name not in self.stages:
+            self.stages[name] = Stage(name)
+        return self.stages[name]
+
+    def _pause(self, stage: Stage):
+        stage.profile.disable()
+        stage.wall += time.perf_counter() - stage.started
+        stage.peak = max(stage.peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+    def _resume(self, stage: Stage):
+        stage.started = time.perf_counter()
+        stage.profile.enable()
+
+    def _enter(self, stage: Stage):
+        if self.stack:
+            self._pause(self.stack[-1])
+        stage.calls += 1
+        self.stack.append(stage)
+        self._resume(stage)
+
+    def _exit(self):
+        self._pause(self.stack.pop())
+        if self.stack:
+            self._resume(self.stack[-1])
+
+    def _active(self) -> bool:
+        return self.enabled and threading.current_thread() is self.main_thread
+
+    def stage(self, name: str):
+        """阶段上下文（代码块内不能 yield）"""
+        if not self._active():
+            return nullcontext()
+        return self._stage_context(name)
+
+    @contextmanager
+    def _stage_context(self, name: str):
+        stage = self._stage(name)
+        if self.stack and self.stack[-1] is stage:   # 同名阶段直接嵌套：不切换
+            yield
+            return
+        self._enter(stage)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def wrap(self, name: str, items: Iterable) -> Iterable:
+        """包装生成器：每次取下一条的时间计入该阶段；未启用时原样返回"""
+        if not self.enabled:
+            return items
+        return self._wrapped(name, iter(items))
+
+    def _wrapped(self, name: str, iterator: Iterator) -> Iterator:
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    # ---------- 调用栈采样 ----------
+
+    def _sample_loop(self):
+        """按墙钟采样所有线程的调用栈（网络等待也会被采到）"""
+        own = threading.get_ident()
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            stage = self.stack[-1].name if self.stack else 'main'
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if ident != self.main_thread.ident:
+                    frames.append('[worker thread]')
+                frames.append(stage)
+                self.samples[';'.join(reversed(frames))] += 1
+
+    # ---------- 输出 ----------
+
+    def _write_files(self) -> Dict[str, str]:
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        base = os.path.join(self.out_dir, f"{self.script}-{stamp}")
+        paths = {}
+
+        folded = base + '.folded'
+        with open(folded, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        paths['folded'] = folded
+
+        for name, stage in self.stages.items():
+            stats = stage.stats()
+            if stats:
+                path = f"{base}.{name}.prof"
+                stats.dump_stats(path)
+                paths[name] = path
+        return paths
+
+    def _report(self, total: float, peak: int, paths: Dict[str, str]):
+        out = sys.stderr
+        print(f"\n⏱️ 剖析报告 {self.script}: 总耗时 {total:.2f} s，内存峰值 {peak / 1024 / 1024:.1f} MB", file=out)
+
+        for stage in sorted(self.stages.values(), key=lambda s: s.wall, reverse=True):
+            stats = stage.stats()
+            if not stats or stage.wall < 0.001:
+                continue
+            share = stage.wall / total * 100 if total else 0
+            print(f"\n▶ {stage.name}: {stage.wall:.2f} s（{share:.0f}%），进入 {stage.calls} 次，"
+                  f"内存峰值 {stage.peak / 1024 / 1024:.1f} MB", file=out)
+
+            # 按库归类的独占时间
+            by_category: Counter = Counter()
+            for (filename, _, funcname), (_, _, tottime, _, _) in stats.stats.items():
+                label = filename if filename != '~' else funcname
+                by_category[categorize(label)] += tottime
+            spent = sum(by_category.values()) or 1
+            parts = [f"{name} {seconds / spent * 100:.0f}%" for name, seconds in by_category.most_common()
+                     if seconds / spent >= 0.01]
+            print(f"  构成: {' | '.join(parts)}", file=out)
+
+            # 热点函数（按独占时间）
+            hotspots = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:TOP_FUNCTIONS]
+            for (filename, lineno, funcname), (_, ncalls, tottime, cumtime, _) in hotspots:
+                where = f"{os.path.basename(filename)}:{lineno}" if filename != '~' else 'built-in'
+                print(f"  {tottime * 1000:9.1f} ms  {cumtime * 1000:9.1f} ms cum  {ncalls:>7}×  "
+                      f"{funcname} ({where})", file=out)
+
+        print(f"\n📄 折叠栈（火焰图）: {paths['folded']}", file=out)
+        print(f"   生成 SVG: flamegraph.pl {paths['folded']} > flame.svg  或  speedscope {paths['folded']}", file=out)
+        print(f"📄 各阶段 cProfile: {os.path.dirname(paths['folded'])}/*.prof（python -m pstats 查看）", file=out)
+
+
+# 抓取脚本共用的默认实例（未调用 start() 时所有方法均为空操作）
+PROFILER = Profiler()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+阅读页预排版
+入库时把 content（Markdown）切成块并算好目录、字数、阅读时长和纯文本摘录，写入 reader_payload 列。
+阅读页打开文章时不必先解析整篇 Markdown：按 first_screen 截取开头几块立即渲染，其余块按偏移量逐块懒加载
+"""
+
+import json
+import math
+import re
+import sys
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# ==================== 配置区 ====================
+
+PAYLOAD_COLUMN = 'reader_payload'
+PAYLOAD_VERSION = 1
+
+# 阅读速度：中文按字，英文按词
+CJK_PER_MINUTE = 300
+WORDS_PER_MINUTE = 200
+
+FIRST_SCREEN_CHARS = 600    # 首屏大约容纳的纯文本字数
+EXCERPT_CHARS = 160         # 全文摘录长度
+SECTION_EXCERPT_CHARS = 80  # 目录中每节摘录长度
+
+FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+HEADING_RE = re.compile(r'^ {0,3}(#{1,6})\s+(.*?)(?:\s+#+)?\s*$')
+RULE_RE = re.compile(r'^ {0,3}([-*_])(?:\s*\1){2,}\s*$')
+LIST_RE = re.compile(r'^ {0,3}(?:[-*+]|\d{1,9}[.)])\s+')
+QUOTE_RE = re.compile(r'^ {0,3}>')
+TABLE_RE = re.compile(r'^\s*\|')
+IMAGE_RE = re.compile(r'^\s*!\[[^\]]*\]\([^)]*\)\s*$')
+
+# 纯文本化：去掉行首标记与行内语法，只留文字
+LINE_MARK_RE = re.compile(r'^\s*(?:#{1,6}\s+|>\s?|[-*+]\s+|\d{1,9}[.)]\s+|\|)', re.MULTILINE)
+INLINE_RES = (
+    (re.compile(r'!\[([^\]]*)\]\([^)]*\)'), r'\1'),
+    (re.compile(r'\[([^\]]+)\]\([^)]*\)'), r'\1'),
+    (re.compile(r'`([^`]*)`'), r'\1'),
+    (re.compile(r'<[^>]+>'), ''),
+    (re.compile(r'\*\*|__|~~|\*|\|'), ''),
+)
+CJK_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿぀-ヿ가-힯]')
+WORD_RE = re.compile(r'[A-Za-z0-9]+(?:[\'’.-][A-Za-z0-9]+)*')
+
+
+# ==================== 纯文本 ====================
+
+def plain_text(markdown: str) -> str:
+    """Markdown 片段转为单行纯文本"""
+    text = LINE_MARK_RE.sub('', markdown)
+    for pattern, repl in INLINE_RES:
+        text = pattern.sub(repl, text)
+    return ' '.join(text.split())
+
+
+def truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + '…'
+
+
+def count_words(text: str) -> Tuple[int, int]:
+    """返回 (中日韩字数, 英文词数)"""
+    cjk = len(CJK_RE.findall(text))
+    return cjk, len(WORD_RE.findall(CJK_RE.sub(' ', text)))
+
+
+# ==================== 分块 ====================
+
+def _line_kind(line: str) -> str:
+    if LIST_RE.match(line):
+        return 'list'
+    if QUOTE_RE.match(line):
+        return 'quote'
+    if TABLE_RE.match(line):
+        return 'table'
+    if IMAGE_RE.match(line):
+        return 'image'
+    return 'paragraph'
+
+
+def split_blocks(markdown: str) -> List[Dict]:
+    """
+    按块切分 Markdown（偏移量为 Python 字符下标，[start, end) 不含块末换行）
+
+    块类型: heading / paragraph / list / quote / table / image / code / rule。
+    不追求完整的 CommonMark，只需与阅读页渲染器切出的块边界一致：空行分段，
+    代码块整体成块，列表缩进行和引用的懒续行并入所在块。
+    """
+    blocks: List[Dict] = []
+    current: Optional[Dict] = None
+    fence = ''
+
+    def close():
+        nonlocal current
+        if current:
+            blocks.append(current)
+        current = None
+
+    offset = 0
+    for raw in markdown.splitlines(keepends=True):
+        start, offset = offset, offset + len(raw)
+        line = raw.rstrip('\r\n')
+        end = start + len(line)
+
+        if fence:
+            current['end'] = end
+            if line.strip().startswith(fence) and not line.strip().strip(fence[0]):
+                fence = ''
+                close()
+            continue
+
+        if not line.strip():
+            close()
+            continue
+
+        match = FENCE_RE.match(line)
+        if match:
+            close()
+            fence = match.group(1)
+            current = {'type': 'code', 'start': start, 'end': end}
+            continue
+
+        match = HEADING_RE.match(line)
+        if match:
+            close()
+            blocks.append({'type': 'heading', 'level': len(match.group(1)), 'start': start, 'end': end})
+            continue
+
+        if RULE_RE.match(line):
+            close()
+            blocks.append({'type': 'rule', 'start': start, 'end': end})
+            continue
+
+        kind = _line_kind(line)
+        if current and (kind == current['type']
+                        or (current['type'] == 'list' and line.startswith((' ', '\t')))
+                        or (current['type'] in ('paragraph', 'quote') and kind in ('paragraph', 'image'))):
+            current['end'] = end
+        else:
+            close()
+            current = {'type': kind, 'start': start, 'end': end}
+    close()
+    return blocks
+
+
+class _Utf16Offsets:
+    """Python 字符下标 -> UTF-16 码元下标（Dart 字符串按 UTF-16 计数，emoji 等占两个码元）"""
+
+    def __init__(self, text: str):
+        self.astral = [i for i, ch in enumerate(text) if ord(ch) > 0xFFFF]
+
+    def __call__(self, index: int) -> int:
+        return index + bisect_left(self.astral, index)
+
+
+# ==================== 预排版 ====================
+
+def _section_excerpt(blocks: List[Dict], texts: List[str], heading: int) -> str:
+    """标题下第一段文字（下一个标题之前没有正文时为空）"""
+    for block, text in zip(blocks[heading + 1:], texts[heading + 1:]):
+        if block['type'] == 'heading':
+            return ''
+        if block['type'] in ('paragraph', 'list', 'quote') and text:
+            return truncate(text, SECTION_EXCERPT_CHARS)
+    return ''
+
+
+def build_payload(markdown: str) -> Dict:
+    """
+    计算一篇文章的阅读页预排版
+
+    Returns:
+        {
+          'version': 1,
+          'words': 字数（中文按字、英文按词，不含代码块）,
+          'reading_minutes': 预计阅读分钟数,
+          'excerpt': 全文开头的纯文本摘录,
+          'first_screen': 首屏需要渲染的块数,
+          'toc': [{'level', 'text', 'block', 'excerpt'}, ...],
+          'blocks': [{'type', 'start', 'end'[, 'level']}, ...],
+        }
+        blocks 的 start / end 为 UTF-16 偏移量，客户端可直接 content.substring(start, end) 逐块渲染。
+    """
+    blocks = split_blocks(markdown)
+    to_utf16 = _Utf16Offsets(markdown)
+
+    cjk = words = 0
+    screen_chars = 0
+    first_screen = 0
+    excerpt_parts: Dict[str, List[str]] = {'paragraph': [], 'quote': []}
+    toc: List[Dict] = []
+    texts = [plain_text(markdown[b['start']:b['end']]) if b['type'] != 'code' else '' for b in blocks]
+
+    for i, (block, text) in enumerate(zip(blocks, texts)):
+        c, w = count_words(text)
+        cjk += c
+        words += w
+
+        if screen_chars < FIRST_SCREEN_CHARS:
+            first_screen = i + 1
+            screen_chars += max(len(text), 40)   # 代码、图片、分隔线也占一定版面
+
+        if block['type'] == 'heading' and text:
+            toc.append({'level': block['level'], 'text': text, 'block': i,
+                        'excerpt': _section_excerpt(blocks, texts, i)})
+        elif block['type'] in excerpt_parts and text and sum(map(len, excerpt_parts[block['type']])) < EXCERPT_CHARS:
+            excerpt_parts[block['type']].append(text)
+
+    minutes = cjk / CJK_PER_MINUTE + words / WORDS_PER_MINUTE
+    return {
+        'version': PAYLOAD_VERSION,
+        'words': cjk + words,
+        'reading_minutes': max(1, math.ceil(minutes)) if markdown.strip() else 0,
+        # 引用块多是来源、日期等元信息，没有正文段落时才用作摘录
+        'excerpt': truncate(' '.join(excerpt_parts['paragraph'] or excerpt_parts['quote']), EXCERPT_CHARS),
+        'first_screen': first_screen,
+        'toc': toc,
+        'blocks': [dict(b, start=to_utf16(b['start']), end=to_utf16(b['end'])) for b in blocks],
+    }
+
+
+def attach_payloads(articles: Iterable) -> Iterator:
+    """
+    供抓取脚本调用：为每篇文章写入 reader_payload 列（逐条产出）
+
+    需在图片链接改写之后调用，保证块偏移量对应最终入库的 content；
+    上传时 ChangeTracker 恢复库中的 AI 摘要会改变 content，届时由 change_detection.refresh_payload 重新计算。
+    """
+    count = blocks = 0
+    for article in articles:
+        payload = build_payload(article.get('content') or '')
+        article[PAYLOAD_COLUMN] = payload
+        count += 1
+        blocks += len(payload['blocks'])
+        yield article
+    if count:
+        print(f"📐 阅读页预排版: {count} 篇，平均 {blocks / count:.0f} 块", file=sys.stderr)
+
+
+# ==================== 主函数 ====================
+
+def main():
+    """命令行：Markdown 文件输出预排版 JSON；抓取脚本 --output 生成的 JSON 文件原地写入 reader_payload"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='阅读页预排版')
+    parser.add_argument('files', nargs='+', help='Markdown (.md) 或 JSON 文件路径')
+    args = parser.parse_args()
+
+    for path in args.files:
+        with open(path, 'r', encoding='utf-8') as f:
+            if not path.endswith('.json'):
+                print(json.dumps(build_payload(f.read()), indent=2, ensure_ascii=False))
+                continue
+            articles = json.load(f)
+        articles = list(attach_payloads(articles))
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(articles, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
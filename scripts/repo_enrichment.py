@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+GitHub 仓库 README 补充
+并发拉取候选仓库的 README，本地缓存（按 pushed_at 与 ETag 判断是否变化），
+为 AI 摘要提供裁剪后的 README 摘录，而不只是名称、描述和数字
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+from host_health import HOSTS
+
+# ==================== 配置区 ====================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_PATH = os.path.join(SCRIPT_DIR, '.cache', 'repo_readmes.json')
+
+GITHUB_API = os.environ.get('GITHUB_API_BASE', 'https://api.github.com')
+MAX_WORKERS = 8
+EXCERPT_CHARS = 1800    # 摘录长度（ai_summarizer 对整段输入限制为 3000 字）
+CACHED_CHARS = 8000     # 缓存中保留的清洗后 README 长度
+
+# README 中对摘要没有帮助的内容
+NOISE_PATTERNS = [
+    re.compile(r'<!--.*?-->', re.DOTALL),                         # HTML 注释
+    re.compile(r'```.*?```', re.DOTALL),                          # 代码块
+    re.compile(r'\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)'),             # 带链接的徽章
+    re.compile(r'!\[[^\]]*\]\([^)]*\)'),                          # 图片
+    re.compile(r'<(img|picture|source|br|hr)\b[^>]*>', re.IGNORECASE),
+    re.compile(r'</?(p|div|a|h\d|picture|details|summary|sup|sub|center|span)\b[^>]*>', re.IGNORECASE),
+]
+
+
+# ==================== 辅助函数 ====================
+
+def clean_readme(markdown: str) -> str:
+    """去掉徽章、图片、代码块和 HTML 标签，合并多余空行"""
+    text = markdown
+    for pattern in NOISE_PATTERNS:
+        text = pattern.sub('', text)
+    text = re.sub(r'\[([^\]]+)\]\([^)]*\)', r'\1', text)   # 链接只留文字
+    lines = [line.rstrip() for line in text.splitlines()]
+    text = '\n'.join(line for line in lines if line.strip(' |-:') or not line)
+    return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+
+def readme_excerpt(text: str, limit: int = EXCERPT_CHARS) -> str:
+    """按段落截取 README 开头（不在段落中间截断，除非第一段就超长）"""
+    if len(text) <= limit:
+        return text
+    excerpt = ''
+    for paragraph in text.split('\n\n'):
+        if len(excerpt) + len(paragraph) + 2 > limit:
+            break
+        excerpt += paragraph + '\n\n'
+    return (excerpt.strip() or text[:limit]) + '\n…'
+
+
+# ==================== 核心功能 ====================
+
+class RepoEnricher:
+    """
+    README 拉取与缓存
+
+    缓存以仓库全名为键，记录 pushed_at、ETag 和清洗后的 README：
+    - pushed_at 未变：仓库没有新提交，直接使用缓存，不发请求
+    - pushed_at 变了：带 If-None-Match 条件请求，304 时沿用缓存（不计入 API 限额）
+    """
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, token: Optional[str] = None,
+                 max_workers: int = MAX_WORKERS):
+        self.cache_path = cache_path
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.stats = {'cached': 0, 'not_modified': 0, 'downloaded': 0, 'missing': 0, 'failed': 0}
+
+        self.session = requests.Session()
+        self.session.headers['Accept'] = 'application/vnd.github.raw+json'
+        self.session.headers['User-Agent'] = 'anthropo-reader'
+        token = token or os.environ.get('GITHUB_TOKEN')
+        if token:
+            self.session.headers['Authorization'] = f'Bearer {token}'
+
+        self.cache: Dict[str, Dict] = {}
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    self.cache = json.load(f)
+            except (IOError, json.JSONDecodeError) as e:
+                print(f"⚠️ README 缓存读取失败，重新建立: {e}", file=sys.stderr)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.cache, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def _count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+    def readme(self, repo: Dict) -> str:
+        """返回仓库的清洗后 README（失败时返回缓存或空字符串）"""
+        name = repo['full_name']
+        pushed_at = repo.get('pushed_at')
+        with self.lock:
+            entry = self.cache.get(name)
+
+        if entry and pushed_at and entry.get('pushed_at') == pushed_at:
+            self._count('cached')
+            return entry.get('readme', '')
+
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+
+        try:
+            response = HOSTS.get(f"{GITHUB_API}/repos/{name}/readme", self.session,
+                                 headers=headers, timeout=(5, 15))
+        except requests.RequestException as e:
+            self._count('failed')
+            print(f"  ⚠️ README fetch failed: {name} ({e})", file=sys.stderr)
+            return entry.get('readme', '') if entry else ''
+
+        if response.status_code == 304 and entry:
+            self._count('not_modified')
+            text = entry.get('readme', '')
+        elif response.status_code == 404:
+            self._count('missing')
+            text = ''
+        elif response.ok:
+            self._count('downloaded')
+            response.encoding = 'utf-8'
+            text = clean_readme(response.text)[:CACHED_CHARS]
+        else:
+            self._count('failed')
+            print(f"  ⚠️ README fetch failed: {name} (HTTP {response.status_code})", file=sys.stderr)
+            return entry.get('readme', '') if entry else ''
+
+        with self.lock:
+            self.cache[name] = {
+                'pushed_at': pushed_at,
+                'etag': response.headers.get('ETag') or (entry or {}).get('etag'),
+                'readme': text,
+            }
+        return text
+
+    def enrich(self, repos: List[Dict]) -> Dict[str, str]:
+        """
+        并发拉取一批仓库的 README
+
+        Returns:
+            {html_url: README 摘录}
+        """
+        if not repos:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(repos))) as executor:
+            texts = list(executor.map(self.readme, repos))
+        self.save()
+
+        s = self.stats
+        print(f"📖 READMEs: {s['downloaded']} downloaded, {s['not_modified']} not modified, "
+              f"{s['cached']} cached, {s['missing']} missing, {s['failed']} failed", file=sys.stderr)
+        return {repo['html_url']: readme_excerpt(text) for repo, text in zip(repos, texts)}
+
+
+def enrich_repos(repos: List[Dict], cache_path: str = DEFAULT_CACHE_PATH) -> Dict[str, str]:
+    """供抓取脚本调用的入口"""
+    return RepoEnricher(cache_path).enrich(repos)
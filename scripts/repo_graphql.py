@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+GitHub GraphQL 批量补充仓库详情
+一次查询用别名取回几十个仓库的元数据、README、Topics 和最新 Release（REST 需要每个仓库 3~4 次请求）；
+发出前按 GitHub 的计费规则估算每次查询的点数并切分批次，依据响应中的 rateLimit 校准估算、
+在剩余点数不足时停止；缓存与 repo_enrichment 共用，pushed_at 未变的仓库不进入查询
+"""
+
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from host_health import HOSTS
+from repo_enrichment import (
+    CACHED_CHARS, DEFAULT_CACHE_PATH, GITHUB_API, RepoEnricher, clean_readme, readme_excerpt,
+)
+
+# ==================== 配置区 ====================
+
+GRAPHQL_URL = f"{GITHUB_API}/graphql"
+
+MAX_BATCH = 50              # 单次查询的仓库数上限（README 全文在响应里，批次过大响应会很慢）
+QUERY_COST_LIMIT = 1        # 每次查询的目标点数：GitHub 每次查询最少收 1 点，尽量把 1 点用满
+NODE_LIMIT = 500_000        # GitHub 单次查询的节点数上限
+MIN_REMAINING = 50          # 剩余点数低于此值时停止，给其他任务留余量
+TOPICS_FIRST = 20
+
+# 每个仓库在查询中的连接数：repositoryTopics、issues（计费时每个连接按一次请求算）
+CONNECTIONS_PER_REPO = 2
+
+# 缓存的详情字段：只随推送变化的内容。Star / Fork / Issue 数每天都在变，命中缓存时取搜索结果里的实时值
+CACHED_DETAILS = ('topics', 'release')
+
+# README 文件名不统一，依次尝试（取第一个存在的）
+README_PATHS = ('README.md', 'readme.md', 'README.rst', 'README')
+
+REPO_FRAGMENT = f"""
+fragment RepoDetails on Repository {{
+  nameWithOwner
+  url
+  description
+  stargazerCount
+  forkCount
+  pushedAt
+  updatedAt
+  primaryLanguage {{ name }}
+  issues(states: OPEN) {{ totalCount }}
+  repositoryTopics(first: {TOPICS_FIRST}) {{ nodes {{ topic {{ name }} }} }}
+  latestRelease {{ tagName name publishedAt }}
+{''.join(f'  readme{i}: object(expression: "HEAD:{path}") {{ ... on Blob {{ text }} }}{chr(10)}' for i, path in enumerate(README_PATHS))}}}
+"""
+
+
+# ==================== 查询与计费 ====================
+
+def build_query(repos: List[Dict]) -> Tuple[str, Dict[str, str]]:
+    """按别名 r0..rN 拼出一次批量查询（仓库名走变量，不拼进查询文本）"""
+    params, fields, variables = [], [], {}
+    for i, repo in enumerate(repos):
+        owner, _, name = repo['full_name'].partition('/')
+        params.append(f'$o{i}: String!, $n{i}: String!')
+        fields.append(f'  r{i}: repository(owner: $o{i}, name: $n{i}) {{ ...RepoDetails }}')
+        variables[f'o{i}'] = owner
+        variables[f'n{i}'] = name
+    query = (f"query({', '.join(params)}) {{\n  rateLimit {{ cost remaining resetAt }}\n"
+             + '\n'.join(fields) + '\n}\n' + REPO_FRAGMENT)
+    return query, variables
+
+
+def estimate_cost(count: int, requests_per_repo: float = CONNECTIONS_PER_REPO) -> int:
+    """GitHub 计费：各连接按一次请求计，总数 / 100 四舍五入，最少 1 点"""
+    return max(1, round(count * requests_per_repo / 100))
+
+
+def estimate_nodes(count: int) -> int:
+    """节点数：每个仓库自身 + 按 first 上限计的 Topics"""
+    return count * (1 + TOPICS_FIRST)
+
+
+def plan_batch(pending: int, max_cost: int = QUERY_COST_LIMIT, max_batch: int = MAX_BATCH,
+               requests_per_repo: float = CONNECTIONS_PER_REPO) -> int:
+    """在点数与节点上限内，下一批最多能放多少个仓库"""
+    size = min(pending, max_batch)
+    while size > 1 and (estimate_cost(size, requests_per_repo) > max_cost or estimate_nodes(size) > NODE_LIMIT):
+        size -= 1
+    return size
+
+
+def convert(node: Dict) -> Dict:
+    """GraphQL 仓库节点 -> 与搜索 API 同名的字段，外加 readme / release"""
+    readme = next((blob['text'] for i in range(len(README_PATHS))
+                   if (blob := node.get(f'readme{i}')) and blob.get('text')), '')
+    release = node.get('latestRelease') or {}
+    release_text = ''
+    if release:
+        title = release.get('name') or ''
+        release_text = release['tagName'] + (f" {title}" if title and title != release['tagName'] else '')
+        if release.get('publishedAt'):
+            release_text += f" ({release['publishedAt'][:10]})"
+    return {
+        'full_name': node['nameWithOwner'],
+        'html_url': node['url'],
+        'description': node.get('description'),
+        'stargazers_count': node['stargazerCount'],
+        'forks_count': node['forkCount'],
+        'open_issues_count': node['issues']['totalCount'],
+        'language': (node.get('primaryLanguage') or {}).get('name'),
+        'pushed_at': node.get('pushedAt'),
+        'updated_at': node.get('updatedAt'),
+        'topics': [n['topic']['name'] for n in node['repositoryTopics']['nodes']],
+        'readme': clean_readme(readme)[:CACHED_CHARS],
+        'release': release_text,
+    }
+
+
+class QueryError(Exception):
+    """查询整体失败（HTTP 错误、超时或响应没有 data）"""
+
+
+# ==================== 批量抓取 ====================
+
+class GraphQLFetcher(RepoEnricher):
+    """
+    GraphQL 批量详情（README 缓存、统计与 REST 兜底沿用 RepoEnricher）
+
+    - pushed_at 未变且缓存里已有 GraphQL 详情的仓库直接用缓存，不进入查询
+    - 每批大小由 plan_batch 按估算点数决定；响应里的实际 cost 高于估算时放大单仓库的估算
+    - 查询超时 / 5xx（通常是批次过大）时对半切分重试；被限流或点数不足时停止，剩余仓库走 REST 拉 README
+    """
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, token: Optional[str] = None,
+                 max_cost: int = QUERY_COST_LIMIT, max_batch: int = MAX_BATCH):
+        super().__init__(cache_path, token)
+        self.max_cost = max_cost
+        self.max_batch = max_batch
+        self.requests_per_repo = float(CONNECTIONS_PER_REPO)
+        self.remaining: Optional[int] = None
+        self.stats.update({'graphql': 0, 'queries': 0, 'points': 0})
+
+    def _post(self, batch: List[Dict]) -> Dict:
+        query, variables = build_query(batch)
+        try:
+            response = HOSTS.post(GRAPHQL_URL, self.session, json={'query': query, 'variables': variables},
+                                  headers={'Accept': 'application/vnd.github+json'}, timeout=(5, 60))
+        except requests.RequestException as e:
+            raise QueryError(str(e)) from e
+        if response.status_code in (403, 429):
+            self.remaining = 0
+            raise QueryError(f"rate limited (HTTP {response.status_code})")
+        if not response.ok:
+            raise QueryError(f"HTTP {response.status_code}")
+
+        payload = response.json()
+        data = payload.get('data')
+        if data is None:
+            raise QueryError('; '.join(e.get('message', '') for e in payload.get('errors') or []) or 'no data')
+        self.stats['queries'] += 1
+
+        rate = data.get('rateLimit') or {}
+        if rate:
+            self.remaining = rate.get('remaining')
+            cost = rate.get('cost') or 0
+            self.stats['points'] += cost
+            if cost > estimate_cost(len(batch), self.requests_per_repo):
+                # 实际计费比估算高：按实际值校准单仓库请求数，后续批次相应缩小
+                self.requests_per_repo = max(self.requests_per_repo, cost * 100 / len(batch))
+        return data
+
+    def _query(self, batch: List[Dict]) -> Dict[str, Dict]:
+        """查询一批，失败时对半切分；返回 {full_name: 详情}（不存在的仓库不在结果里）"""
+        try:
+            data = self._post(batch)
+        except QueryError as e:
+            if len(batch) == 1 or self.remaining == 0:
+                print(f"  ⚠️ GraphQL query failed ({len(batch)} repos): {e}", file=sys.stderr)
+                return {}
+            half = len(batch) // 2
+            return {**self._query(batch[:half]), **self._query(batch[half:])}
+
+        results = {}
+        for i, repo in enumerate(batch):
+            node = data.get(f'r{i}')
+            if node:
+                results[repo['full_name']] = convert(node)
+            else:
+                self._count('missing')
+        return results
+
+    def fetch(self, repos: List[Dict]) -> Dict[str, Dict]:
+        """
+        批量拉取仓库详情
+
+        Returns:
+            {html_url: 详情}（本次查询的仓库字段见 convert；命中缓存的只有 CACHED_DETAILS 与 readme；readme 为摘录）
+        """
+        details: Dict[str, Dict] = {}
+        pending = []
+        for repo in repos:
+            entry = self.cache.get(repo['full_name'])
+            if entry and 'details' in entry and repo.get('pushed_at') and entry.get('pushed_at') == repo['pushed_at']:
+                self._count('cached')
+                cached = {k: entry['details'][k] for k in CACHED_DETAILS if k in entry['details']}
+                details[repo['html_url']] = dict(cached, readme=entry.get('readme', ''))
+            else:
+                pending.append(repo)
+
+        fallback = []
+        while pending:
+            size = plan_batch(len(pending), self.max_cost, self.max_batch, self.requests_per_repo)
+            cost = estimate_cost(size, self.requests_per_repo)
+            if self.remaining is not None and self.remaining - cost < MIN_REMAINING:
+                print(f"  ⚠️ GraphQL points running low ({self.remaining} left), "
+                      f"{len(pending)} repos fall back to REST", file=sys.stderr)
+                fallback, pending = pending, []
+                break
+
+            batch, pending = pending[:size], pending[size:]
+            results = self._query(batch)
+            for repo in batch:
+                detail = results.get(repo['full_name'])
+                if detail is None:
+                    fallback.append(repo)
+                    continue
+                self._count('graphql')
+                self.cache[repo['full_name']] = {
+                    'pushed_at': detail['pushed_at'] or repo.get('pushed_at'),
+                    'etag': (self.cache.get(repo['full_name']) or {}).get('etag'),
+                    'readme': detail['readme'],
+                    'details': {k: detail[k] for k in CACHED_DETAILS},
+                }
+                details[repo['html_url']] = detail
+
+        s = self.stats
+        print(f"🧬 GraphQL: {s['graphql']} repos in {s['queries']} queries ({s['points']} points, "
+              f"{self.remaining if self.remaining is not None else '?'} left), {s['cached']} cached, "
+              f"{len(fallback)} via REST", file=sys.stderr)
+        results = {url: dict(detail, readme=readme_excerpt(detail['readme'])) for url, detail in details.items()}
+
+        # 查询失败或点数不足的仓库：按原来的方式用 REST 拉 README（enrich 同时保存缓存）
+        if fallback:
+            for url, excerpt in super().enrich(fallback).items():
+                results[url] = {'readme': excerpt}
+        else:
+            self.save()
+        return results
+
+
+def fetch_repo_details(repos: List[Dict], cache_path: str = DEFAULT_CACHE_PATH) -> Dict[str, Dict]:
+    """供抓取脚本调用的入口"""
+    return GraphQLFetcher(cache_path).fetch(repos)
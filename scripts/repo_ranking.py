@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+GitHub 候选仓库排序
+把关键词、新近度、Star 增速、语言等特征计算成数组，一次向量化打分，再用部分选择取前 k 个；
+候选池可以扩大到多页搜索结果的数千个仓库，排序本身只需几毫秒
+"""
+
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# ==================== 筛选配置 ====================
+
+# 黑名单：过滤收集类/教程类/资源类项目
+EXCLUDE_PATTERNS = [
+    # 收集类
+    r'^awesome[-_]', r'[-_]awesome$', r'[-_]list$', r'^list[-_]',
+    r'resources', r'curated', r'collection',
+    # 教程/学习类
+    r'interview', r'learning', r'^learn[-_]', r'[-_]learn$',
+    r'tutorial', r'course', r'guide', r'handbook',
+    r'roadmap', r'cheatsheet', r'notes',
+    # 纯素材类
+    r'^icons?$', r'^fonts?$', r'wallpaper', r'design[-_]resources',
+    # 其他低价值
+    r'free[-_]programming', r'coding[-_]interview',
+    r'system[-_]design', r'algorithm', r'leetcode',
+]
+
+# 优先关键词：AI/工具/App 相关（每命中一个 +100）
+PRIORITY_KEYWORDS = [
+    # AI/LLM 前沿
+    'ai', 'llm', 'gpt', 'claude', 'agent', 'mcp',
+    'anthropic', 'openai', 'gemini', 'ollama', 'langchain',
+    'rag', 'embedding', 'vector', 'chatbot',
+    # 开发工具
+    'cursor', 'copilot', 'vscode', 'neovim', 'vim',
+    'terminal', 'cli', 'sdk', 'api', 'devtools',
+    # 实用 App/客户端
+    'app', 'desktop', 'client', 'gui', 'native',
+    'macos', 'windows', 'linux', 'cross-platform',
+    'tauri', 'electron', 'flutter',
+    # 效率工具
+    'productivity', 'automation', 'workflow', 'utility',
+    'tool', 'assistant', 'helper', 'manager',
+    # 新兴技术
+    'rust', 'zig', 'bun', 'deno', 'wasm', 'webassembly',
+]
+
+# 评分权重
+KEYWORD_SCORE = 100
+RECENCY_SCORES = ((7, 50), (14, 30))   # 创建不超过 N 天的加分
+VELOCITY_WEIGHT = 10                    # × log1p(每天新增 Star 数)
+LANGUAGE_SCORE = 100                    # 主语言本身是优先关键词（如 Rust / Zig）且描述未提及时
+
+SEPARATOR = b'\x00'
+
+
+# ==================== 子串索引 ====================
+
+def expand_pattern(pattern: str) -> List[tuple]:
+    """
+    把黑名单正则展开为 (字面量, 锚定开头, 锚定结尾) 列表
+
+    只支持黑名单用到的写法：^ / $ 锚点、[-_] 与 s? 可选字符；其余写法抛出 ValueError。
+    例: '^icons?$' -> [('icon', True, True), ('icons', True, True)]
+    """
+    at_start = pattern.startswith('^')
+    at_end = pattern.endswith('$')
+    body = pattern[1 if at_start else None:-1 if at_end else None]
+
+    variants = ['']
+    i = 0
+    while i < len(body):
+        if body.startswith('[-_]', i):
+            variants = [v + c for v in variants for c in '-_']
+            i += 4
+        elif i + 1 < len(body) and body[i + 1] == '?':
+            variants = [v + c for v in variants for c in ('', body[i])]
+            i += 2
+        elif body[i].isalnum() or body[i] == '-':
+            variants = [v + body[i] for v in variants]
+            i += 1
+        else:
+            raise ValueError(f"不支持的黑名单写法: {pattern}")
+    return [(v, at_start, at_end) for v in variants]
+
+
+EXCLUDE_TERMS = [term for pattern in EXCLUDE_PATTERNS for term in expand_pattern(pattern)]
+
+
+class SubstringIndex:
+    """
+    一批文本的子串位置索引
+
+    所有文本（UTF-8）拼成一个字节数组；只为待查字面量的开头 2-gram 收集出现位置并按 2-gram 排序，
+    之后查找字面量只需取出对应区间，再向量化校验剩余字节，
+    与逐条 `literal in text` 的结果完全一致（关键词均为 ASCII，UTF-8 下不会误配）。
+    """
+
+    PADDING = 64
+
+    def __init__(self, texts: List[str], literals: Iterable[str]):
+        encoded = [t.encode('utf-8') for t in texts]
+        lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+        self.count = len(encoded)
+        self.starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1])).astype(np.int64)
+        self.ends = self.starts + lengths
+        self.data = np.frombuffer(SEPARATOR.join(encoded) + SEPARATOR * self.PADDING, dtype=np.uint8)
+        # 每个字节所属的文本编号（分隔符与末尾填充记为 -1）
+        joined = len(self.data) - self.PADDING
+        self.doc_of = np.full(len(self.data), -1, dtype=np.int32)
+        self.doc_of[:joined] = np.repeat(np.arange(self.count, dtype=np.int32), lengths + 1)[:joined]
+
+        # 只保留待查字面量开头的 2-gram 位置，按 2-gram 分桶
+        self.wanted = np.zeros(1 << 16, dtype=bool)
+        for literal in literals:
+            needle = literal.encode('utf-8')
+            if len(needle) >= 2:
+                self.wanted[(needle[0] << 8) | needle[1]] = True
+        codes = (self.data[:-1].astype(np.uint16) << 8) | self.data[1:]
+        pos = np.flatnonzero(self.wanted[codes])
+        selected = codes[pos]
+        self.order = pos[np.argsort(selected, kind='stable')]
+        # 每个 2-gram 在 order 中的区间：offsets[code] .. offsets[code + 1]
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(selected, minlength=1 << 16))))
+
+    def positions(self, literal: bytes) -> np.ndarray:
+        """字面量在拼接字节数组中的全部起始位置"""
+        if len(literal) == 1:
+            return np.flatnonzero(self.data == literal[0])
+        code = (literal[0] << 8) | literal[1]
+        if not self.wanted[code]:
+            raise ValueError(f"字面量未在建索引时声明: {literal!r}")
+        pos = self.order[self.offsets[code]:self.offsets[code + 1]]
+        for j in range(2, len(literal)):
+            pos = pos[self.data[pos + j] == literal[j]]
+        return pos
+
+    def contains(self, literal: str, at_start: bool = False, at_end: bool = False) -> np.ndarray:
+        """各文本是否包含该字面量（可要求出现在文本开头 / 结尾），返回布尔数组"""
+        needle = literal.encode('utf-8')
+        if not needle or len(needle) > self.PADDING:
+            raise ValueError(f"不支持的字面量: {literal!r}")
+        mask = np.zeros(self.count, dtype=bool)
+        pos = self.positions(needle)
+        if not len(pos):
+            return mask
+        docs = self.doc_of[pos]
+        if at_start:
+            pos, docs = pos[pos == self.starts[docs]], docs[pos == self.starts[docs]]
+        if at_end:
+            keep = pos + len(needle) == self.ends[docs]
+            pos, docs = pos[keep], docs[keep]
+        mask[docs] = True
+        return mask
+
+
+# ==================== 特征 ====================
+
+def keyword_hits(index: SubstringIndex, keywords: List[str]) -> np.ndarray:
+    """每个文本命中的不同关键词个数（子串匹配，与逐个 `kw in text` 等价）"""
+    hits = np.zeros(index.count, dtype=np.int32)
+    for keyword in keywords:
+        hits += index.contains(keyword)
+    return hits
+
+
+def excluded_mask(index: SubstringIndex) -> np.ndarray:
+    """命中黑名单任一规则的文本（与逐个 re.search(pattern, text) 等价）"""
+    mask = np.zeros(index.count, dtype=bool)
+    for literal, at_start, at_end in EXCLUDE_TERMS:
+        mask |= index.contains(literal, at_start, at_end)
+    return mask
+
+
+def parse_times(values: List[Optional[str]]) -> np.ndarray:
+    """ISO 时间（GitHub 的 ...Z 格式）转为 datetime64[s]，无法解析的为 NaT"""
+    cleaned = [(v or '').rstrip('Z')[:19] or 'NaT' for v in values]
+    try:
+        return np.array(cleaned, dtype='datetime64[s]')
+    except ValueError:
+        return np.array([_parse_one(v) for v in cleaned], dtype='datetime64[s]')
+
+
+def _parse_one(value: str):
+    try:
+        return np.datetime64(value, 's')
+    except ValueError:
+        return np.datetime64('NaT')
+
+
+def compute_features(repos: List[Dict], now: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+    """把候选仓库转换为特征数组"""
+    now = np.datetime64((now or datetime.now(timezone.utc)).replace(tzinfo=None), 's')
+
+    texts = [f"{r.get('name', '')} {r.get('description') or ''}".lower() for r in repos]
+    languages = [(r.get('language') or '').lower() for r in repos]
+
+    created = parse_times([r.get('created_at') for r in repos])
+    age_days = (now - created).astype('timedelta64[s]').astype(np.float64) / 86400
+    age_days = np.where(np.isnat(created), np.inf, age_days)
+
+    stars = np.array([r.get('stargazers_count') or 0 for r in repos], dtype=np.float64)
+    keyword_set = set(PRIORITY_KEYWORDS)
+
+    index = SubstringIndex(texts, PRIORITY_KEYWORDS + [term[0] for term in EXCLUDE_TERMS])
+    return {
+        'excluded': excluded_mask(index),
+        'keywords': keyword_hits(index, PRIORITY_KEYWORDS),
+        'age_days': age_days,
+        'stars': stars,
+        'velocity': stars / np.maximum(age_days, 1.0),
+        'language': np.fromiter((lang in keyword_set and lang not in text
+                                 for lang, text in zip(languages, texts)), dtype=bool, count=len(texts)),
+    }
+
+
+def score(features: Dict[str, np.ndarray]) -> np.ndarray:
+    """一次向量化打分；被黑名单过滤的候选为 -inf"""
+    total = features['keywords'] * float(KEYWORD_SCORE)
+    recency = np.zeros_like(total)
+    for days, bonus in reversed(RECENCY_SCORES):
+        recency = np.where(features['age_days'] <= days, float(bonus), recency)
+    total += recency
+    total += VELOCITY_WEIGHT * np.log1p(features['velocity'])
+    total += features['language'] * float(LANGUAGE_SCORE)
+    return np.where(features['excluded'], -np.inf, total)
+
+
+# ==================== 排序 ====================
+
+def top_k(scores: np.ndarray, stars: np.ndarray, k: int) -> np.ndarray:
+    """部分选择出前 k 个（O(n)），只对这 k 个按 (分数, Stars) 降序排序"""
+    valid = np.flatnonzero(np.isfinite(scores))
+    if k <= 0 or not len(valid):
+        return valid[:0]
+    if len(valid) > k:
+        part = np.argpartition(-scores[valid], k - 1)[:k]
+        valid = valid[part]
+    order = np.lexsort((-stars[valid], -scores[valid]))
+    return valid[order]
+
+
+def rank_repos(repos: List[Dict], k: int, now: Optional[datetime] = None) -> List[Dict]:
+    """
+    对候选仓库打分并返回前 k 个（每个结果带 _priority 分数与 _keywords 命中的优先关键词数）
+
+    Args:
+        repos: GitHub 搜索 API 返回的仓库列表
+        k: 返回个数
+        now: 计算新近度的参考时间（默认当前时间）
+    """
+    if not repos:
+        return []
+
+    features = compute_features(repos, now)
+    scores = score(features)
+    excluded = int(features['excluded'].sum())
+    print(f"🧹 过滤掉 {excluded} 个收集类/教程类项目（候选 {len(repos)} 个）", file=sys.stderr)
+
+    selected = []
+    for i in top_k(scores, features['stars'], k):
+        repo = repos[i]
+        repo['_priority'] = round(float(scores[i]), 1)
+        repo['_keywords'] = int(features['keywords'][i])
+        selected.append(repo)
+    return selected
+
+
+# ==================== 主函数（性能测试） ====================
+
+def main():
+    """用模拟数据测试排序耗时"""
+    import argparse
+    import random
+    import time
+    from datetime import timedelta
+
+    parser = argparse.ArgumentParser(description='候选仓库排序性能测试')
+    parser.add_argument('--count', type=int, default=10000, help='模拟候选数')
+    parser.add_argument('--k', type=int, default=20, help='选取个数')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words = PRIORITY_KEYWORDS + ['fast', 'simple', 'library', 'framework', 'awesome-list',
+                                 'tutorial', 'web', 'server', 'data', 'game', 'engine']
+    now = datetime.now(timezone.utc)
+    repos = [{
+        'name': f"{rng.choice(words)}-{rng.choice(words)}-{i}",
+        'description': ' '.join(rng.choice(words) for _ in range(rng.randint(3, 15))),
+        'language': rng.choice(['Python', 'Rust', 'TypeScript', 'Go', 'Zig', None]),
+        'created_at': (now - timedelta(days=rng.uniform(0, 30))).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'stargazers_count': rng.randint(100, 20000),
+    } for i in range(args.count)]
+
+    runs = 20
+    start = time.perf_counter()
+    for _ in range(runs):
+        features = compute_features(repos, now)
+    feature_ms = (time.perf_counter() - start) / runs * 1000
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        selected = top_k(score(features), features['stars'], args.k)
+    rank_ms = (time.perf_counter() - start) / runs * 1000
+
+    scores = score(features)
+    for i in selected[:5]:
+        print(f"  {scores[i]:>7.1f}  ⭐{repos[i]['stargazers_count']:>6}  {repos[i]['name']}")
+    print(f"\n{args.count} 个候选取前 {args.k}: 特征提取 {feature_ms:.1f} ms，"
+          f"打分 + 选取 {rank_ms:.2f} ms", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
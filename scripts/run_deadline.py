@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+运行时间预算（--deadline）
+各阶段按优先级从队列中取任务：高优先级先做，预算不够时低优先级任务推迟到下次运行（持久保存），
+预算用完后不再开始新任务，已完成的结果照常上传后干净退出
+"""
+
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+# ==================== 配置区 ====================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DEFER_DIR = os.path.join(SCRIPT_DIR, '.cache', 'deferred')
+
+RESERVE_SHARE = 0.15    # 预算末尾留给上传 / 输出的比例（高优先级任务可以占用）
+MIN_RESERVE = 10.0      # 留给上传的最少秒数
+COST_SMOOTHING = 0.3    # 单条耗时估计的指数平滑系数
+
+# 尚无实测时各阶段单条任务的耗时估计（秒，含礼貌延迟）
+DEFAULT_COSTS = {'ai': 6.0, 'detail': 4.0, 'fetch': 5.0}
+
+PRIORITY_ORDER = {'high': 0, 'medium': 1, 'low': 2}
+
+
+def item_priority(item) -> str:
+    """记录上已计算的 priority（新闻 / 通知按关键词，仓库按名称 / 描述是否命中优先关键词；同级内保持排名顺序）"""
+    return getattr(item, 'priority', None) or item.get('priority') or 'low'
+
+
+def item_key(item) -> str:
+    """去重键：文章用 source_url，列表条目（如通知）用 url"""
+    return item.get('source_url') or item.get('url') or ''
+
+
+# ==================== 运行预算 ====================
+
+class RunDeadline:
+    """
+    一次运行的时间预算
+
+    用法:
+        deadline = RunDeadline(600, 'fetch_news')
+        for item in deadline.prioritize('ai', items):      # 合并上次推迟的任务，按优先级排序
+            if not deadline.admit('ai', item):             # 预算不够：推迟到下次运行
+                continue
+            ...                                            # 执行该阶段的工作
+        deadline.save()                                    # 保存推迟的任务，输出统计
+
+    admit() 用前后两次放行之间的间隔估计单条耗时（包含礼貌延迟和下游处理）：
+    普通任务只在扣除上传预留后仍够做一条时放行，高优先级任务在总预算内一律放行。
+    """
+
+    def __init__(self, seconds: float, script: str, defer_dir: str = DEFAULT_DEFER_DIR):
+        self.seconds = seconds
+        self.reserve = min(seconds / 2, max(MIN_RESERVE, seconds * RESERVE_SHARE))
+        self.started = time.monotonic()
+        self.path = os.path.join(defer_dir, f"{script}.json")
+        self.costs: Dict[str, float] = {}
+        self.last_admit: Dict[str, float] = {}
+        self.admitted: Dict[str, int] = {}
+        self.deferred: Dict[str, List[Dict]] = {}
+        self.carried = self._load()
+
+    # ---------- 预算 ----------
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        """距离截止时间的秒数（可能为负）"""
+        return self.seconds - self.elapsed()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def work_left(self) -> float:
+        """扣除上传预留后还能用于普通任务的秒数"""
+        return self.remaining() - self.reserve
+
+    def estimate(self, stage: str) -> float:
+        return self.costs.get(stage, DEFAULT_COSTS.get(stage, 1.0))
+
+    # ---------- 调度 ----------
+
+    def prioritize(self, stage: str, items: Iterable, rank: Callable = item_priority) -> List:
+        """
+        合并上次推迟到本次的任务并按优先级排序
+
+        同一优先级内上次推迟的任务排在前面（它们已经等了一轮），其余保持原有顺序（即抓取 / 排名顺序）。
+        本次重新抓到的条目以本次的数据为准。
+        """
+        items = list(items)
+        seen = {item_key(item) for item in items}
+        restored = self._restore(stage)
+        waited = {item_key(item) for item in restored}
+        carried = [item for item in restored if item_key(item) not in seen]
+        if restored:
+            print(f"⏳ 上次推迟的 {stage} 任务 {len(restored)} 条（{len(carried)} 条本次未再抓到，一并合并）",
+                  file=sys.stderr)
+
+        queue = [(PRIORITY_ORDER.get(rank(item), len(PRIORITY_ORDER)), 0, i, item)
+                 for i, item in enumerate(carried)]
+        queue += [(PRIORITY_ORDER.get(rank(item), len(PRIORITY_ORDER)), int(item_key(item) not in waited), i, item)
+                  for i, item in enumerate(items)]
+        queue.sort(key=lambda entry: entry[:3])
+        return [entry[3] for entry in queue]
+
+    def admit(self, stage: str, item, rank: Callable = item_priority) -> bool:
+        """
+        判断是否还有时间处理这一条；不放行时把它记为推迟（下次运行优先处理）
+
+        Returns:
+            True 表示应立即处理该任务
+        """
+        now = time.monotonic()
+        last = self.last_admit.pop(stage, None)
+        if last is not None:
+            sample = now - last
+            previous = self.costs.get(stage)
+            self.costs[stage] = sample if previous is None else \
+                previous + COST_SMOOTHING * (sample - previous)
+
+        if rank(item) == 'high':
+            allowed = not self.expired()
+        else:
+            allowed = self.work_left() >= self.estimate(stage)
+
+        if allowed:
+            self.last_admit[stage] = now
+            self.admitted[stage] = self.admitted.get(stage, 0) + 1
+        else:
+            self.defer(stage, item)
+        return allowed
+
+    def defer(self, stage: str, item):
+        """记录推迟到下次运行的任务"""
+        from summary_queue import snapshot
+        self.deferred.setdefault(stage, []).append(snapshot(item))
+
+    # ---------- 持久化 ----------
+
+    def _load(self) -> Dict[str, List[Dict]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 推迟任务文件损坏，忽略: {e}", file=sys.stderr)
+            return {}
+
+    def _restore(self, stage: str) -> List:
+        from summary_queue import restore
+        restored = (restore(data) for data in self.carried.pop(stage, ()))
+        return [item for item in restored if item is not None]
+
+    def save(self):
+        """写出本次推迟的任务（未被本次取用的旧任务一并保留），并输出统计"""
+        pending = {stage: list(items) for stage, items in self.carried.items()}
+        for stage, items in self.deferred.items():
+            pending.setdefault(stage, []).extend(items)
+        pending = {stage: items for stage, items in pending.items() if items}
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(pending, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+        state = '已超时' if self.expired() else f'剩余 {self.remaining():.0f} 秒'
+        print(f"\n⏱️ 时间预算 {self.seconds:.0f} 秒：用时 {self.elapsed():.0f} 秒（{state}）", file=sys.stderr)
+        for stage in sorted(set(self.admitted) | set(self.deferred)):
+            cost = f"，单条约 {self.costs[stage]:.1f} 秒" if stage in self.costs else ''
+            print(f"  {stage}: 完成 {self.admitted.get(stage, 0)} 条，推迟 {len(self.deferred.get(stage, ()))} 条{cost}",
+                  file=sys.stderr)
+        if pending:
+            print(f"  📌 下次运行优先处理: {', '.join(f'{s} {len(v)} 条' for s, v in pending.items())}",
+                  file=sys.stderr)
+
+
+def open_deadline(seconds: Optional[float], script: str) -> Optional[RunDeadline]:
+    """--deadline 未设置（或不为正）时返回 None，调用方照常全量处理"""
+    if not seconds or seconds <= 0:
+        return None
+    deadline = RunDeadline(seconds, script)
+    print(f"⏱️ 时间预算 {seconds:.0f} 秒（上传预留 {deadline.reserve:.0f} 秒）", file=sys.stderr)
+    return deadline
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+本地全文检索索引
+基于 SQLite FTS5，中文按二元组 (bigram) 切分，支持 title/summary/ai_summary/content 加权排序
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+# ==================== 配置区 ====================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INDEX_PATH = os.path.join(SCRIPT_DIR, '.cache', 'search_index.db')
+
+# 检索字段及其 bm25 权重（顺序与 FTS 表列顺序一致）
+INDEXED_FIELDS = ['title', 'summary', 'ai_summary', 'content']
+FIELD_WEIGHTS = [10.0, 5.0, 3.0, 1.0]
+
+# CJK 连续片段 / 拉丁字母数字单词
+CJK_RUN = r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+'
+TOKEN_PATTERN = re.compile(rf'({CJK_RUN})|([0-9a-z\u00c0-\u024f]+)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    source_url TEXT UNIQUE NOT NULL,
+    title TEXT,
+    summary TEXT,
+    source TEXT,
+    published_at TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, summary, ai_summary, content,
+    tokenize = 'unicode61'
+);
+"""
+
+
+# ==================== 分词 ====================
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    分词：中文片段切成重叠二元组，英文/数字按单词小写
+
+    例: "芯片AI新政" -> ['芯片', 'ai', '新政']，"集成电路" -> ['集成', '成电', '电路']
+    """
+    if not text:
+        return []
+
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        cjk, word = match.groups()
+        if word:
+            tokens.append(word)
+        elif len(cjk) == 1:
+            tokens.append(cjk)
+        else:
+            tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+    return tokens
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """把用户查询转换为 FTS5 MATCH 表达式（所有词都需命中）"""
+    terms = []
+    for token in dict.fromkeys(tokenize(query)):
+        # 单个汉字没有对应的二元组，用前缀匹配兜底
+        if len(token) == 1 and re.fullmatch(CJK_RUN, token):
+            terms.append(f'"{token}"*')
+        else:
+            terms.append(f'"{token}"')
+    return ' '.join(terms) or None
+
+
+# ==================== 索引 ====================
+
+class SearchIndex:
+    """文章全文检索索引"""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def add_articles(self, articles: Iterable[Dict]) -> int:
+        """
+        写入或更新文章（基于 source_url 去重）
+
+        Returns:
+            写入条数
+        """
+        count = 0
+        with self.conn:
+            for article in articles:
+                source_url = article.get('source_url')
+                if not source_url:
+                    continue
+
+                row = self.conn.execute(
+                    'SELECT id FROM documents WHERE source_url = ?', (source_url,)
+                ).fetchone()
+                values = (
+                    article.get('title'), article.get('summary'),
+                    article.get('source'), article.get('published_at'),
+                )
+                if row:
+                    doc_id = row[0]
+                    self.conn.execute(
+                        'UPDATE documents SET title = ?, summary = ?, source = ?, published_at = ? WHERE id = ?',
+                        values + (doc_id,)
+                    )
+                    self.conn.execute('DELETE FROM documents_fts WHERE rowid = ?', (doc_id,))
+                else:
+                    doc_id = self.conn.execute(
+                        'INSERT INTO documents (title, summary, source, published_at, source_url) VALUES (?, ?, ?, ?, ?)',
+                        values + (source_url,)
+                    ).lastrowid
+
+                self.conn.execute(
+                    'INSERT INTO documents_fts (rowid, title, summary, ai_summary, content) VALUES (?, ?, ?, ?, ?)',
+                    (doc_id, *(' '.join(tokenize(article.get(field))) for field in INDEXED_FIELDS))
+                )
+                count += 1
+        return count
+
+    def search(self, query: str, limit: int = 20, source: Optional[str] = None) -> List[Dict]:
+        """
+        检索文章
+
+        Args:
+            query: 查询文本（中英文均可）
+            limit: 返回条数
+            source: 可选，限定来源（如 'github_trending', 'SCUT_JW'）
+
+        Returns:
+            按相关度排序的结果列表（score 越小越相关）
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+
+        weights = ', '.join(str(w) for w in FIELD_WEIGHTS)
+        sql = f"""
+            SELECT d.title, d.summary, d.source, d.source_url, d.published_at,
+                   bm25(documents_fts, {weights}) AS score
+            FROM documents_fts
+            JOIN documents d ON d.id = documents_fts.rowid
+            WHERE documents_fts MATCH ?
+        """
+        params: list = [match]
+        if source:
+            sql += ' AND d.source = ?'
+            params.append(source)
+        sql += ' ORDER BY score LIMIT ?'
+        params.append(limit)
+
+        columns = ['title', 'summary', 'source', 'source_url', 'published_at', 'score']
+        return [dict(zip(columns, row)) for row in self.conn.execute(sql, params)]
+
+    def count(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def optimize(self):
+        """合并 FTS 段，批量导入后调用可加快查询"""
+        with self.conn:
+            self.conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize')")
+
+
+def index_articles(articles: List[Dict], path: str = DEFAULT_INDEX_PATH):
+    """供抓取脚本调用：把本次抓取结果写入本地索引"""
+    try:
+        index = SearchIndex(path)
+        count = index.add_articles(articles)
+        print(f"🔎 已写入本地检索索引 {count} 条（共 {index.count()} 条）: {path}", file=sys.stderr)
+        index.close()
+    except sqlite3.Error as e:
+        print(f"❌ 本地检索索引写入失败: {e}", file=sys.stderr)
+
+
+# ==================== 主函数 ====================
+
+def main():
+    """命令行：导入 JSON 文件或执行查询"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='本地全文检索索引')
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH, help='索引文件路径')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add_parser = subparsers.add_parser('add', help='导入抓取脚本 --output 生成的 JSON 文件')
+    add_parser.add_argument('files', nargs='+', help='JSON 文件路径')
+
+    query_parser = subparsers.add_parser('query', help='检索文章')
+    query_parser.add_argument('text', help='查询文本')
+    query_parser.add_argument('--limit', type=int, default=10, help='返回条数')
+    query_parser.add_argument('--source', default=None, help='限定来源')
+
+    args = parser.parse_args()
+    index = SearchIndex(args.index)
+
+    if args.command == 'add':
+        total = 0
+        for path in args.files:
+            with open(path, 'r', encoding='utf-8') as f:
+                total += index.add_articles(json.load(f))
+        index.optimize()
+        print(f"✅ 导入 {total} 条，索引共 {index.count()} 条", file=sys.stderr)
+
+    elif args.command == 'query':
+        start = time.perf_counter()
+        results = index.search(args.text, limit=args.limit, source=args.source)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for i, item in enumerate(results, 1):
+            print(f"{i:>2}. [{item['source']}] {item['title']}  ({item['published_at'] or '-'})")
+            print(f"    {item['source_url']}")
+        print(f"\n共 {len(results)} 条结果，耗时 {elapsed_ms:.1f} ms（索引 {index.count()} 条）", file=sys.stderr)
+
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
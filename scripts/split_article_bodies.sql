@@ -0,0 +1,66 @@
+-- ================================================
+-- 数据库迁移脚本：列表投影与正文分离
+-- 表名: article_bodies（新建）, articles_list, news_list, school_notices_list（视图）
+-- 目的: 列表页只取轻量字段；content 去掉重复的 AI 摘要后压缩写入 article_bodies，阅读页按 source_url 取回正文。
+--       App 上线视图与正文表的读取路径时执行本脚本，再用 python article_bodies.py migrate 回填正文；
+--       在此之前抓取脚本不写正文表，主表保留 content
+-- 依赖: 先执行 add_recommend_score_column.sql（视图包含 recommend_score 列）
+-- ================================================
+
+-- 1. 正文表（三张内容表共用，source_url 唯一）
+CREATE TABLE IF NOT EXISTS article_bodies (
+  id BIGSERIAL PRIMARY KEY,
+  source_url TEXT UNIQUE NOT NULL,
+  source_table VARCHAR(32) NOT NULL,
+  format VARCHAR(16) NOT NULL DEFAULT 'zlib',
+  body TEXT NOT NULL,
+  raw_chars INTEGER,
+  updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- body 已经压缩过，不再让 TOAST 重复压缩
+ALTER TABLE article_bodies ALTER COLUMN body SET STORAGE EXTERNAL;
+
+COMMENT ON TABLE article_bodies IS '文章正文（与主表分离存储，阅读页按 source_url 取回）';
+COMMENT ON COLUMN article_bodies.source_table IS '所属内容表（articles / news / school_notices）';
+COMMENT ON COLUMN article_bodies.format IS 'zlib: zlib 压缩后 base64；zlib+ai: 同上，且正文中的 AI 摘要已替换为 {{ai_summary}} 占位符';
+COMMENT ON COLUMN article_bodies.body IS '编码后的 Markdown 正文';
+COMMENT ON COLUMN article_bodies.raw_chars IS '还原后的正文字符数';
+
+-- 2. 行级安全策略（与内容表一致：公开读取，服务角色写入）
+ALTER TABLE article_bodies ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow public read access" ON article_bodies
+  FOR SELECT
+  USING (true);
+
+CREATE POLICY "Allow service role write" ON article_bodies
+  FOR ALL
+  USING (auth.role() = 'service_role')
+  WITH CHECK (auth.role() = 'service_role');
+
+-- 3. 列表投影视图（不含 content / ai_summary / fingerprint；security_invoker 使视图沿用主表的 RLS）
+CREATE OR REPLACE VIEW articles_list WITH (security_invoker = on) AS
+SELECT id, title, summary, source, source_url, author, tags,
+       published_at, fetched_at, is_favorited, recommend_score
+FROM articles;
+
+CREATE OR REPLACE VIEW news_list WITH (security_invoker = on) AS
+SELECT id, title, summary, source, source_url, author, category, priority, tags,
+       published_at, fetched_at, recommend_score
+FROM news;
+
+CREATE OR REPLACE VIEW school_notices_list WITH (security_invoker = on) AS
+SELECT id, title, summary, source, source_url, author, priority, tags,
+       published_at, fetched_at, is_favorited, recommend_score
+FROM school_notices;
+
+GRANT SELECT ON articles_list, news_list, school_notices_list TO anon, authenticated;
+
+-- 4. 显示结果
+SELECT
+  '✅ 正文表与列表视图创建成功！' as status,
+  (SELECT COUNT(*) FROM article_bodies) as bodies_total,
+  (SELECT COUNT(*) FROM articles_list) as articles_total,
+  (SELECT COUNT(*) FROM news_list) as news_total,
+  (SELECT COUNT(*) FROM school_notices_list) as notices_total;
@@ -0,0 +1,698 @@
+#!/usr/bin/env python3
+"""
+存储后端
+抓取脚本的上传都经由 supabase-py 风格的 client.table(...) 查询接口写入；本模块提供可替换的实现：
+Supabase（线上）、本地 SQLite、PostgREST 兼容的 HTTP 客户端与本地替身服务，以及走真实写入路径的上传压测。
+内容包、图片等静态资源经 Supabase Storage 存储桶发布（BucketClient）
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+# ==================== 配置区 ====================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(SCRIPT_DIR, '.cache', 'storage.db')
+
+BACKENDS = ('supabase', 'sqlite', 'rest')
+REST_PREFIX = '/rest/v1/'
+OBJECT_PREFIX = '/storage/v1/object/'
+REQUEST_TIMEOUT = 30
+
+TABLE_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# 模拟实验室运行命令时设置：HTTP 存储只允许连接该地址，防止测试数据写入线上项目
+LAB_URL_ENV = 'MOCK_LAB_SUPABASE_URL'
+
+
+class StorageError(Exception):
+    """存储后端错误（对应 supabase-py 的 APIError）"""
+
+
+class Response:
+    """查询结果（与 supabase-py 的 APIResponse 一样通过 .data 取行）"""
+
+    def __init__(self, data: List[Dict]):
+        self.data = data
+        self.count = len(data)
+
+
+# ==================== 本地 SQLite 后端 ====================
+
+class SQLiteClient:
+    """
+    本地 SQLite 存储
+
+    每张表为 id 自增主键 + source_url 唯一列 + JSON 行数据，表在首次访问时自动创建。
+    与 PostgREST 一样，一次 insert 是一个事务：批量中任一行冲突则整批失败。
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.lock = threading.Lock()
+        self.tables = set()
+
+    def close(self):
+        self.conn.close()
+
+    def table(self, name: str) -> 'SQLiteQuery':
+        if not TABLE_NAME.match(name):
+            raise StorageError(f"非法表名: {name}")
+        if name not in self.tables:
+            with self.lock, self.conn:
+                self.conn.execute(f'''
+                    CREATE TABLE IF NOT EXISTS "{name}" (
+                        id INTEGER PRIMARY KEY,
+                        source_url TEXT UNIQUE,
+                        data TEXT NOT NULL
+                    )
+                ''')
+            self.tables.add(name)
+        return SQLiteQuery(self, name)
+
+
+class SQLiteQuery:
+    """链式查询：select / insert / update + eq / in_ / limit，最后 execute()"""
+
+    def __init__(self, client: SQLiteClient, table: str):
+        self.client = client
+        self.table = table
+        self.op = None
+        self.columns: List[str] = []
+        self.payload: Any = None
+        self.filters: List[tuple] = []
+        self.max_rows: Optional[int] = None
+
+    # ---------- 构建 ----------
+
+    def select(self, columns: str = '*') -> 'SQLiteQuery':
+        self.op = 'select'
+        self.columns = [c.strip() for c in columns.split(',') if c.strip() and c.strip() != '*']
+        return self
+
+    def insert(self, rows) -> 'SQLiteQuery':
+        self.op = 'insert'
+        self.payload = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def update(self, changes: Dict) -> 'SQLiteQuery':
+        self.op = 'update'
+        self.payload = changes
+        return self
+
+    def eq(self, column: str, value) -> 'SQLiteQuery':
+        self.filters.append((column, [value]))
+        return self
+
+    def in_(self, column: str, values: Iterable) -> 'SQLiteQuery':
+        self.filters.append((column, list(values)))
+        return self
+
+    def limit(self, count: int) -> 'SQLiteQuery':
+        self.max_rows = count
+        return self
+
+    # ---------- 执行 ----------
+
+    def _where(self):
+        clauses, params = [], []
+        for column, values in self.filters:
+            if not values:
+                clauses.append('0')
+                continue
+            if column in ('id', 'source_url'):
+                target = column
+            else:
+                target = 'json_extract(data, ?)'
+                params.append(f'$.{column}')
+            clauses.append(f"{target} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        sql = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+        if self.max_rows is not None:
+            sql += f' LIMIT {int(self.max_rows)}'
+        return sql, params
+
+    def _rows(self, where: str, params: list) -> List[Dict]:
+        rows = []
+        for row_id, data in self.client.conn.execute(f'SELECT id, data FROM "{self.table}"{where}', params):
+            row = json.loads(data)
+            row['id'] = row_id
+            rows.append(row)
+        return rows
+
+    def execute(self) -> Response:
+        conn = self.client.conn
+        try:
+            with self.client.lock:
+                if self.op == 'select':
+                    rows = self._rows(*self._where())
+                    if self.columns:
+                        rows = [{c: row.get(c) for c in self.columns} for row in rows]
+                    return Response(rows)
+
+                if self.op == 'insert':
+                    inserted = []
+                    with conn:
+                        for row in self.payload:
+                            data = {k: v for k, v in row.items() if k != 'id'}
+                            cursor = conn.execute(
+                                f'INSERT INTO "{self.table}" (source_url, data) VALUES (?, ?)',
+                                (data.get('source_url'), json.dumps(data, ensure_ascii=False))
+                            )
+                            inserted.append(dict(data, id=cursor.lastrowid))
+                    return Response(inserted)
+
+                if self.op == 'update':
+                    if not self.filters:
+                        raise StorageError('update 需要过滤条件')
+                    changes = {k: v for k, v in self.payload.items() if k != 'id'}
+                    with conn:
+                        rows = self._rows(*self._where())
+                        for row in rows:
+                            row.update(changes)
+                            data = {k: v for k, v in row.items() if k != 'id'}
+                            conn.execute(
+                                f'UPDATE "{self.table}" SET source_url = ?, data = ? WHERE id = ?',
+                                (data.get('source_url'), json.dumps(data, ensure_ascii=False), row['id'])
+                            )
+                    return Response(rows)
+        except sqlite3.Error as e:
+            raise StorageError(f"{self.table}.{self.op}: {e}") from e
+
+        raise StorageError('未指定操作（select / insert / update）')
+
+
+# ==================== PostgREST HTTP 后端 ====================
+
+def _quote(value) -> str:
+    """PostgREST in.(...) 列表中的值统一加引号，避免逗号/括号被误解析"""
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+
+class RestClient:
+    """
+    PostgREST 兼容的 HTTP 客户端
+
+    可直接连接 Supabase 项目（URL + /rest/v1），也可连接本模块的本地替身服务；
+    不依赖 supabase 包。
+    """
+
+    def __init__(self, url: str, key: str = ''):
+        self.base_url = url.rstrip('/') + REST_PREFIX.rstrip('/')
+        self.session = requests.Session()
+        self.session.headers['Content-Type'] = 'application/json'
+        if key:
+            self.session.headers['apikey'] = key
+            self.session.headers['Authorization'] = f'Bearer {key}'
+
+    def table(self, name: str) -> 'RestQuery':
+        return RestQuery(self, name)
+
+
+class RestQuery(SQLiteQuery):
+    """与 SQLiteQuery 相同的链式接口，execute() 时转换为一次 HTTP 请求"""
+
+    def _params(self) -> List[tuple]:
+        params = []
+        for column, values in self.filters:
+            if len(values) == 1:
+                params.append((column, f'eq.{values[0]}'))
+            else:
+                params.append((column, f"in.({','.join(_quote(v) for v in values)})"))
+        if self.max_rows is not None:
+            params.append(('limit', str(self.max_rows)))
+        return params
+
+    def execute(self) -> Response:
+        session = self.client.session
+        url = f"{self.client.base_url}/{self.table}"
+        headers = {'Prefer': 'return=representation'}
+        params = self._params()
+
+        try:
+            if self.op == 'select':
+                params.insert(0, ('select', ','.join(self.columns) or '*'))
+                response = session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            elif self.op == 'insert':
+                response = session.post(url, json=self.payload, headers=headers, timeout=REQUEST_TIMEOUT)
+            elif self.op == 'update':
+                response = session.patch(url, params=params, json=self.payload, headers=headers,
+                                         timeout=REQUEST_TIMEOUT)
+            else:
+                raise StorageError('未指定操作（select / insert / update）')
+        except requests.RequestException as e:
+            raise StorageError(f"{self.table}.{self.op}: {e}") from e
+
+        if response.status_code >= 400:
+            try:
+                message = response.json().get('message', response.text)
+            except ValueError:
+                message = response.text
+            raise StorageError(f"{self.table}.{self.op}: HTTP {response.status_code} {message}")
+        return Response(response.json() if response.content else [])
+
+
+# ==================== Supabase Storage ====================
+
+class BucketClient:
+    """
+    Supabase Storage 存储桶（HTTP 接口，不依赖 supabase 包）
+
+    桶需在 Supabase 控制台预先创建并设为公开，App 按 public_url() 直接下载；
+    也可连接本模块的本地替身服务。
+    """
+
+    def __init__(self, url: str, key: str, bucket: str):
+        self.base_url = url.rstrip('/') + OBJECT_PREFIX.rstrip('/')
+        self.bucket = bucket
+        self.session = requests.Session()
+        if key:
+            self.session.headers['apikey'] = key
+            self.session.headers['Authorization'] = f'Bearer {key}'
+
+    def public_url(self, path: str = '') -> str:
+        """对象的公开访问地址（path 为空时返回桶前缀）"""
+        return f"{self.base_url}/public/{self.bucket}/{path}"
+
+    def _check(self, response: requests.Response, action: str):
+        if response.status_code >= 400:
+            try:
+                message = response.json().get('message', response.text)
+            except ValueError:
+                message = response.text
+            raise StorageError(f"{self.bucket}.{action}: HTTP {response.status_code} {message}")
+
+    def upload(self, path: str, data: bytes, content_type: str, cache_seconds: int = 3600):
+        """上传（覆盖同名对象）；cache_seconds 写入对象的 Cache-Control，CDN 与客户端按此缓存"""
+        headers = {'Content-Type': content_type, 'x-upsert': 'true', 'cache-control': f'max-age={cache_seconds}'}
+        try:
+            response = self.session.post(f"{self.base_url}/{self.bucket}/{path}", data=data,
+                                         headers=headers, timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            raise StorageError(f"{self.bucket}.upload: {e}") from e
+        self._check(response, 'upload')
+
+    def remove(self, paths: List[str]):
+        """批量删除对象（不存在的路径忽略）"""
+        if not paths:
+            return
+        try:
+            response = self.session.delete(f"{self.base_url}/{self.bucket}", json={'prefixes': paths},
+                                           timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            raise StorageError(f"{self.bucket}.remove: {e}") from e
+        self._check(response, 'remove')
+
+
+def check_lab_target(url: str):
+    """在模拟实验室中运行时，拒绝连接模拟服务以外的存储地址"""
+    lab_url = os.environ.get(LAB_URL_ENV)
+    if lab_url and url.rstrip('/') != lab_url.rstrip('/'):
+        raise StorageError(f"模拟实验室中只能连接模拟服务 {lab_url}，拒绝连接 {url}")
+
+
+def open_bucket(url: Optional[str], key: Optional[str], bucket: str) -> BucketClient:
+    """创建存储桶客户端（URL 与 Key 同 --supabase-url / --supabase-key）"""
+    if not url:
+        raise StorageError("发布到存储桶需要提供 Supabase URL 和 Key")
+    check_lab_target(url)
+    return BucketClient(url, key or '', bucket)
+
+
+# ==================== 本地 PostgREST 替身服务 ====================
+
+def _parse_in_list(text: str) -> List[str]:
+    """解析 in.(a,"b,c","d\\"e") 中的值列表"""
+    values, current, quoted, i = [], [], False, 0
+    while i < len(text):
+        ch = text[i]
+        if quoted:
+            if ch == '\\' and i + 1 < len(text):
+                i += 1
+                current.append(text[i])
+            elif ch == '"':
+                quoted = False
+            else:
+                current.append(ch)
+        elif ch == '"':
+            quoted = True
+        elif ch == ',':
+            values.append(''.join(current))
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+    if current or values:
+        values.append(''.join(current))
+    return values
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    把 PostgREST 请求（GET / POST / PATCH /rest/v1/<table>）转换为 SQLite 查询；
+    存储桶请求（/storage/v1/object/...）存放在内存中的 server.objects
+    """
+
+    server_version = 'PostgRESTStandIn/1.0'
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # 响应头与响应体分开写出，keep-alive 下避免 Nagle 延迟
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply_raw(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _reply(self, status: int, data=None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8') if data is not None else b''
+        self._reply_raw(status, body, 'application/json; charset=utf-8')
+
+    def _query(self, op: str) -> Optional[SQLiteQuery]:
+        parts = urlsplit(self.path)
+        if not parts.path.startswith(REST_PREFIX):
+            self._reply(404, {'message': f'未知路径: {parts.path}'})
+            return None
+
+        query = self.server.storage.table(parts.path[len(REST_PREFIX):].strip('/'))
+        if op == 'select':
+            query.select('*')
+        for name, value in parse_qsl(parts.query, keep_blank_values=True):
+            if name == 'select' and op == 'select':
+                query.select(value)
+            elif name == 'limit':
+                query.limit(int(value))
+            elif value.startswith('eq.'):
+                query.eq(name, int(value[3:]) if name == 'id' else value[3:])
+            elif value.startswith('in.(') and value.endswith(')'):
+                values = _parse_in_list(value[4:-1])
+                query.in_(name, [int(v) for v in values] if name == 'id' else values)
+            else:
+                self._reply(400, {'message': f'不支持的过滤条件: {name}={value}'})
+                return None
+        return query
+
+    def _raw_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _body(self):
+        return json.loads(self._raw_body() or b'null')
+
+    def _handle_object(self, op: str):
+        """存储桶：POST 上传、DELETE 批量删除、GET public/<bucket>/<path> 下载"""
+        path = urlsplit(self.path).path[len(OBJECT_PREFIX):]
+        objects = self.server.objects
+        if op == 'select':
+            obj = objects.get(path[len('public/'):]) if path.startswith('public/') else None
+            if obj is None:
+                self._reply(404, {'message': 'Object not found'})
+            else:
+                self._reply_raw(200, obj[2], obj[0], {'Cache-Control': obj[1]})
+        elif op == 'insert':
+            objects[path] = (self.headers.get('Content-Type') or 'application/octet-stream',
+                             self.headers.get('cache-control') or 'no-cache', self._raw_body())
+            self._reply(200, {'Key': path})
+        elif op == 'delete':
+            bucket = path.strip('/')
+            removed = [p for p in self._body().get('prefixes', []) if objects.pop(f'{bucket}/{p}', None)]
+            self._reply(200, [{'name': p} for p in removed])
+        else:
+            self._reply(405, {'message': f'不支持的操作: {op}'})
+
+    def _handle(self, op: str):
+        if urlsplit(self.path).path.startswith(OBJECT_PREFIX):
+            self._handle_object(op)
+            return
+        try:
+            query = self._query(op)
+            if query is None:
+                return
+            if op == 'insert':
+                query.insert(self._body())
+            elif op == 'update':
+                query.update(self._body())
+            result = query.execute()
+        except (StorageError, ValueError) as e:
+            status = 409 if 'UNIQUE' in str(e) else 400
+            self._reply(status, {'code': str(status), 'message': str(e)})
+            return
+
+        if op == 'select':
+            self._reply(200, result.data)
+        elif 'return=representation' in (self.headers.get('Prefer') or ''):
+            self._reply(201 if op == 'insert' else 200, result.data)
+        else:
+            self._reply(201 if op == 'insert' else 204)
+
+    def do_GET(self):
+        self._handle('select')
+
+    def do_POST(self):
+        self._handle('insert')
+
+    def do_PATCH(self):
+        self._handle('update')
+
+    def do_DELETE(self):
+        self._handle('delete')
+
+
+def start_stand_in(db_path: str, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """在后台线程启动替身服务；port=0 时自动选择空闲端口（server.server_address 查看）"""
+    server = ThreadingHTTPServer((host, port), StandInHandler)
+    server.daemon_threads = True
+    server.storage = SQLiteClient(db_path)
+    server.objects = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ==================== 入口 ====================
+
+_HTTP_CLIENTS: Dict[tuple, Any] = {}
+
+
+def open_storage(backend: str = 'supabase', url: Optional[str] = None, key: Optional[str] = None,
+                 path: Optional[str] = None):
+    """
+    创建存储客户端（均提供 client.table(name) 查询接口）
+
+    Args:
+        backend: 'supabase'（supabase-py）、'sqlite'（本地文件）或 'rest'（PostgREST HTTP）
+        url: Supabase 项目 URL / 替身服务地址
+        key: API Key
+        path: SQLite 文件路径（默认 scripts/.cache/storage.db）
+    """
+    if backend == 'sqlite':
+        return SQLiteClient(path or DEFAULT_DB_PATH)
+
+    if not url:
+        raise StorageError(f"{backend} 后端需要提供 URL 和 Key")
+    check_lab_target(url)
+
+    # HTTP 后端的客户端无状态、可共用：同一进程内（如常驻模式的多次运行）复用其连接池
+    cache_key = (backend, url, key)
+    if cache_key in _HTTP_CLIENTS:
+        return _HTTP_CLIENTS[cache_key]
+
+    if backend == 'rest':
+        client = _HTTP_CLIENTS[cache_key] = RestClient(url, key or '')
+        return client
+
+    if backend == 'supabase':
+        try:
+            from supabase import create_client
+        except ImportError:
+            raise StorageError("未安装 supabase 包，请运行: pip install supabase（或改用 --storage rest）")
+        if not key:
+            raise StorageError("supabase 后端需要提供 URL 和 Key")
+        client = _HTTP_CLIENTS[cache_key] = create_client(url, key)
+        return client
+
+    raise StorageError(f"未知存储后端: {backend}（可选 {', '.join(BACKENDS)}）")
+
+
+# ==================== 上传压测 ====================
+
+class LatencyRecorder:
+    """按操作类型记录每次 execute() 的耗时"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.lock = threading.Lock()
+
+    def record(self, op: str, seconds: float):
+        with self.lock:
+            self.samples.setdefault(op, []).append(seconds)
+
+    def report(self) -> List[str]:
+        lines = []
+        for op, samples in sorted(self.samples.items()):
+            samples = sorted(samples)
+
+            def pct(p):
+                return samples[min(len(samples) - 1, int(p / 100 * len(samples)))] * 1000
+
+            lines.append(f"  {op:<7} {len(samples):>6} 次  p50 {pct(50):7.2f} ms  "
+                         f"p95 {pct(95):7.2f} ms  p99 {pct(99):7.2f} ms  max {samples[-1] * 1000:7.2f} ms")
+        return lines
+
+
+class TimedClient:
+    """包装任意存储客户端，统计每次请求耗时（不改变查询行为）"""
+
+    def __init__(self, client, recorder: LatencyRecorder):
+        self.client = client
+        self.recorder = recorder
+
+    def table(self, name: str) -> '_TimedQuery':
+        return _TimedQuery(self.client.table(name), self.recorder)
+
+
+class _TimedQuery:
+    def __init__(self, query, recorder: LatencyRecorder, op: Optional[str] = None):
+        self._query = query
+        self._recorder = recorder
+        self._op = op
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if name == 'execute':
+            def execute(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return attr(*args, **kwargs)
+                finally:
+                    self._recorder.record(self._op or 'other', time.perf_counter() - start)
+            return execute
+
+        def chain(*args, **kwargs):
+            return _TimedQuery(attr(*args, **kwargs), self._recorder, self._op or name)
+        return chain
+
+
+def synthetic_articles(count: int, run: int = 0, changed_ratio: float = 0.0):
+    """生成模拟文章（生成器）；run > 0 时按比例修改部分条目的标题，用于测试增量更新"""
+    from article_record import Article, ArticleLayout
+
+    step = max(1, round(1 / changed_ratio)) if changed_ratio > 0 else 0
+    body = '压测正文内容，模拟一篇中等长度的文章。' * 40
+    for i in range(count):
+        title = f'压测文章 {i}'
+        if run and step and i % step == 0:
+            title += f'（第 {run} 次修订）'
+        yield Article(ArticleLayout, title, f'{i}: {body}', 'load_test',
+                      f'https://example.com/load-test/{i}', author='load_test',
+                      published_at='2026-01-01', fetched_at=f'2026-01-01T00:00:{run:02d}',
+                      tags=('load_test',))
+
+
+def run_load_test(client, table: str, count: int, batch_size: int, changed_ratio: float):
+    """通过 ChangeTracker.sync（抓取脚本的真实上传路径）写入模拟数据并统计吞吐与延迟"""
+    from change_detection import ChangeTracker
+
+    phases = [('首次写入', 0)]
+    if changed_ratio > 0:
+        phases.append((f'重复同步（{changed_ratio:.0%} 变化）', 1))
+
+    for label, run in phases:
+        recorder = LatencyRecorder()
+        tracker = ChangeTracker(TimedClient(client, recorder), table, batch_size=batch_size)
+
+        # 压测只看汇总结果，屏蔽逐批日志
+        stderr, sys.stderr = sys.stderr, open(os.devnull, 'w')
+        start = time.perf_counter()
+        try:
+            stats = tracker.sync(synthetic_articles(count, run, changed_ratio))
+        finally:
+            sys.stderr.close()
+            sys.stderr = stderr
+        elapsed = time.perf_counter() - start
+
+        print(f"\n📈 {label}: {count} 条，用时 {elapsed:.2f} s，{count / elapsed:,.0f} 行/秒")
+        print(f"  新增 {stats['inserted']}, 更新 {stats['updated']}, 未变 {stats['unchanged']}, 失败 {stats['failed']}")
+        for line in recorder.report():
+            print(line)
+
+
+# ==================== 主函数 ====================
+
+def main():
+    """命令行：启动本地替身服务，或执行上传压测"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='存储后端工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='启动本地 PostgREST 替身服务')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    serve_parser.add_argument('--port', type=int, default=54321, help='监听端口')
+    serve_parser.add_argument('--path', default=DEFAULT_DB_PATH, help='SQLite 文件路径')
+
+    load_parser = subparsers.add_parser('loadtest', help='上传压测')
+    load_parser.add_argument('--storage', choices=BACKENDS, default='rest',
+                             help='存储后端（rest 未指定 --url 时自动启动本地替身服务）')
+    load_parser.add_argument('--url', default='', help='Supabase / 替身服务地址')
+    load_parser.add_argument('--key', default='', help='API Key')
+    load_parser.add_argument('--path', default='', help='SQLite 文件路径（默认临时文件）')
+    load_parser.add_argument('--table', default='load_test', help='写入的表名')
+    load_parser.add_argument('--count', type=int, default=100000, help='模拟文章数')
+    load_parser.add_argument('--batch-size', type=int, default=100, help='每批条数')
+    load_parser.add_argument('--changed', type=float, default=0.1, help='第二轮同步中变化条目的比例（0 跳过）')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        server = start_stand_in(args.path, args.host, args.port)
+        host, port = server.server_address[:2]
+        print(f"🗄️ PostgREST 替身服务: http://{host}:{port}{REST_PREFIX}<table>（数据: {args.path}）", file=sys.stderr)
+        print(f"   抓取脚本使用: --storage rest --supabase-url http://{host}:{port}", file=sys.stderr)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = args.path or os.path.join(tmp_dir, 'load_test.db')
+        url = args.url
+        if args.storage == 'rest' and not url:
+            server = start_stand_in(db_path)
+            url = 'http://%s:%d' % server.server_address[:2]
+            print(f"🗄️ 已启动本地替身服务: {url}", file=sys.stderr)
+
+        try:
+            client = open_storage(args.storage, url, args.key, db_path)
+        except StorageError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+
+        print(f"🚀 压测: 后端 {args.storage}，{args.count} 条，每批 {args.batch_size} 条", file=sys.stderr)
+        run_load_test(client, args.table, args.count, args.batch_size, args.changed)
+
+
+if __name__ == '__main__':
+    main()
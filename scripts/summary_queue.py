@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+AI 摘要任务队列
+抓取脚本只把摘要任务写入本地持久队列并立即存储文章；独立的 worker 按限速消费队列，
+生成摘要后回填数据库中的 ai_summary（以及依赖摘要渲染的 content / summary 列）。
+任务按 (表, source_url) 去重，失败自动退避重试，进程崩溃后未完成的任务会被重新领取
+"""
+
+import importlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+from change_detection import INPUT_KEY, field_hash, summary_input
+
+# ==================== 配置区 ====================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_QUEUE_PATH = os.path.join(SCRIPT_DIR, '.cache', 'summary_queue.db')
+
+MAX_ATTEMPTS = 5          # 超过后标记为 failed，不再自动重试
+RETRY_BASE = 60           # 首次重试等待（秒），之后每次翻倍
+RETRY_MAX = 3600          # 重试等待上限（秒）
+LEASE_SECONDS = 300       # 领取后多久未完成视为 worker 已崩溃，任务重新可领
+CALL_INTERVAL = 1.5       # 两次 LLM 调用的最小间隔（秒）
+
+# 依赖 ai_summary 渲染、需要随摘要一起回填的列
+RENDERED_COLUMNS = ('ai_summary', 'content', 'summary')
+
+# 文章快照保存的字段（Article 的 slot，layout 与 ai_summary 单独处理）
+SNAPSHOT_FIELDS = (
+    'title', 'source', 'source_url', 'author', 'published_at', 'fetched_at',
+    'priority', 'category', 'tags', 'is_favorited', 'body', 'meta', '_content', '_summary', 'extra',
+)
+
+
+# ==================== 文章快照 ====================
+
+def _layout_path(layout: type) -> str:
+    """layout 的导入路径；抓取脚本以 __main__ 运行时换成脚本的模块名"""
+    module = layout.__module__
+    if module == '__main__':
+        main_file = getattr(sys.modules['__main__'], '__file__', '') or ''
+        module = os.path.splitext(os.path.basename(main_file))[0]
+    return f"{module}:{layout.__qualname__}"
+
+
+def snapshot(article) -> Dict:
+    """把记录序列化为 JSON 可存的快照（worker 据此重新渲染 content / summary）"""
+    layout = getattr(article, 'layout', None)
+    if layout is None:
+        return {'dict': dict(article)}
+
+    state = {name: getattr(article, name) for name in SNAPSHOT_FIELDS}
+    meta = state['meta']
+    if hasattr(meta, '_fields'):   # namedtuple（如仓库统计）
+        state['meta'] = {'fields': list(meta._fields), 'values': list(meta)}
+    return {'layout': _layout_path(layout), 'state': state}
+
+
+def restore(data: Dict):
+    """由快照还原记录；layout 无法导入时返回 None"""
+    if 'dict' in data:
+        return dict(data['dict'])
+
+    from article_record import Article
+    module, _, name = data['layout'].partition(':')
+    try:
+        layout = getattr(importlib.import_module(module), name)
+    except (ImportError, AttributeError) as e:
+        print(f"  ⚠️ 无法加载布局 {data['layout']}: {e}", file=sys.stderr)
+        return None
+
+    state = dict(data['state'])
+    meta = state.get('meta')
+    if isinstance(meta, dict) and 'fields' in meta:
+        state['meta'] = namedtuple('Meta', meta['fields'])(*meta['values'])
+    state['tags'] = tuple(state.get('tags') or ())
+
+    article = Article(layout, state['title'], state['body'], state['source'], state['source_url'])
+    for name, value in state.items():
+        setattr(article, name, value)
+    return article
+
+
+# ==================== 队列 ====================
+
+# 仅当任务输入未被重新入队替换时才更新
+CURRENT_JOB = 'WHERE table_name = ? AND source_url = ? AND input_hash = ?'
+
+Job = namedtuple('Job', ['table_name', 'source_url', 'content_type', 'input', 'input_hash',
+                         'article', 'summary', 'attempts'])
+
+
+class SummaryQueue:
+    """
+    SQLite 持久队列
+
+    状态: pending（待处理）→ running（已领取，带租约）→ done / failed
+    同一 (表, source_url) 只有一个任务：重复入队时输入未变则不动，输入变了则重置为 pending。
+    已生成的摘要保存在任务里，回填失败或数据库记录被重建时直接重写，不再调用 LLM。
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        table_name TEXT NOT NULL,
+        source_url TEXT NOT NULL,
+        content_type TEXT NOT NULL,
+        input TEXT NOT NULL,
+        input_hash TEXT NOT NULL,
+        article TEXT NOT NULL,
+        summary TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_at REAL NOT NULL DEFAULT 0,
+        last_error TEXT,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (table_name, source_url)
+    );
+    CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, next_at);
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(self.SCHEMA)
+
+    def enqueue(self, table: str, article, content_type: str, content: str,
+                priority: Optional[str] = None, route_chars: Optional[int] = None) -> bool:
+        """
+        加入摘要任务（幂等）
+
+        Args:
+            table: 文章所在的数据库表
+            article: 文章记录（Article 或 dict）
+            content_type: ai_summarizer 的内容类型（news / github / notice）
+            content: 发给 LLM 的输入文本
+            priority: 模型路由用的优先级（默认取文章的 priority 字段）
+            route_chars: 模型路由判断长短用的长度（默认为输入长度，见 ai_summarizer.route_for）
+
+        Returns:
+            是否新增或重置了任务（False 表示同一输入的任务已在队列中）
+        """
+        input_hash = field_hash(summary_input(article))
+        data = snapshot(article)
+        data['priority'] = priority or article.get('priority')
+        data['route_chars'] = route_chars
+        data = json.dumps(data, ensure_ascii=False)
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                'SELECT input_hash, status, summary FROM jobs WHERE table_name = ? AND source_url = ?',
+                (table, article['source_url'])
+            ).fetchone()
+
+            if row and row[0] == input_hash:
+                if row[1] in ('pending', 'running'):
+                    return False
+                # 已完成但抓取端仍没拿到摘要（如记录被重建）：保留摘要，重新回填即可
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'pending', attempts = 0, next_at = 0, article = ?, updated_at = ? "
+                    "WHERE table_name = ? AND source_url = ?",
+                    (data, now, table, article['source_url'])
+                )
+                return True
+
+            self.conn.execute(
+                'INSERT OR REPLACE INTO jobs (table_name, source_url, content_type, input, input_hash, '
+                'article, summary, status, attempts, next_at, updated_at) '
+                "VALUES (?, ?, ?, ?, ?, ?, NULL, 'pending', 0, 0, ?)",
+                (table, article['source_url'], content_type, content, input_hash, data, now)
+            )
+        return True
+
+    def claim(self, limit: int = 1) -> List[Job]:
+        """领取到期的任务（含租约过期的 running 任务），标记为 running"""
+        now = time.time()
+        with self.lock, self.conn:
+            rows = self.conn.execute(
+                "SELECT table_name, source_url, content_type, input, input_hash, article, summary, attempts "
+                "FROM jobs WHERE status IN ('pending', 'running') AND next_at <= ? "
+                "ORDER BY next_at, updated_at LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE jobs SET status = 'running', next_at = ?, updated_at = ? "
+                "WHERE table_name = ? AND source_url = ?",
+                [(now + LEASE_SECONDS, now, r[0], r[1]) for r in rows]
+            )
+        return [Job(*r) for r in rows]
+
+    def save_summary(self, job: Job, summary: str):
+        """LLM 返回后立即保存摘要，回填失败重试时不再重复调用"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                f'UPDATE jobs SET summary = ?, updated_at = ? {CURRENT_JOB}',
+                (summary, time.time(), job.table_name, job.source_url, job.input_hash)
+            )
+
+    def complete(self, job: Job):
+        with self.lock, self.conn:
+            self.conn.execute(
+                f"UPDATE jobs SET status = 'done', last_error = NULL, updated_at = ? {CURRENT_JOB}",
+                (time.time(), job.table_name, job.source_url, job.input_hash)
+            )
+
+    def fail(self, job: Job, error: str):
+        """记录失败：指数退避后重试，超过次数上限标记为 failed"""
+        attempts = job.attempts + 1
+        status = 'failed' if attempts >= MAX_ATTEMPTS else 'pending'
+        delay = min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+        with self.lock, self.conn:
+            self.conn.execute(
+                f'UPDATE jobs SET status = ?, attempts = ?, next_at = ?, last_error = ?, updated_at = ? '
+                f'{CURRENT_JOB}',
+                (status, attempts, time.time() + delay, error[:500], time.time(),
+                 job.table_name, job.source_url, job.input_hash)
+            )
+
+    def is_current(self, job: Job) -> bool:
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT input_hash FROM jobs WHERE table_name = ? AND source_url = ?',
+                (job.table_name, job.source_url)
+            ).fetchone()
+        return bool(row) and row[0] == job.input_hash
+
+    def retry_failed(self) -> int:
+        """把 failed 任务重新放回队列"""
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0, next_at = 0, updated_at = ? WHERE status = 'failed'",
+                (time.time(),)
+            )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            rows = self.conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return dict(rows)
+
+
+# ==================== Worker ====================
+
+class SummaryWorker:
+    """
+    消费摘要队列：按最小间隔调用 LLM，结果写回数据库
+
+    数据库中还没有对应记录（抓取端尚未上传）时按失败处理，退避后重试。
+    抓取端写入了阅读页预排版（--reader-payload）时 payloads=True，随 content 一起重新计算；
+    提供 journal（ArticleJournal）时把带摘要的新版本追加进本地日志；
+    提供 bundle_dir 时把回填后的文章重新发布进当天的内容包（抓取端发布时摘要还没生成），队列清空时发布一次。
+    """
+
+    def __init__(self, queue: SummaryQueue, client, api_key: str, interval: float = CALL_INTERVAL,
+                 payloads: bool = False, journal=None, bundle_dir: Optional[str] = None, bucket=None):
+        from ai_summarizer import generate_summary, ROUTE_METRICS
+        self.generate_summary = generate_summary
+        self.metrics = ROUTE_METRICS
+        self.queue = queue
+        self.client = client
+        self.api_key = api_key
+        self.interval = interval
+        self.payloads = payloads
+        self.journal = journal
+        self.bundle_dir = bundle_dir
+        self.bucket = bucket
+        self.filled: List[Dict] = []   # 待重新发布内容包的文章
+        self.last_call = 0.0
+        self.stats = {'summarized': 0, 'rewritten': 0, 'failed': 0, 'superseded': 0}
+
+    def _summarize(self, job: Job) -> Optional[str]:
+        delay = self.last_call + self.interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.last_call = time.monotonic()
+        data = json.loads(job.article)
+        return self.generate_summary(job.input, job.content_type, self.api_key,
+                                     priority=data.get('priority'), route_chars=data.get('route_chars'))
+
+    def _write_back(self, job: Job, summary: str):
+        """回填摘要及依赖它渲染的列，并更新指纹（下次抓取时 reuse_summary 可直接复用）"""
+        result = (self.client.table(job.table_name)
+                  .select('id, fingerprint')
+                  .eq('source_url', job.source_url)
+                  .execute())
+        if not result.data:
+            raise LookupError('数据库中尚无该记录')
+        row = result.data[0]
+
+        article = restore(json.loads(job.article))
+        if article is None or isinstance(article, dict):
+            columns = {'ai_summary': summary}
+        else:
+            article.ai_summary = summary
+            columns = {key: article[key] for key in RENDERED_COLUMNS if key in article.layout.fields}
+        if self.payloads and columns.get('content'):
+            from reader_payload import PAYLOAD_COLUMN, build_payload
+            columns[PAYLOAD_COLUMN] = build_payload(columns['content'])
+
+        prints = dict(row.get('fingerprint') or {})
+        prints.update({key: field_hash(value) for key, value in columns.items()})
+        prints[INPUT_KEY] = job.input_hash
+        rendered = dict(columns)
+        columns['fingerprint'] = prints
+        self.client.table(job.table_name).update(columns).eq('id', row['id']).execute()
+
+        # 日志中的上一版（抓取时写入的完整记录）补上摘要与重新渲染的列
+        if self.journal:
+            previous = self.journal.get(job.source_url)
+            base = previous['article'] if previous else (dict(article) if article is not None else None)
+            if base is not None:
+                # 合并后的 dict 没有布局：沿用上一版保存的摘要输入（摘要不改变输入）
+                if previous and previous.get('input') is not None:
+                    text = previous['input']
+                else:
+                    text = summary_input(article) if article is not None else None
+                self.journal.append(job.table_name, {**base, **rendered}, summary_text=text)
+
+        if self.bundle_dir and article is not None:
+            self.filled.append({**dict(article), **rendered})
+
+    def _publish_bundles(self):
+        """把本轮回填的文章作为增量发布进内容包"""
+        if not self.filled:
+            return
+        from feed_bundles import publish_bundles
+        publish_bundles(self.filled, self.bundle_dir, bucket=self.bucket)
+        self.filled = []
+
+    def process(self, job: Job):
+        title = job.source_url[-60:]
+        summary = job.summary
+        if not summary:
+            summary = self._summarize(job)
+            if not summary:
+                self.queue.fail(job, '摘要生成失败')
+                self.stats['failed'] += 1
+                print(f"  ⚠️ 摘要生成失败，稍后重试: {title}", file=sys.stderr)
+                return
+            self.queue.save_summary(job, summary)
+            self.stats['summarized'] += 1
+        else:
+            self.stats['rewritten'] += 1
+
+        # 处理期间文章输入变了（已重新入队）：旧摘要不再写回
+        if not self.queue.is_current(job):
+            self.stats['superseded'] += 1
+            return
+
+        try:
+            self._write_back(job, summary)
+        except Exception as e:
+            self.queue.fail(job, f'回填失败: {e}')
+            self.stats['failed'] += 1
+            print(f"  ⚠️ 回填失败，稍后重试: {title} ({e})", file=sys.stderr)
+            return
+        self.queue.complete(job)
+        print(f"  ✅ 已回填摘要: {title}", file=sys.stderr)
+
+    def run(self, max_jobs: Optional[int] = None, watch: float = 0) -> Dict[str, int]:
+        """
+        处理到期任务
+
+        Args:
+            max_jobs: 本次最多处理的任务数（None 表示不限）
+            watch: >0 时队列空了也不退出，每隔 watch 秒检查一次新任务
+        """
+        done = 0
+        while max_jobs is None or done < max_jobs:
+            jobs = self.queue.claim(1)
+            if not jobs:
+                self._publish_bundles()
+                if watch <= 0:
+                    break
+                time.sleep(watch)
+                continue
+            self.process(jobs[0])
+            done += 1
+        self._publish_bundles()
+
+        s = self.stats
+        print(f"📊 摘要任务: 生成 {s['summarized']}, 重新回填 {s['rewritten']}, "
+              f"失败 {s['failed']}, 已被替换 {s['superseded']}", file=sys.stderr)
+        self.metrics.report()
+        return s
+
+
+# ==================== 主函数 ====================
+
+def main():
+    """命令行：消费队列 / 查看状态 / 重试失败任务"""
+    import argparse
+    from storage import BACKENDS, StorageError, open_storage
+
+    parser = argparse.ArgumentParser(description='AI 摘要任务队列')
+    parser.add_argument('command', nargs='?', default='work', choices=['work', 'stats', 'retry-failed'],
+                        help='work 消费队列（默认）、stats 查看状态、retry-failed 重试失败任务')
+    parser.add_argument('--queue-path', default=DEFAULT_QUEUE_PATH, help='队列文件路径')
+    parser.add_argument('--max-jobs', type=int, default=None, help='本次最多处理的任务数')
+    parser.add_argument('--interval', type=float, default=CALL_INTERVAL, help='两次 LLM 调用的最小间隔（秒）')
+    parser.add_argument('--watch', type=float, default=0, help='常驻运行：队列空时每隔 N 秒检查新任务')
+    parser.add_argument('--api-key', default='', help='硅基流动 API Key（或环境变量 SILICONFLOW_API_KEY）')
+    parser.add_argument('--storage', choices=BACKENDS, default='supabase', help='回填摘要的存储后端')
+    parser.add_argument('--storage-path', default='', help='--storage sqlite 的数据库路径')
+    parser.add_argument('--reader-payload', action='store_true',
+                        help='与抓取端 --reader-payload 一致：重新渲染的正文同时更新阅读页预排版')
+    parser.add_argument('--journal', action='store_true', help='与抓取端 --journal 一致：带摘要的新版本追加写入本地日志')
+    parser.add_argument('--journal-dir', default='', help='日志目录（默认 scripts/.cache/journal）')
+    parser.add_argument('--bundle', action='store_true', help='与抓取端 --bundle 一致：回填摘要后重新发布当天的内容包')
+    parser.add_argument('--bundle-dir', default='', help='内容包目录（默认 scripts/.cache/bundles）')
+    parser.add_argument('--bundle-bucket', default='', help='同时上传内容包的 Supabase Storage 公开存储桶')
+    parser.add_argument('--supabase-url', default=os.environ.get('SUPABASE_URL'), help='Supabase URL')
+    parser.add_argument('--supabase-key', default=os.environ.get('SUPABASE_KEY'), help='Supabase Key')
+    args = parser.parse_args()
+
+    queue = SummaryQueue(args.queue_path)
+
+    if args.command == 'stats':
+        print(json.dumps(queue.stats(), ensure_ascii=False))
+        return
+    if args.command == 'retry-failed':
+        print(f"🔁 已重新放回 {queue.retry_failed()} 个失败任务", file=sys.stderr)
+        return
+
+    api_key = args.api_key or os.environ.get('SILICONFLOW_API_KEY')
+    if not api_key:
+        print("❌ 错误: 未提供 API Key（--api-key 或 SILICONFLOW_API_KEY）", file=sys.stderr)
+        sys.exit(1)
+    try:
+        client = open_storage(args.storage, args.supabase_url, args.supabase_key, args.storage_path)
+    except StorageError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    journal = None
+    if args.journal:
+        from article_journal import ArticleJournal, DEFAULT_JOURNAL_DIR
+        journal = ArticleJournal(args.journal_dir or DEFAULT_JOURNAL_DIR)
+
+    bundle_dir, bucket = None, None
+    if args.bundle:
+        from feed_bundles import DEFAULT_BUNDLE_DIR
+        bundle_dir = args.bundle_dir or DEFAULT_BUNDLE_DIR
+        if args.bundle_bucket:
+            from storage import open_bucket
+            try:
+                bucket = open_bucket(args.supabase_url, args.supabase_key, args.bundle_bucket)
+            except StorageError as e:
+                print(f"❌ 内容包只写本地目录: {e}", file=sys.stderr)
+
+    print(f"🤖 开始处理摘要队列: {queue.stats()}", file=sys.stderr)
+    try:
+        SummaryWorker(queue, client, api_key, args.interval, args.reader_payload,
+                      journal, bundle_dir, bucket).run(args.max_jobs, args.watch)
+    finally:
+        if journal:
+            journal.close()
+
+
+if __name__ == '__main__':
+    main()
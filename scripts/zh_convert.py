@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+繁简转换快速路径
+预先从 OpenCC 词典算出"会被转换的字符"集合：文本里一个都没有时（已是简体或英文）直接跳过 OpenCC，
+有时才走完整的词典转换；重复出现的字符串（作者、标签、转载标题）按内容缓存结果
+"""
+
+import sys
+import time
+from functools import lru_cache
+from typing import FrozenSet, List, Optional
+
+import opencc
+
+# ==================== 配置区 ====================
+
+CACHE_SIZE = 2048   # 转换结果缓存条数
+
+
+# ==================== 核心功能 ====================
+
+def trigger_chars(cc: 'opencc.OpenCC') -> Optional[FrozenSet[str]]:
+    """
+    计算会被转换改变的字符集合
+
+    对词典中每个"转换后不同"的词条，取其中实际发生变化的字符（长度不同时取词条的全部字符）。
+    文本中只要不含这些字符，任何改变文本的词条都不可能匹配，转换结果必然与原文相同。
+
+    Returns:
+        字符集合；OpenCC 实现不暴露词典（如 C++ 绑定版）时返回 None，表示不做快速判断
+    """
+    try:
+        if not cc._dict_init_done:
+            cc._init_dict()
+        groups = cc._dict_chain_data
+        dictionaries = [entry[2] for group in groups for entry in group]
+    except (AttributeError, IndexError, TypeError):
+        return None
+
+    chars = set()
+    for dictionary in dictionaries:
+        for key, value in dictionary.items():
+            target = value.split(' ')[0]   # 多个候选时取第一个（与转换时一致）
+            if key == target:
+                continue
+            if len(key) == len(target):
+                chars.update(a for a, b in zip(key, target) if a != b)
+            else:
+                chars.update(key)
+    return frozenset(chars)
+
+
+class SimplifiedConverter:
+    """
+    带快速路径的 OpenCC 转换器（接口与 opencc.OpenCC 相同：convert(text)）
+
+    用法:
+        cc = SimplifiedConverter('t2s')
+        cc.convert('繁體中文')  # -> '繁体中文'
+        cc.convert('简体中文')  # 一次集合扫描后原样返回
+    """
+
+    def __init__(self, conversion: str = 't2s', cache_size: int = CACHE_SIZE):
+        self.cc = opencc.OpenCC(conversion)
+        self.trigger = trigger_chars(self.cc)
+        self.convert = lru_cache(maxsize=cache_size)(self._convert)
+
+    def needs_conversion(self, text: str) -> bool:
+        """文本中是否含有会被转换的字符（集合扫描，遇到第一个即返回）"""
+        return self.trigger is None or not self.trigger.isdisjoint(text)
+
+    def _convert(self, text: str) -> str:
+        if not self.needs_conversion(text):
+            return text
+        return self.cc.convert(text)
+
+
+# ==================== 基准测试 ====================
+
+def load_feed_texts(sources: List[str]) -> List[str]:
+    """读取 RSS（URL 或本地文件）中的标题与清洗后的正文"""
+    import feedparser
+    import requests
+    from fetch_news import clean_html
+
+    texts = []
+    for source in sources:
+        if source.startswith(('http://', 'https://')):
+            try:
+                response = requests.get(source, timeout=(5, 30), headers={'User-Agent': 'Mozilla/5.0'})
+                response.raise_for_status()
+            except requests.RequestException as e:
+                print(f"⚠️ 跳过 {source}: {e}", file=sys.stderr)
+                continue
+            feed = feedparser.parse(response.content)
+        else:
+            feed = feedparser.parse(source)
+
+        for entry in feed.entries:
+            body = entry.content[0].value if 'content' in entry else entry.get('summary', '')
+            texts.append(entry.get('title', ''))
+            texts.append(clean_html(body) or entry.get('title', ''))
+        print(f"📄 {source}: {len(feed.entries)} 条", file=sys.stderr)
+    return texts
+
+
+def main():
+    """对比完整 OpenCC 转换与快速路径在真实订阅源数据上的耗时，并校验结果一致"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='繁简转换快速路径基准测试')
+    parser.add_argument('sources', nargs='*',
+                        help='RSS 地址或本地文件（默认使用 fetch_news.py 中配置的订阅源）')
+    parser.add_argument('--rounds', type=int, default=3, help='重复轮数（模拟多次运行中重复出现的文本）')
+    args = parser.parse_args()
+
+    if not args.sources:
+        from fetch_news import NEWS_SOURCES
+        args.sources = [config['url'] for config in NEWS_SOURCES.values()]
+
+    texts = load_feed_texts(args.sources)
+    if not texts:
+        print("❌ 没有可用的文本", file=sys.stderr)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    converter = SimplifiedConverter('t2s')
+    setup = time.perf_counter() - start
+
+    plain = converter.cc
+    start = time.perf_counter()
+    expected = [plain.convert(text) for _ in range(args.rounds) for text in texts]
+    baseline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    [converter._convert(text) for text in texts]
+    first_round = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [converter.convert(text) for _ in range(args.rounds) for text in texts]
+    fast = time.perf_counter() - start
+
+    skipped = sum(not converter.needs_conversion(text) for text in texts)
+    chars = sum(len(text) for text in texts)
+    info = converter.convert.cache_info()
+
+    print(f"\n文本 {len(texts)} 段（{chars} 字）× {args.rounds} 轮", file=sys.stderr)
+    print(f"  免转换（无繁体字符）: {skipped}/{len(texts)}", file=sys.stderr)
+    print(f"  转换字符集: {len(converter.trigger or ())} 字，构建 {setup * 1000:.0f} ms（每次运行一次）", file=sys.stderr)
+    print(f"  完整 OpenCC: {baseline * 1000:8.1f} ms", file=sys.stderr)
+    print(f"  仅跳过判断:  {first_round * args.rounds * 1000:8.1f} ms（不含缓存）", file=sys.stderr)
+    print(f"  快速路径:    {fast * 1000:8.1f} ms（{baseline / fast if fast else float('inf'):.0f}×，"
+          f"缓存命中 {info.hits}/{info.hits + info.misses}）", file=sys.stderr)
+    mismatches = sum(a != b for a, b in zip(expected, actual))
+    print(f"  结果一致: {'✅' if not mismatches else f'❌ {mismatches} 段不同'}", file=sys.stderr)
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()